@@ -0,0 +1,111 @@
+// Compares the number of heap allocations and the running time of the algorithm
+// when beach line elements and events are allocated in arenas and individually
+// on the heap.
+//
+// Usage:
+//   bazel run -c opt allocation_benchmark -- -N 10000,100000,1000000
+
+#include <atomic>
+#include <chrono>
+#include <cstdlib>
+#include <iomanip>
+#include <iostream>
+#include <new>
+#include <vector>
+
+#include "benchmark_util.h"
+#include "fortune.h"
+#include "kernels.h"
+
+#include "cxxopts.h"
+
+using namespace std;
+using namespace hyperbolic;
+
+// counts every allocation that is performed through the global operator new
+static atomic<unsigned long long> allocations = 0;
+
+void* operator new(size_t size) {
+    allocations.fetch_add(1, memory_order_relaxed);
+    if (void* p = malloc(size == 0 ? 1 : size)) return p;
+    throw bad_alloc();
+}
+
+void* operator new[](size_t size) {
+    return operator new(size);
+}
+
+void operator delete(void* p) noexcept {
+    free(p);
+}
+
+void operator delete[](void* p) noexcept {
+    free(p);
+}
+
+void operator delete(void* p, size_t) noexcept {
+    free(p);
+}
+
+void operator delete[](void* p, size_t) noexcept {
+    free(p);
+}
+
+struct Measurement {
+    unsigned long long allocations;
+    double milliseconds;
+};
+
+Measurement measure(const vector<Point<double>>& sites, MemoryMode mode) {
+    VoronoiDiagram v;
+    unsigned long long allocations_before = allocations;
+    auto begin = chrono::steady_clock::now();
+    {
+        FortuneHyperbolicImplementation<FullNativeKernel<double>, double> fortune(v, sites, false, mode);
+        fortune.calculate();
+    }
+    auto end = chrono::steady_clock::now();
+    return {allocations - allocations_before, chrono::duration<double, milli>(end - begin).count()};
+}
+
+int main(int argc, char* argv[]) {
+    cxxopts::Options options(
+            argv[0], "Measures heap allocations and running time for the different memory modes.");
+
+    options.add_options()
+            ("N", "Numbers of sites", cxxopts::value<vector<int>>()->default_value("10000,100000,1000000"))
+            ("r,repetitions", "Number of repetitions per configuration", cxxopts::value<int>()->default_value("3"))
+            ("s,seed", "Seed used for sampling the sites", cxxopts::value<unsigned int>()->default_value("1"))
+            ("h,help", "Print usage");
+
+    auto result = options.parse(argc, argv);
+
+    if (result.count("help")) {
+        cout << options.help() << endl;
+        exit(0);
+    }
+
+    int repetitions = result["r"].as<int>();
+
+    cout << setw(10) << "N" << setw(16) << "heap allocs" << setw(16) << "arena allocs" << setw(12) << "reduction"
+         << setw(12) << "heap ms" << setw(12) << "arena ms" << setw(10) << "speedup" << "\n";
+
+    for (int N : result["N"].as<vector<int>>()) {
+        vector<Point<double>> sites = sample_sites(N, result["s"].as<unsigned int>());
+
+        Measurement heap = {0, 0}, arena = {0, 0};
+        for (int i = 0; i < repetitions; i++) {
+            Measurement h = measure(sites, MemoryMode::HEAP);
+            Measurement a = measure(sites, MemoryMode::ARENA);
+            heap = {h.allocations, heap.milliseconds + h.milliseconds / repetitions};
+            arena = {a.allocations, arena.milliseconds + a.milliseconds / repetitions};
+        }
+
+        cout << setw(10) << N << setw(16) << heap.allocations << setw(16) << arena.allocations
+             << setw(11) << fixed << setprecision(1) << 100.0 * (1.0 - double(arena.allocations) / heap.allocations) << "%"
+             << setw(12) << setprecision(1) << heap.milliseconds << setw(12) << arena.milliseconds
+             << setw(9) << setprecision(2) << heap.milliseconds / arena.milliseconds << "x" << "\n";
+    }
+
+    return 0;
+}
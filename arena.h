@@ -0,0 +1,94 @@
+#pragma once
+
+#include <algorithm>
+#include <cstddef>
+#include <memory>
+#include <new>
+#include <utility>
+#include <vector>
+
+namespace hyperbolic {
+    /**
+     * Determines how the objects that are created during the computation (beach line elements and events) are
+     * allocated.
+     * ARENA: objects are placed in large slabs that are released in bulk when the computation ends.
+     * HEAP: every object is allocated individually using new (mainly useful as a baseline for benchmarks).
+     * */
+    enum class MemoryMode {ARENA, HEAP};
+
+    /**
+     * Owns all objects of type T that are created through it. Objects are never released individually, instead
+     * all of them are destroyed when the arena is destroyed. Pointers to created objects stay valid for the whole
+     * lifetime of the arena and can therefore be used as (non-owning) handles.
+     * */
+    template<typename T>
+    class Arena {
+    private:
+        struct alignas(T) Slot {
+            std::byte data[sizeof(T)];
+        };
+
+        static constexpr size_t INITIAL_SLAB_SIZE = 256;
+        static constexpr size_t MAXIMUM_SLAB_SIZE = 1 << 16;
+
+        MemoryMode mode;
+
+        struct Slab {
+            std::unique_ptr<Slot[]> slots;
+            size_t capacity, used = 0;
+            explicit Slab(size_t capacity) : slots(new Slot[capacity]), capacity(capacity) {};
+        };
+
+        // slabs holding the objects in ARENA mode. Only the last slab can have unused slots
+        std::vector<Slab> slabs;
+
+        // objects allocated in HEAP mode
+        std::vector<T*> objects;
+
+        size_t count = 0;
+
+        // returns a slab with at least one unused slot
+        Slab& getSlab() {
+            if (slabs.empty() || slabs.back().used == slabs.back().capacity)
+                slabs.emplace_back(slabs.empty() ? INITIAL_SLAB_SIZE : std::min(2 * slabs.back().capacity, MAXIMUM_SLAB_SIZE));
+            return slabs.back();
+        }
+
+    public:
+        explicit Arena(MemoryMode mode = MemoryMode::ARENA) : mode(mode) {};
+        Arena(const Arena&) = delete;
+        Arena& operator=(const Arena&) = delete;
+
+        ~Arena() {
+            if (mode == MemoryMode::HEAP) {
+                for (T* o : objects) delete o;
+                return;
+            }
+            for (Slab& slab : slabs) {
+                for (size_t i = 0; i < slab.used; i++)
+                    std::launder(reinterpret_cast<T*>(slab.slots[i].data))->~T();
+            }
+        }
+
+        /**
+         * constructs a new object from args and returns a pointer to it
+         * */
+        template<typename... Args>
+        T* create(Args&&... args) {
+            count++;
+            if (mode == MemoryMode::HEAP) {
+                objects.push_back(new T(std::forward<Args>(args)...));
+                return objects.back();
+            }
+            Slab& slab = getSlab();
+            T* o = new (slab.slots[slab.used].data) T(std::forward<Args>(args)...);
+            slab.used++;
+            return o;
+        }
+
+        // number of objects created so far
+        [[nodiscard]] size_t size() const {
+            return count;
+        }
+    };
+}
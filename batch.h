@@ -0,0 +1,37 @@
+#pragma once
+
+#include <vector>
+
+#include "geometry.h"
+#include "fortune.h"
+#include "parallel.h"
+
+namespace hyperbolic {
+    /**
+     * Calculates the Voronoi diagrams of many independent sets of sites within one process. The site sets are
+     * distributed over a pool of worker threads and diagrams[i] is the diagram of sites[i].
+     *
+     * Thread safety: a FortuneHyperbolicImplementation, together with the BeachLine and the kernel K (including
+     * the circle event cache of FullNativeKernel) it owns, must only ever be used by one thread. Each site set is
+     * therefore computed by its own instance that is constructed and destroyed on the worker processing it, so
+     * workers never share mutable state. The only shared objects are the (read-only) input sites and the output
+     * diagram slots, each of which is written by exactly one worker.
+     *
+     * @param sites The site sets whose diagrams should be computed
+     * @param diagrams Receives the computed diagrams, resized to the number of site sets
+     * @param threads The number of worker threads. 0 uses one worker per hardware thread
+     * @param verbose Whether to print the beach line in each iteration or not
+     * @param seed Seed for the priorities of the beach line treaps, shared by all site sets
+     */
+    template<class K, typename _float_T> requires Kernel<K, _float_T>
+    void calculate_diagrams(const vector<vector<Point<double>>>& sites, vector<VoronoiDiagram>& diagrams,
+                            unsigned int threads = 0, bool verbose = false, uint64_t seed = DEFAULT_PRIORITY_SEED) {
+        diagrams.clear();
+        diagrams.resize(sites.size());
+
+        parallel_for(sites.size(), threads, [&](size_t i, unsigned int) {
+            FortuneHyperbolicImplementation<K, _float_T> fortune(diagrams[i], sites[i], verbose, MemoryMode::ARENA, seed);
+            fortune.calculate();
+        });
+    }
+}
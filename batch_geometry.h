@@ -0,0 +1,134 @@
+#pragma once
+
+#include <cmath>
+#include <cstddef>
+
+#include "geometry.h"
+
+/*
+ * array-at-a-time versions of the geometric calculations in calculations.h. Points are passed as contiguous buffers
+ * of n (r, theta) pairs, i.e., in the layout of an (n, 2) NumPy array or of the payload of a binary file. The loops
+ * have no branches and no dependencies between iterations, so that the compiler can vectorize them (e.g., using the
+ * vector math library for the trigonometric functions). Unless stated otherwise, result may be the same buffer as
+ * the input.
+ * */
+
+namespace hyperbolic {
+    // moves an angular coordinate into [0, 2*M_PI)
+    inline double wrap_angle(double theta) {
+        return theta - 2*M_PI*std::floor(theta / (2*M_PI));
+    }
+
+    /**
+     * half of the squared Minkowski norm of the difference of two points on the hyperboloid, i.e., (cosh(d) - 1) / 2
+     * for points at distance d. Other than cosh(d), it is a sum of non-negative terms and does not lose precision when
+     * the points are far from the origin
+     * */
+    inline double half_chord_sq(double r_a, double theta_a, double r_b, double theta_b) {
+        double sinh_half_r = std::sinh((r_a - r_b) / 2), sin_half_theta = std::sin((theta_a - theta_b) / 2);
+        return sinh_half_r*sinh_half_r + std::sinh(r_a)*std::sinh(r_b)*sin_half_theta*sin_half_theta;
+    }
+
+    // result[i] is the hyperbolic distance between a[i] and b[i]
+    inline void batch_distance(const double* a, const double* b, double* result, size_t n) {
+        for (size_t i = 0; i < n; i++)
+            result[i] = 2*std::asinh(std::sqrt(half_chord_sq(a[2*i], a[2*i + 1], b[2*i], b[2*i + 1])));
+    }
+
+    // result[i] is the hyperbolic distance between p and points[i]
+    inline void batch_distance(const Point<double>& p, const double* points, double* result, size_t n) {
+        for (size_t i = 0; i < n; i++)
+            result[i] = 2*std::asinh(std::sqrt(half_chord_sq(p.r, p.theta, points[2*i], points[2*i + 1])));
+    }
+
+    /**
+     * translates the points by the distance d along the x-axis, as translate in calculations.h does. The translation
+     * is applied to the hyperboloid coordinates, which needs neither case distinctions nor std::acos
+     * */
+    inline void batch_translate(const double* points, double d, double* result, size_t n) {
+        double cosh_d = std::cosh(d), sinh_d = std::sinh(d);
+        for (size_t i = 0; i < n; i++) {
+            double r = points[2*i], theta = points[2*i + 1];
+            double sinh_r = std::sinh(r);
+            double x = sinh_r*std::cos(theta)*cosh_d + std::cosh(r)*sinh_d;
+            double y = sinh_r*std::sin(theta);
+            result[2*i] = std::asinh(std::hypot(x, y));
+            result[2*i + 1] = wrap_angle(std::atan2(y, x));
+        }
+    }
+
+    // rotates the points around the origin by angle, with the resulting angular coordinates in [0, 2*M_PI)
+    inline void batch_rotate(const double* points, double angle, double* result, size_t n) {
+        for (size_t i = 0; i < n; i++) {
+            result[2*i] = points[2*i];
+            result[2*i + 1] = wrap_angle(points[2*i + 1] + angle);
+        }
+    }
+
+    // writes the (x, y, z) coordinates of the points in the hyperboloid model to result, which holds 3n values
+    inline void batch_to_hyperboloid(const double* points, double* result, size_t n) {
+        for (size_t i = 0; i < n; i++) {
+            double r = points[2*i], theta = points[2*i + 1];
+            double sinh_r = std::sinh(r);
+            result[3*i] = sinh_r*std::cos(theta);
+            result[3*i + 1] = sinh_r*std::sin(theta);
+            result[3*i + 2] = std::cosh(r);
+        }
+    }
+
+    // converts n (x, y, z) coordinates in the hyperboloid model to polar coordinates
+    inline void batch_from_hyperboloid(const double* coordinates, double* result, size_t n) {
+        for (size_t i = 0; i < n; i++) {
+            double x = coordinates[3*i], y = coordinates[3*i + 1];
+            result[2*i] = std::asinh(std::hypot(x, y));
+            result[2*i + 1] = wrap_angle(std::atan2(y, x));
+        }
+    }
+
+    // writes the (x, y) coordinates of the points in the Poincaré disk to result
+    inline void batch_to_poincare(const double* points, double* result, size_t n) {
+        for (size_t i = 0; i < n; i++) {
+            double r = std::tanh(points[2*i] / 2), theta = points[2*i + 1];
+            result[2*i] = r*std::cos(theta);
+            result[2*i + 1] = r*std::sin(theta);
+        }
+    }
+
+    // converts n (x, y) coordinates in the Poincaré disk to polar coordinates
+    inline void batch_from_poincare(const double* coordinates, double* result, size_t n) {
+        for (size_t i = 0; i < n; i++) {
+            double x = coordinates[2*i], y = coordinates[2*i + 1];
+            result[2*i] = 2*std::atanh(std::hypot(x, y));
+            result[2*i + 1] = wrap_angle(std::atan2(y, x));
+        }
+    }
+
+    /**
+     * writes the (x, y) coordinates of the points in the native representation to result, i.e., the Euclidean
+     * coordinates of a point whose distance to the origin is the hyperbolic distance
+     * */
+    inline void batch_to_cartesian(const double* points, double* result, size_t n) {
+        for (size_t i = 0; i < n; i++) {
+            double r = points[2*i], theta = points[2*i + 1];
+            result[2*i] = r*std::cos(theta);
+            result[2*i + 1] = r*std::sin(theta);
+        }
+    }
+
+    /**
+     * result[i] is the midpoint of the geodesic between a[i] and b[i]. The hyperboloid coordinates of the points are
+     * added and normalized, which keeps the precision of the midpoint even when the geodesic runs far from the origin
+     * */
+    inline void batch_geodesic_midpoint(const double* a, const double* b, double* result, size_t n) {
+        for (size_t i = 0; i < n; i++) {
+            double r_a = a[2*i], theta_a = a[2*i + 1], r_b = b[2*i], theta_b = b[2*i + 1];
+            // the Minkowski norm of the sum is sqrt(2*(1 + cosh(d))) = 2*sqrt(1 + half_chord_sq)
+            double norm = 2*std::sqrt(1 + half_chord_sq(r_a, theta_a, r_b, theta_b));
+            double sinh_a = std::sinh(r_a), sinh_b = std::sinh(r_b);
+            double x = (sinh_a*std::cos(theta_a) + sinh_b*std::cos(theta_b)) / norm;
+            double y = (sinh_a*std::sin(theta_a) + sinh_b*std::sin(theta_b)) / norm;
+            result[2*i] = std::asinh(std::hypot(x, y));
+            result[2*i + 1] = wrap_angle(std::atan2(y, x));
+        }
+    }
+}
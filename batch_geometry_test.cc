@@ -0,0 +1,119 @@
+#include <gtest/gtest.h>
+
+#include "batch_geometry.h"
+#include "calculations.h"
+
+#include <random>
+#include <vector>
+
+using namespace hyperbolic;
+
+namespace {
+    // n (r, theta) pairs
+    std::vector<double> random_points(size_t n, double max_r) {
+        std::mt19937 rng(5);
+        std::uniform_real_distribution<double> uniform(0.0, 1.0);
+        std::vector<double> points;
+        for (size_t i = 0; i < n; i++) {
+            points.push_back(max_r * uniform(rng));
+            points.push_back(2 * M_PI * uniform(rng));
+        }
+        return points;
+    }
+
+    Point<double> point(const std::vector<double>& points, size_t i) {
+        return {points[2 * i], points[2 * i + 1]};
+    }
+
+    // difference of two angular coordinates, taking into account that 0 and 2*M_PI are the same angle
+    double angle_difference(double a, double b) {
+        double d = std::abs(a - b);
+        return std::min(d, 2 * M_PI - d);
+    }
+}
+
+TEST(BatchGeometryTest, DistanceMatchesScalarDistance) {
+    const size_t n = 1000;
+    std::vector<double> a = random_points(n, 10), b = random_points(n + 1, 10);
+    b.erase(b.begin(), b.begin() + 2);
+    std::vector<double> result(n), to_first(n);
+    batch_distance(a.data(), b.data(), result.data(), n);
+    batch_distance(point(a, 0), b.data(), to_first.data(), n);
+
+    for (size_t i = 0; i < n; i++) {
+        EXPECT_NEAR(distance(point(a, i), point(b, i)), result[i], 1e-9);
+        EXPECT_NEAR(distance(point(a, 0), point(b, i)), to_first[i], 1e-9);
+    }
+}
+
+TEST(BatchGeometryTest, TranslateAndRotateMatchScalarVersions) {
+    const size_t n = 1000;
+    std::vector<double> points = random_points(n, 5);
+    std::vector<double> translated(2 * n), rotated(2 * n);
+    batch_translate(points.data(), 1.5, translated.data(), n);
+    batch_rotate(points.data(), -2.5, rotated.data(), n);
+
+    for (size_t i = 0; i < n; i++) {
+        Point<double> p = point(points, i);
+        Point<double> t = translate(p, 1.5), r = rotate(p, -2.5);
+        EXPECT_NEAR(t.r, translated[2 * i], 1e-9);
+        EXPECT_NEAR(0, angle_difference(t.theta, translated[2 * i + 1]), 1e-6);
+        EXPECT_EQ(r.r, rotated[2 * i]);
+        EXPECT_NEAR(0, angle_difference(r.theta, rotated[2 * i + 1]), 1e-12);
+    }
+
+    // translating back yields the original points
+    batch_translate(translated.data(), -1.5, translated.data(), n);
+    for (size_t i = 0; i < 2 * n; i++)
+        EXPECT_NEAR(points[i], translated[i], 1e-9);
+}
+
+TEST(BatchGeometryTest, ConversionsMatchScalarVersions) {
+    const size_t n = 1000;
+    std::vector<double> points = random_points(n, 10);
+    std::vector<double> hyperboloid(3 * n), poincare(2 * n), cartesian(2 * n), back(2 * n);
+
+    batch_to_hyperboloid(points.data(), hyperboloid.data(), n);
+    for (size_t i = 0; i < n; i++) {
+        HyperboloidVec<double> v(point(points, i));
+        EXPECT_DOUBLE_EQ(v.x, hyperboloid[3 * i]);
+        EXPECT_DOUBLE_EQ(v.y, hyperboloid[3 * i + 1]);
+        EXPECT_DOUBLE_EQ(v.z, hyperboloid[3 * i + 2]);
+    }
+    batch_from_hyperboloid(hyperboloid.data(), back.data(), n);
+    for (size_t i = 0; i < 2 * n; i++)
+        EXPECT_NEAR(points[i], back[i], 1e-9);
+
+    batch_to_poincare(points.data(), poincare.data(), n);
+    batch_from_poincare(poincare.data(), back.data(), n);
+    for (size_t i = 0; i < n; i++) {
+        EXPECT_LT(std::hypot(poincare[2 * i], poincare[2 * i + 1]), 1);
+        EXPECT_NEAR(points[2 * i], back[2 * i], 1e-6);
+        EXPECT_NEAR(points[2 * i + 1], back[2 * i + 1], 1e-9);
+    }
+
+    batch_to_cartesian(points.data(), cartesian.data(), n);
+    for (size_t i = 0; i < n; i++)
+        EXPECT_NEAR(points[2 * i], std::hypot(cartesian[2 * i], cartesian[2 * i + 1]), 1e-12);
+}
+
+TEST(BatchGeometryTest, GeodesicMidpointIsEquidistant) {
+    const size_t n = 1000;
+    std::vector<double> a = random_points(n, 10), b = random_points(n + 1, 10);
+    b.erase(b.begin(), b.begin() + 2);
+    std::vector<double> middles(2 * n), to_a(n), to_b(n), between(n);
+    batch_geodesic_midpoint(a.data(), b.data(), middles.data(), n);
+    batch_distance(a.data(), middles.data(), to_a.data(), n);
+    batch_distance(middles.data(), b.data(), to_b.data(), n);
+    batch_distance(a.data(), b.data(), between.data(), n);
+
+    for (size_t i = 0; i < n; i++) {
+        EXPECT_NEAR(between[i] / 2, to_a[i], 1e-9);
+        EXPECT_NEAR(between[i] / 2, to_b[i], 1e-9);
+    }
+
+    // the geodesic between two far points on opposite sides of the origin runs close to it
+    double far[4] = {30, 0.5, 30, 0.5 + M_PI - 1e-9}, middle[2];
+    batch_geodesic_midpoint(far, far + 2, middle, 1);
+    EXPECT_LT(middle[0], 1e-3);
+}
@@ -1,10 +1,41 @@
 #pragma once
+#include <cstdint>
 #include <iostream>
 #include "datastructures.h"
 #include "calculations.h"
+#include "statistics.h"
 
 namespace hyperbolic {
-    //TODO: ensure efficient access to neighbors
+    // seed that is used for the treap priorities if no other seed is specified
+    constexpr uint64_t DEFAULT_PRIORITY_SEED = 0;
+
+    /**
+     * Determines where the search for the position of a new site in the beach line starts. ROOT searches from the root
+     * of the treap. FINGER starts at the element of the last insertion, i.e., at the first or the last element, and
+     * climbs towards the root only as far as necessary. Both yield the same positions, but FINGER needs fewer
+     * evaluations of the before predicate when consecutive sites are angularly close (e.g., for sorted, clustered or
+     * grid-like inputs). Since FINGER evaluates the predicate for elements close to the reference angle more often,
+     * it relies on a kernel that evaluates the predicate reliably, as the two searches may diverge otherwise
+     * */
+    enum class SearchMode {ROOT, FINGER};
+
+    /**
+     * small and fast pseudo random number generator (SplitMix64) used to draw the priorities of the treap.
+     * Beach lines whose generators are seeded identically end up with identical treap shapes.
+     * */
+    class PriorityGenerator {
+    private:
+        uint64_t state;
+    public:
+        explicit PriorityGenerator(uint64_t seed) : state(seed) {};
+
+        uint32_t operator()() {
+            uint64_t z = (state += 0x9e3779b97f4a7c15);
+            z = (z ^ (z >> 30)) * 0xbf58476d1ce4e5b9;
+            z = (z ^ (z >> 27)) * 0x94d049bb133111eb;
+            return static_cast<uint32_t>((z ^ (z >> 31)) >> 32);
+        }
+    };
 
     /**
      * Elements that are within the beach line.
@@ -14,66 +45,55 @@ namespace hyperbolic {
     class BeachLineElement {
     public:
         using rSite = Site<_float_T>&;
-        using rPoint = Point<double>&;
-        using pPoint = Point<double>*;
 
         // the two sites defining the element
         rSite first, second;
         // pointer to circle element of this element with the next / previous element in the beach line
-        shared_ptr<CircleEvent<_float_T>> next = nullptr, previous = nullptr;
-        // pointer to an edge on which the element moves
-        Edge* const edge;
-
-        BeachLineElement(rSite first, rSite second, Edge* edge, pPoint& v) : first(first), second(second), edge(edge), assignableVertex(v) {
-            std::random_device d;
-            std::mt19937 rng(d());
-            //rng.seed(14232645);
-            std::uniform_int_distribution<uint32_t> uint_dist;
-            priority = uint_dist(rng);
-        };
-        ~BeachLineElement() {
-            del(leftChild);
-            del(rightChild);
-        }
+        CircleEvent<_float_T> *next = nullptr, *previous = nullptr;
+        // index of the edge on which the element moves and the end of that edge (0 or 1) that is set to the vertex at
+        // which the element disappears in a circle event
+        const size_t edge;
+        const uint8_t edgeEnd;
 
-        // used to assign a vertex to the right vertex from the stored edge when this element is involved in a circle event
-        void assignVertex(rPoint v) const {
-            assignableVertex = &v;
-        }
-        static void del(BeachLineElement* t) {
-            if (!t) return;
-            del(t->leftChild);
-            t->leftChild = nullptr;
-            del(t->rightChild);
-            t->rightChild = nullptr;
-            delete t;
-        };
-        // pointer to a reference of one of the vertices int the stored edge
-        pPoint& assignableVertex;
+        BeachLineElement(rSite first, rSite second, size_t edge, uint8_t edgeEnd)
+                : first(first), second(second), edge(edge), edgeEnd(edgeEnd) {};
 
         // internal properties used for the data structure
         BeachLineElement *leftChild = nullptr, *rightChild = nullptr;
         BeachLineElement* parent = nullptr;
+        // the clockwise and counterclockwise neighbors in the beach line. The beach line is cyclic, i.e., the left
+        // neighbor of its first element is its last element
+        BeachLineElement *leftNeighbor = nullptr, *rightNeighbor = nullptr;
 
         int count = 0;
-        uint32_t priority;
+        // assigned by the beach line when the element is inserted
+        uint32_t priority = 0;
     };
 
     /**
      * class implementing all operations on the beach line
-     * currently implemented as a treap
+     * currently implemented as a treap whose elements are additionally linked to their neighbors, so that neighbors are
+     * found in constant time. All operations on the treap are iterative. The beach line does not own its elements,
+     * they are owned by the caller (usually an Arena that lives as long as the computation). If collectStatistics is set, the evaluations of the
+     * before predicate and the size of the beach line are recorded in the statistics passed to the constructor
      * */
-    template<class K, typename _float_T>
+    template<class K, typename _float_T, bool collectStatistics = false>
     class BeachLine {
     private:
         using pBeachLineElement = BeachLineElement<_float_T>*;
         using rBeachLineElement = BeachLineElement<_float_T>&;
 
         K& kernel;
-        // root of the treap
-        pBeachLineElement root = nullptr;
+        // source of the priorities of inserted elements
+        PriorityGenerator priorities;
+        // root of the treap and its leftmost element
+        pBeachLineElement root = nullptr, firstElement = nullptr;
         // angular coordinate of the last inserted vertex
         _float_T reference_angle = 0;
+        SweepStatistics* statistics;
+        SearchMode searchMode = SearchMode::ROOT;
+        // the elements whose counts are updated after a split or merge, reused to avoid allocations
+        vector<pBeachLineElement> path;
 
         // transforms an angle to the corresponding angle under the perspective of reference_angle
         [[nodiscard]] _float_T transformAngle(_float_T theta) const {
@@ -98,41 +118,74 @@ namespace hyperbolic {
             }
         };
 
-        // split and merge as fundamental operation of the treap
-        static void split(pBeachLineElement t, pBeachLineElement &l, pBeachLineElement &r, int pos, int add=0) {
-            // splits such that l holds elements from positions [0 .. pos-1], and r from [pos .. n]
-            if (!t) {
-                l = r = nullptr;
-                return;
-            }
+        // updates the elements on the path bottom-up, as the recursive formulation of split and merge would
+        void updatePath() {
+            for (auto e = path.rbegin(); e != path.rend(); ++e)
+                update(*e);
+        }
 
-            int current_position = getCount(t->leftChild) + add;
-            if (pos > current_position) {
-                split(t->rightChild, t->rightChild, r, pos, current_position + 1);
-                l = t;
-            } else if (pos < current_position) {
-                split(t->leftChild, l, t->leftChild, pos, add);
-                r = t;
-            } else {
-                l = t->leftChild;
-                t->leftChild = nullptr;
-                r = t;
+        // split and merge as fundamental operation of the treap
+        void split(pBeachLineElement t, pBeachLineElement &l, pBeachLineElement &r, int pos) {
+            // splits such that l holds elements from positions [0 .. pos-1], and r from [pos .. n]. left and right
+            // point to the links at which the next elements of l and r are attached
+            pBeachLineElement *left = &l, *right = &r;
+            int add = 0;
+            path.clear();
+            while (true) {
+                if (!t) {
+                    *left = *right = nullptr;
+                    break;
+                }
+                path.push_back(t);
+
+                int current_position = getCount(t->leftChild) + add;
+                if (pos > current_position) {
+                    pBeachLineElement next = t->rightChild;
+                    *left = t;
+                    left = &t->rightChild;
+                    add = current_position + 1;
+                    t = next;
+                } else if (pos < current_position) {
+                    pBeachLineElement next = t->leftChild;
+                    *right = t;
+                    right = &t->leftChild;
+                    t = next;
+                } else {
+                    *left = t->leftChild;
+                    t->leftChild = nullptr;
+                    *right = t;
+                    break;
+                }
             }
-            update(t);
+            updatePath();
         };
 
-        static void merge(pBeachLineElement &t, pBeachLineElement l, pBeachLineElement r) {
-            if (!l || !r)
-                t = l ? l : r;
-            else if (l->priority > r->priority) {
-                merge(l->rightChild, l->rightChild, r);
-                t = l;
-            } else {
-                merge(r->leftChild, l, r->leftChild);
-                t = r;
+        void merge(pBeachLineElement &t, pBeachLineElement l, pBeachLineElement r) {
+            // link points to where the next element of the merged treap is attached
+            pBeachLineElement* link = &t;
+            path.clear();
+            while (l && r) {
+                if (l->priority > r->priority) {
+                    *link = l;
+                    path.push_back(l);
+                    link = &l->rightChild;
+                    l = l->rightChild;
+                } else {
+                    *link = r;
+                    path.push_back(r);
+                    link = &r->leftChild;
+                    r = r->leftChild;
+                }
             }
+            *link = l ? l : r;
+            update(*link);
+            updatePath();
+        };
 
-            update(t);
+        // links a and b as neighbors, with a being clockwise of b
+        static void link(pBeachLineElement a, pBeachLineElement b) {
+            a->rightNeighbor = b;
+            b->leftNeighbor = a;
         };
 
         // returns the position of a given BeachLineElement
@@ -146,73 +199,92 @@ namespace hyperbolic {
             return pos;
         };
 
-        // copies a pointer to all remaining elements in the tree rooted at e into v
-        static void getRemainingElements(pBeachLineElement e, vector<pBeachLineElement> &v) {
-            if (!e) return;
-            getRemainingElements(e->leftChild, v);
-            v.push_back(e);
-            getRemainingElements(e->rightChild, v);
-        };
-
-        // search for the element at position pos in the tree rooted at t
-        void find(pBeachLineElement &result, pBeachLineElement t, int pos, int add=0) {
-            if (!t) {
-                result = nullptr;
-                return;
-            }
-
-            int current_position = getCount(t->leftChild) + add;
-            if (pos == current_position)
-                result = t;
-            else if (pos > current_position)
-                find(result, t->rightChild, pos, current_position + 1);
-            else
-                find(result, t->leftChild, pos, add);
-        };
+        // checks whether theta is between the reference angle and the intersection represented by t
+        bool before(pBeachLineElement t, _float_T theta, const SweepCircle<_float_T>& sweep) {
+            if constexpr (collectStatistics) statistics->beforeCalls++;
+            return kernel.before(theta, reference_angle, t->first, t->second, sweep);
+        }
 
         // binary search returning the last BeachLineElement with an angular coordinate smaller than theta + its position at a sweep circle radius of r_sweep
-        void find(pBeachLineElement &result, int &pos, pBeachLineElement t, _float_T theta, _float_T r_sweep, int add=0) {
-            // returns the first element clockwise of theta in t (i.e. with a angular coordinate smaller/equal theta)
-            if (!t) {
-                result = nullptr;
-                return;
-            }
-            int current_position = getCount(t->leftChild) + add;
-
-            if (kernel.before(theta, reference_angle, t->first.point, t->second.point, r_sweep)) {
-                find(result, pos, t->leftChild, theta, r_sweep, add);
-            } else {
-                find(result, pos, t->rightChild, theta, r_sweep, current_position + 1);
-                if (result == nullptr) {
+        void find(pBeachLineElement &result, int &pos, pBeachLineElement t, _float_T theta, const SweepCircle<_float_T>& sweep, int add=0) {
+            // returns the first element clockwise of theta in t (i.e. with a angular coordinate smaller/equal theta),
+            // which is the last element at which the search descends to the right. result and pos are left unchanged
+            // if there is no such element in t
+            while (t) {
+                int current_position = getCount(t->leftChild) + add;
+
+                if (before(t, theta, sweep)) {
+                    t = t->leftChild;
+                } else {
                     result = t;
                     pos = current_position;
+                    add = current_position + 1;
+                    t = t->rightChild;
                 }
-                return;
             }
         };
 
-        // finds the leftmost/rightmost child of the tree rooted at e
-        void getLeftmostChild(pBeachLineElement &result, pBeachLineElement e) {
-            if (!e) {
-                result = nullptr;
+        /**
+         * finger search with the same result as find, starting at the first element if theta is at most M_PI (i.e., ccw
+         * of the last inserted site) and at the last element otherwise. The search climbs the left (right) spine of the
+         * treap while the elements are clockwise (counterclockwise) of theta and then descends into the subtree that
+         * contains the result. Since the subtrees along a spine grow exponentially, the number of evaluated predicates
+         * is logarithmic in the distance to the result instead of the size of the beach line.
+         *
+         * The climb starts at the parent of the first (last) element. The intersections of these elements are the
+         * closest to the reference angle, so they are the most likely to be evaluated on the wrong side of it when the
+         * precision does not suffice. Like a search from the root, the finger search only evaluates them if the result
+         * is next to them, which keeps the results of both searches identical in these cases
+         * */
+        void fingerFind(pBeachLineElement &result, int &pos, _float_T theta, const SweepCircle<_float_T>& sweep) {
+            if (theta <= M_PI) {
+                // result is the last spine element clockwise of theta, the result lies in its right subtree
+                pBeachLineElement e = firstElement->parent;
+                while (e && !before(e, theta, sweep)) {
+                    result = e;
+                    pos = getCount(e->leftChild);
+                    e = e->parent;
+                }
+                if (result)
+                    find(result, pos, result->rightChild, theta, sweep, pos + 1);
+                else
+                    find(result, pos, e ? e->leftChild : root, theta, sweep);
                 return;
             }
-            find(result, e, 0);
-        };
 
-        void getRightmostChild(pBeachLineElement &result, pBeachLineElement e) {
-            if (!e) {
-                result = nullptr;
-                return;
+            // after is the last spine element counterclockwise of theta, the result lies in its left subtree
+            pBeachLineElement e = firstElement->leftNeighbor->parent, after = nullptr;
+            while (e && before(e, theta, sweep)) {
+                after = e;
+                e = e->parent;
             }
-            find(result, e, getCount(e) - 1);
-        };
-    public:
-        BeachLine(K& k) : kernel(k) {};
+            int add = 0;
+            if (e) {
+                result = e;
+                pos = getCount(root) - getCount(e->rightChild) - 1;
+                add = pos + 1;
+            }
+            find(result, pos, after ? after->leftChild : (e ? e->rightChild : root), theta, sweep, add);
+        }
 
-        ~BeachLine() {
-            delete root;
+        // number of predicates a search from the root evaluates if its result is at position pos (-1 if there is none)
+        [[nodiscard]] unsigned long long getRootSearchLength(int pos) const {
+            unsigned long long length = 0;
+            int add = 0;
+            for (pBeachLineElement t = root; t; length++) {
+                int current_position = getCount(t->leftChild) + add;
+                if (current_position > pos) {
+                    t = t->leftChild;
+                } else {
+                    add = current_position + 1;
+                    t = t->rightChild;
+                }
+            }
+            return length;
         }
+    public:
+        explicit BeachLine(K& k, uint64_t seed = DEFAULT_PRIORITY_SEED, SweepStatistics* statistics = nullptr)
+                : kernel(k), priorities(seed), statistics(statistics) {};
 
         /**
          * returns the position of the first BeachLineElement clockwise of s.theta. first and second are set as
@@ -220,39 +292,66 @@ namespace hyperbolic {
          * */
         int search(const Point<_float_T>& s, _float_T r_sweep, pBeachLineElement &first, pBeachLineElement &second) {
             first = nullptr;
-            int position_first;
-            find(first, position_first, root, transformAngle(s.theta), r_sweep);
+            int position_first = -1;
+            // the terms of the sweep circle are shared by all comparisons of the search
+            SweepCircle<_float_T> sweep(r_sweep);
+            if (searchMode == SearchMode::FINGER) {
+                unsigned long long calls = 0;
+                if constexpr (collectStatistics) calls = statistics->beforeCalls;
+                fingerFind(first, position_first, transformAngle(s.theta), sweep);
+                if constexpr (collectStatistics) {
+                    calls = statistics->beforeCalls - calls;
+                    statistics->savedBeforeCalls += static_cast<long long>(getRootSearchLength(position_first)) -
+                                                    static_cast<long long>(calls);
+                }
+            } else {
+                find(first, position_first, root, transformAngle(s.theta), sweep);
+            }
 
-            auto size = BeachLine::getCount(root);
+            // theta is clockwise of all elements, so it lies between the last and the first element
             if (!first) {
                 position_first = getCount(root) - 1;
-                BeachLine::find(first, root, position_first);
+                first = firstElement->leftNeighbor;
             }
-
-            second = nullptr;
-            BeachLine::find(second, root, (position_first + 1) % size);
+            second = first->rightNeighbor;
 
             return position_first;
         };
 
         /**
-         * inserts the elements firstNew and second new right after the position-th element.
-         * It then re-arranges the beach line such that firstNew is the first element and
-         * second new is the last element. firstNew.second must be equal to secondNew.first
+         * inserts the elements firstNew and second new right after the element previous (nullptr if the beach line is
+         * empty), e.g., the element first found by search. It then re-arranges the beach line such that firstNew is
+         * the first element and second new is the last element. firstNew.second must be equal to secondNew.first
          * */
-        void insert(int position, rBeachLineElement firstNew, rBeachLineElement secondNew) {
-            // inserts the neighboring beach line elements firstNew and second new after position positionFirst and rearranges the order such that firstNew is the first element and secondNew is the last element
+        void insert(pBeachLineElement previous, rBeachLineElement firstNew, rBeachLineElement secondNew) {
+            // inserts the neighboring beach line elements firstNew and second new after previous and rearranges the order such that firstNew is the first element and secondNew is the last element
             auto size = BeachLine::getCount(root);
-            position = (size > 0) ? (position + 1) % size : 0;
+            int position = (size > 0) ? (BeachLine::getPosition(previous) + 1) % size : 0;
+
+            firstNew.priority = priorities();
+            secondNew.priority = priorities();
+
+            // in cyclic order, the new elements follow previous, with secondNew preceding firstNew
+            if (size > 0) {
+                pBeachLineElement next = previous->rightNeighbor;
+                link(previous, &secondNew);
+                link(&firstNew, next);
+            } else {
+                link(&firstNew, &secondNew);
+            }
+            link(&secondNew, &firstNew);
+            firstElement = &firstNew;
 
             pBeachLineElement left, right;
             split(root, left, right, position);
 
-            BeachLine::merge(right, &firstNew, right);
-            BeachLine::merge(left, left, &secondNew);
-            BeachLine::merge(root, right, left);
+            merge(right, &firstNew, right);
+            merge(left, left, &secondNew);
+            merge(root, right, left);
 
             reference_angle = firstNew.first.point.theta;
+            if constexpr (collectStatistics)
+                statistics->maximumBeachLineSize = std::max<unsigned long long>(statistics->maximumBeachLineSize, getCount(root));
         };
 
         /**
@@ -270,30 +369,34 @@ namespace hyperbolic {
             split(root, left, middle, position);
             split(middle, middle, right, 2);
 
-            delete middle;
-
-            // get left and right neighbors
-            BeachLine::getRightmostChild(leftNeighbor, left);
-            BeachLine::getLeftmostChild(rightNeighbor, right);
-            if (leftNeighbor == nullptr) BeachLine::getRightmostChild(leftNeighbor, right);
-            if (rightNeighbor == nullptr) BeachLine::getLeftmostChild(rightNeighbor, left);
+            leftNeighbor = e.first.leftNeighbor;
+            rightNeighbor = e.second.rightNeighbor;
+            link(leftNeighbor, &newElement);
+            link(&newElement, rightNeighbor);
+            if (firstElement == &e.first) firstElement = &newElement;
 
-            BeachLine::merge(left, left, &newElement);
-            BeachLine::merge(root, left, right);
+            newElement.priority = priorities();
+            merge(left, left, &newElement);
+            merge(root, left, right);
         };
 
+        void setSearchMode(SearchMode mode) {
+            searchMode = mode;
+        }
+
         pBeachLineElement getFirstElement() {
-            pBeachLineElement result;
-            getLeftmostChild(result, root);
-            return result;
+            return firstElement;
         }
 
         [[nodiscard]] int size() const {
             return BeachLine::getCount(root);
         };
 
+        // copies a pointer to all elements into v, in the order of the beach line
         void getRemainingElements(vector<pBeachLineElement>& v) {
-            getRemainingElements(root, v);
+            pBeachLineElement e = firstElement;
+            for (int i = 0; i < size(); i++, e = e->rightNeighbor)
+                v.push_back(e);
         }
 
 #ifndef NDEBUG
@@ -0,0 +1,90 @@
+// Measures the time spent on the beach line per event, i.e., on searching
+// it at site events and on splitting and merging the treap at site and
+// circle events.  The kernel predicates are part of the search time, the
+// prediction of circle events is not included.  Searches from the root of
+// the treap are compared with finger searches.  With --sorted, the angular
+// coordinates are sorted like the radii, so that consecutive site events
+// are angularly close.
+//
+// Usage:
+//   bazel run -c opt beachline_benchmark -- -N 10000,100000,1000000 --sorted
+
+#include <algorithm>
+#include <cmath>
+#include <iomanip>
+#include <iostream>
+#include <vector>
+
+#include "benchmark_util.h"
+#include "fortune.h"
+#include "kernels.h"
+
+#include "cxxopts.h"
+
+using namespace std;
+using namespace hyperbolic;
+
+int main(int argc, char* argv[]) {
+    cxxopts::Options options(
+            argv[0], "Measures the time spent on beach line operations per site and circle event.");
+
+    options.add_options()
+            ("N", "Numbers of sites", cxxopts::value<vector<int>>()->default_value("10000,100000,1000000"))
+            ("r,repetitions", "Number of repetitions per configuration", cxxopts::value<int>()->default_value("3"))
+            ("s,seed", "Seed used for sampling the sites", cxxopts::value<unsigned int>()->default_value("1"))
+            ("sorted", "Sort the angular coordinates of the sites like their radii", cxxopts::value<bool>()->default_value("false"))
+            ("h,help", "Print usage");
+
+    auto result = options.parse(argc, argv);
+
+    if (result.count("help")) {
+        cout << options.help() << endl;
+        exit(0);
+    }
+
+    int repetitions = result["r"].as<int>();
+    unsigned int seed = result["s"].as<unsigned int>();
+
+    cout << setw(10) << "N" << setw(8) << "search" << setw(12) << "total ms" << setw(18) << "before/search"
+         << setw(18) << "saved/search" << setw(18) << "search ns/site" << setw(18) << "treap ns/event" << "\n";
+
+    for (int N : result["N"].as<vector<int>>()) {
+        vector<Point<double>> sites = sample_sites(N, seed);
+        if (result["sorted"].as<bool>()) {
+            vector<double> radii, angles;
+            for (const Point<double>& p : sites) {
+                radii.push_back(p.r);
+                angles.push_back(p.theta);
+            }
+            sort(radii.begin(), radii.end());
+            sort(angles.begin(), angles.end());
+            for (int i = 0; i < N; i++) sites[i] = Point<double>(radii[i], angles[i]);
+        }
+
+        for (SearchMode mode : {SearchMode::ROOT, SearchMode::FINGER}) {
+            // the minimum over all repetitions is least affected by noise
+            double total_ms = INFINITY, search_ns = INFINITY, treap_ns = INFINITY, before_calls = 0, saved_calls = 0;
+            for (int i = 0; i < repetitions; i++) {
+                VoronoiDiagram v;
+                FortuneHyperbolicImplementation<FullNativeKernel<double>, double, true> fortune(v, sites);
+                fortune.setSearchMode(mode);
+                fortune.calculate();
+
+                SweepStatistics statistics = fortune.getStatistics();
+                auto site_events = static_cast<double>(statistics.siteEvents);
+                auto events = static_cast<double>(statistics.siteEvents + statistics.circleEvents);
+                total_ms = min(total_ms, static_cast<double>(statistics.totalNanoseconds) / 1e6);
+                search_ns = min(search_ns, static_cast<double>(statistics.searchNanoseconds) / site_events);
+                treap_ns = min(treap_ns, static_cast<double>(statistics.treapNanoseconds) / events);
+                before_calls = static_cast<double>(statistics.beforeCalls) / site_events;
+                saved_calls = static_cast<double>(statistics.savedBeforeCalls) / site_events;
+            }
+
+            cout << setw(10) << N << setw(8) << (mode == SearchMode::ROOT ? "root" : "finger") << fixed
+                 << setprecision(1) << setw(12) << total_ms << setw(18) << before_calls << setw(18) << saved_calls
+                 << setw(18) << search_ns << setw(18) << treap_ns << "\n";
+        }
+    }
+
+    return 0;
+}
@@ -2,19 +2,34 @@
 
 #include "beachline.h"
 #include "kernels.h"
+#include "arena.h"
 
+#include <algorithm>
 #include <vector>
 #include <memory>
 
 using std::shared_ptr, std::make_shared;
 using namespace hyperbolic;
 
+// inserts elements for the sites v[1], v[2], ... at the front of the beach line
+void insertElements(BeachLine<FullNativeKernel<double>, double>& beachLine, Arena<BeachLineElement<double>>& arena,
+                    vector<Site<double>>& v) {
+    for (size_t i = 1; i < v.size(); i++) {
+        Site<double>* hitSite = &v[i];
+        if (beachLine.size() > 0) {
+            auto result = beachLine.getFirstElement();
+            hitSite = &result->second;
+        }
+        auto* first = arena.create(v[i], *hitSite, 0, 0);
+        auto* second = arena.create(*hitSite, v[i], 0, 1);
+        beachLine.insert(beachLine.getFirstElement(), *first, *second);
+    }
+}
+
 TEST(BeachLineTest, InsertsCorrectly) {
     FullNativeKernel<double> K;
     BeachLine<FullNativeKernel<double>, double> beachLine(K);
-
-    Point<double> mock(0, 0);
-    Point<double>* pMock = &mock;
+    Arena<BeachLineElement<double>> arena;
 
     int n = 30;
     vector<Site<double>> v;
@@ -22,16 +37,7 @@ TEST(BeachLineTest, InsertsCorrectly) {
         v.emplace_back(Point<double>(1, 1), i);
     }
 
-    for (int i = 1; i < n; i++) {
-        Site<double>* hitSite = &v[i];
-        if (beachLine.size() > 0) {
-            auto result = beachLine.getFirstElement();
-            hitSite = &result->second;
-        }
-        auto* first = new BeachLineElement<double>(v[i], *hitSite, nullptr, pMock);
-        auto* second = new BeachLineElement<double>(*hitSite, v[i], nullptr, pMock);
-        beachLine.insert(0, *first, *second);
-    }
+    insertElements(beachLine, arena, v);
 
     vector<BeachLineElement<double>*> elements;
     beachLine.getRemainingElements(elements);
@@ -42,3 +48,80 @@ TEST(BeachLineTest, InsertsCorrectly) {
         current_id = elements[i]->second.ID;
     }
 };
+
+// checks whether two treaps have the same shape and carry the same priorities
+bool sameShape(const BeachLineElement<double>* a, const BeachLineElement<double>* b) {
+    if (!a || !b) return a == b;
+    return a->first.ID == b->first.ID && a->second.ID == b->second.ID && a->priority == b->priority &&
+           sameShape(a->leftChild, b->leftChild) && sameShape(a->rightChild, b->rightChild);
+}
+
+const BeachLineElement<double>* getRoot(const BeachLineElement<double>* e) {
+    while (e->parent) e = e->parent;
+    return e;
+}
+
+TEST(BeachLineTest, SameSeedYieldsSameShape) {
+    vector<Site<double>> v;
+    for (int i = 0; i < 100; i++) {
+        v.emplace_back(Point<double>(1, 1), i);
+    }
+
+    FullNativeKernel<double> K;
+    Arena<BeachLineElement<double>> arena;
+    BeachLine<FullNativeKernel<double>, double> a(K, 17), b(K, 17), c(K, 18);
+    insertElements(a, arena, v);
+    insertElements(b, arena, v);
+    insertElements(c, arena, v);
+
+    EXPECT_TRUE(sameShape(getRoot(a.getFirstElement()), getRoot(b.getFirstElement())));
+    EXPECT_FALSE(sameShape(getRoot(a.getFirstElement()), getRoot(c.getFirstElement())));
+}
+
+// appends the elements of the treap rooted at e in symmetric order
+void getInOrder(const BeachLineElement<double>* e, vector<const BeachLineElement<double>*>& elements) {
+    if (!e) return;
+    getInOrder(e->leftChild, elements);
+    elements.push_back(e);
+    getInOrder(e->rightChild, elements);
+}
+
+TEST(BeachLineTest, NeighborLinksFollowTheTreap) {
+    vector<Site<double>> v;
+    for (int i = 0; i < 200; i++) {
+        v.emplace_back(Point<double>(1, 1), i);
+    }
+
+    FullNativeKernel<double> K;
+    Arena<BeachLineElement<double>> arena;
+    Arena<CircleEvent<double>> events;
+    BeachLine<FullNativeKernel<double>, double> beachLine(K, 5);
+    insertElements(beachLine, arena, v);
+
+    // replaces pairs of neighbors throughout the beach line, including the first element
+    for (int i = 0; i < 50; i++) {
+        vector<BeachLineElement<double>*> elements;
+        beachLine.getRemainingElements(elements);
+        size_t position = (i * 37) % (elements.size() - 1);
+        auto* first = elements[position];
+        auto* second = elements[position + 1];
+        auto* e = events.create(*first, *second, Point<double>(0, 0), 0);
+        auto* newElement = arena.create(first->first, second->second, 0, 1);
+
+        BeachLineElement<double> *leftNeighbor, *rightNeighbor;
+        beachLine.replace(*e, *newElement, leftNeighbor, rightNeighbor);
+        EXPECT_EQ(elements[(position + elements.size() - 1) % elements.size()], leftNeighbor);
+        EXPECT_EQ(elements[(position + 2) % elements.size()], rightNeighbor);
+
+        vector<BeachLineElement<double>*> linked;
+        vector<const BeachLineElement<double>*> inOrder;
+        beachLine.getRemainingElements(linked);
+        getInOrder(getRoot(beachLine.getFirstElement()), inOrder);
+        ASSERT_EQ(elements.size() - 1, linked.size());
+        EXPECT_TRUE(std::equal(linked.begin(), linked.end(), inOrder.begin(), inOrder.end()));
+        EXPECT_EQ(linked.back(), linked.front()->leftNeighbor);
+        EXPECT_EQ(linked.front(), linked.back()->rightNeighbor);
+        for (size_t j = 0; j + 1 < linked.size(); j++)
+            EXPECT_EQ(linked[j], linked[j + 1]->leftNeighbor);
+    }
+}
@@ -0,0 +1,28 @@
+#pragma once
+
+#include <cmath>
+#include <random>
+#include <vector>
+
+#include "geometry.h"
+
+namespace hyperbolic {
+    /**
+     * samples N sites uniformly at random within a disk whose radius yields an average degree of 8 in the
+     * corresponding hyperbolic random graph. Used as input of the benchmarks
+     * */
+    inline vector<Point<double>> sample_sites(int N, unsigned int seed) {
+        double R = 2.0 * std::log(2.0 * N / (M_PI * 8.0) * 4.0);
+        std::mt19937 gen(seed);
+        std::uniform_real_distribution<> dis(0.0, 1.0);
+
+        vector<Point<double>> sites;
+        sites.reserve(N);
+        for (int i = 0; i < N; i++) {
+            double angle = dis(gen) * 2 * M_PI;
+            double radius = std::acosh(1 + (std::cosh(R) - 1) * dis(gen));
+            sites.emplace_back(radius, angle);
+        }
+        return sites;
+    }
+}
@@ -0,0 +1,207 @@
+#pragma once
+
+#include <cfloat>
+#include <cmath>
+#include <limits>
+
+namespace hyperbolic {
+    /**
+     * A double together with a bound on its absolute forward error, i.e., the exact result of the computation that
+     * produced value lies in [value - error, value + error]. Every operation propagates the errors of its operands
+     * and adds its own rounding error, assuming correctly rounded arithmetic and math functions that are accurate to
+     * a few ulps. Operations whose error cannot be bounded (e.g., dividing by an interval containing 0) yield an
+     * infinite error.
+     *
+     * Since the calculations in calculations.h are templates over the floating point type, they can be instantiated
+     * with BoundedDouble to obtain a filter: whenever a comparison cannot be decided based on the error bounds, it
+     * is flagged as uncertain (see resetUncertainty() and isUncertain()) and the result of the calculation should be
+     * computed again using a higher precision.
+     *
+     * All operations are hidden friends, so they are only found via argument dependent lookup and never interfere
+     * with the overloads for other floating point types.
+     * */
+    class BoundedDouble {
+    public:
+        // relative rounding error added by arithmetic operations and by math functions
+        static constexpr double ARITHMETIC_ERROR = DBL_EPSILON;
+        static constexpr double FUNCTION_ERROR = 4 * DBL_EPSILON;
+
+    private:
+        static constexpr double INFINITE_ERROR = std::numeric_limits<double>::infinity();
+
+        // whether a comparison in the current thread could not be decided since the last reset
+        static inline thread_local bool uncertain = false;
+
+        static bool less(const BoundedDouble& a, const BoundedDouble& b) {
+            double difference = b.value - a.value;
+            if (!(std::fabs(difference) > a.error + b.error)) uncertain = true;
+            return difference > 0;
+        }
+
+        static bool equal(const BoundedDouble& a, const BoundedDouble& b) {
+            double difference = b.value - a.value;
+            if (!(std::fabs(difference) > a.error + b.error)) uncertain = true;
+            return difference == 0;
+        }
+
+    public:
+        double value = 0, error = 0;
+
+        BoundedDouble() = default;
+        // doubles that are used as input are exact
+        BoundedDouble(double value) : value(value) {};
+        BoundedDouble(double value, double error) : value(value), error(error) {};
+
+        explicit operator double() const {
+            return value;
+        }
+
+        static void resetUncertainty() {
+            uncertain = false;
+        }
+
+        // whether a comparison could not be decided since the last call of resetUncertainty() in the current thread
+        static bool isUncertain() {
+            return uncertain;
+        }
+
+        friend BoundedDouble operator-(const BoundedDouble& a) {
+            return {-a.value, a.error};
+        }
+
+        friend BoundedDouble operator+(const BoundedDouble& a, const BoundedDouble& b) {
+            double value = a.value + b.value;
+            return {value, a.error + b.error + ARITHMETIC_ERROR * std::fabs(value)};
+        }
+
+        friend BoundedDouble operator-(const BoundedDouble& a, const BoundedDouble& b) {
+            return a + (-b);
+        }
+
+        friend BoundedDouble operator*(const BoundedDouble& a, const BoundedDouble& b) {
+            double value = a.value * b.value;
+            return {value, std::fabs(a.value) * b.error + std::fabs(b.value) * a.error + a.error * b.error +
+                           ARITHMETIC_ERROR * std::fabs(value)};
+        }
+
+        friend BoundedDouble operator/(const BoundedDouble& a, const BoundedDouble& b) {
+            double value = a.value / b.value;
+            double denominator = std::fabs(b.value) - b.error;
+            if (!(denominator > 0)) return {value, INFINITE_ERROR};
+            return {value, (a.error + std::fabs(value) * b.error) / denominator + ARITHMETIC_ERROR * std::fabs(value)};
+        }
+
+        BoundedDouble& operator+=(const BoundedDouble& a) {
+            return *this = *this + a;
+        }
+
+        BoundedDouble& operator-=(const BoundedDouble& a) {
+            return *this = *this - a;
+        }
+
+        BoundedDouble& operator*=(const BoundedDouble& a) {
+            return *this = *this * a;
+        }
+
+        BoundedDouble& operator/=(const BoundedDouble& a) {
+            return *this = *this / a;
+        }
+
+        friend bool operator<(const BoundedDouble& a, const BoundedDouble& b) {
+            return less(a, b);
+        }
+
+        friend bool operator>(const BoundedDouble& a, const BoundedDouble& b) {
+            return less(b, a);
+        }
+
+        friend bool operator<=(const BoundedDouble& a, const BoundedDouble& b) {
+            return !less(b, a);
+        }
+
+        friend bool operator>=(const BoundedDouble& a, const BoundedDouble& b) {
+            return !less(a, b);
+        }
+
+        friend bool operator==(const BoundedDouble& a, const BoundedDouble& b) {
+            return equal(a, b);
+        }
+
+        friend bool operator!=(const BoundedDouble& a, const BoundedDouble& b) {
+            return !equal(a, b);
+        }
+
+        friend BoundedDouble fabs(const BoundedDouble& a) {
+            return {std::fabs(a.value), a.error};
+        }
+
+        friend BoundedDouble pow(const BoundedDouble& a, int exponent) {
+            BoundedDouble result = 1.0;
+            for (int i = 0; i < exponent; i++) result *= a;
+            return result;
+        }
+
+        friend BoundedDouble sqrt(const BoundedDouble& a) {
+            double value = std::sqrt(a.value);
+            double lower = a.value - a.error;
+            // the derivative is unbounded at 0, so the whole range [0, sqrt(a + error)] has to be considered
+            double error = (lower > 0) ? a.error / (2 * std::sqrt(lower)) : std::sqrt(std::fabs(a.value) + a.error);
+            return {value, error + FUNCTION_ERROR * value};
+        }
+
+        friend BoundedDouble cosh(const BoundedDouble& a) {
+            // |cosh'| = |sinh| <= cosh and cosh(x + e) <= cosh(x) * exp(e) <= cosh(x) * (1 + 2e) for e <= 1
+            double value = std::cosh(a.value);
+            if (!(a.error <= 1)) return {value, INFINITE_ERROR};
+            return {value, a.error * value * (1 + 2 * a.error) + FUNCTION_ERROR * value};
+        }
+
+        friend BoundedDouble sinh(const BoundedDouble& a) {
+            // |sinh'| = cosh <= |sinh| + 1
+            double value = std::sinh(a.value);
+            if (!(a.error <= 1)) return {value, INFINITE_ERROR};
+            return {value, a.error * (std::fabs(value) + 1) * (1 + 2 * a.error) + FUNCTION_ERROR * std::fabs(value)};
+        }
+
+        friend BoundedDouble cos(const BoundedDouble& a) {
+            return {std::cos(a.value), a.error + FUNCTION_ERROR};
+        }
+
+        friend BoundedDouble sin(const BoundedDouble& a) {
+            return {std::sin(a.value), a.error + FUNCTION_ERROR};
+        }
+
+        friend BoundedDouble acos(const BoundedDouble& a) {
+            // |acos'(x)| = 1 / sqrt(1 - x^2) is unbounded at -1 and 1
+            double value = std::acos(a.value);
+            double maximum = std::fabs(a.value) + a.error;
+            if (!(maximum < 1)) return {value, INFINITE_ERROR};
+            return {value, a.error / std::sqrt((1 - maximum) * (1 + maximum)) + FUNCTION_ERROR * value};
+        }
+
+        friend BoundedDouble atanh(const BoundedDouble& a) {
+            // |atanh'(x)| = 1 / (1 - x^2) is unbounded at -1 and 1
+            double value = std::atanh(a.value);
+            double maximum = std::fabs(a.value) + a.error;
+            if (!(maximum < 1)) return {value, INFINITE_ERROR};
+            return {value, a.error / ((1 - maximum) * (1 + maximum)) + FUNCTION_ERROR * std::fabs(value)};
+        }
+
+        friend BoundedDouble acosh(const BoundedDouble& a) {
+            // |acosh'(x)| = 1 / sqrt(x^2 - 1) is unbounded at 1
+            double value = std::acosh(a.value);
+            double minimum = a.value - a.error;
+            if (!(minimum > 1)) return {value, INFINITE_ERROR};
+            return {value, a.error / std::sqrt((minimum - 1) * (minimum + 1)) + FUNCTION_ERROR * value};
+        }
+
+        friend BoundedDouble atan2(const BoundedDouble& y, const BoundedDouble& x) {
+            // moving (x, y) by at most d changes its angle by at most asin(d / |(x, y)|) <= d / (|(x, y)| - d)
+            double value = std::atan2(y.value, x.value);
+            double d = x.error + y.error;
+            double radius = std::hypot(x.value, y.value) - d;
+            if (!(radius > 0)) return {value, INFINITE_ERROR};
+            return {value, d / radius + FUNCTION_ERROR * std::fabs(value)};
+        }
+    };
+}
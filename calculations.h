@@ -22,6 +22,12 @@ namespace hyperbolic {
             y = sinh(p.r) * sin(p.theta);
             z = cosh(p.r);
         };
+        explicit HyperboloidVec(const Site<_float_T>& s) {
+            const PointTerms<_float_T>& terms = s.terms();
+            x = terms.sinh_r * terms.cos_theta;
+            y = terms.sinh_r * terms.sin_theta;
+            z = terms.cosh_r;
+        };
         HyperboloidVec(_float_T x, _float_T y, _float_T z) : x(x), y(y), z(z) {};
         HyperboloidVec operator+(const HyperboloidVec& v) const {
             return HyperboloidVec(x + v.x, y + v.y, z + v.z);
@@ -85,6 +91,14 @@ namespace hyperbolic {
         return acosh(x);
     };
 
+    // calculates the hyperbolic distance between a point and a site, reusing the cached terms of the site
+    template <typename _float_T>
+    _float_T distance(const Point<_float_T>& s, const Site<_float_T>& t) {
+        const PointTerms<_float_T>& terms = t.terms();
+        auto x = cosh(s.r)*terms.cosh_r - sinh(s.r)*cos(s.theta - t.point.theta)*terms.sinh_r;
+        return acosh(x);
+    };
+
   template <typename _float_T>
   Point<_float_T> translate(Point<_float_T>& p, _float_T d) {
     if (d == 0.0) {
@@ -278,6 +292,33 @@ namespace hyperbolic {
             }
         }
 
+        // constructs the object from the two sites that define it, reusing their cached terms
+        Bisector(const Site<_float_T>& s, const Site<_float_T>& t) {
+            if (s.point.r > t.point.r) {
+                *this = Bisector(t, s);
+                return;
+            }
+            const PointTerms<_float_T> &s_terms = s.terms(), &t_terms = t.terms();
+            numerator = t_terms.cosh_r - s_terms.cosh_r;
+
+            if (numerator == 0.0) {
+                is_straight = true;
+                straight_angle = (s.point.theta + t.point.theta) / 2.0;
+            } else {
+                is_straight = false;
+                // equivalent to cosine(sinh(t.r), -t.theta, 0) + cosine(-sinh(s.r), -s.theta, 0)
+                _float_T x = -s_terms.sinh_r * s_terms.cos_theta;
+                x += t_terms.sinh_r * t_terms.cos_theta;
+                _float_T y = s_terms.sinh_r * s_terms.sin_theta;
+                y += -t_terms.sinh_r * t_terms.sin_theta;
+
+                _float_T phase = atan2(y, x);
+                if (phase < 0) phase += 2*M_PI;
+                denominator = cosine<_float_T>(sqrt(pow(x, 2) + pow(y, 2)), phase, 0);
+                calc_definition();
+            }
+        }
+
         // returns the radial coordinate at angular coordinate theta
         _float_T operator()(_float_T theta) const {
             return atanh(numerator/denominator(theta));
@@ -1,33 +1,43 @@
 #pragma once
 
-#include <climits>
-#include <string>
-#include <iostream>
-#include <fstream>
-#include <cfloat>
-#include <list>
+#include <algorithm>
+#include <charconv>
 #include <cmath>
+#include <fstream>
+#include <iomanip>
+#include <limits>
+#include <stdexcept>
+#include <string>
 #include <vector>
 
 #include "geometry.h"
+#include "batch_geometry.h"
 #include "calculations.h"
+#include "io.h"
+#include "parallel.h"
 
-using std::string, std::max_element, std::list;
+using std::string, std::max_element;
 
 namespace hyperbolic {
     /**
-    * Drawing options that can be provided to the VoronoiCanvas class
+    * Drawing options that can be provided to the VoronoiCanvas class. Lengths given in pixels refer to the drawing,
+    * all other lengths are hyperbolic lengths
     * */
     struct VoronoiCanvasOptions {
         double width = 300, height = 300;
         double line_width = 0.01, point_width = 0.02;
-        double resolution = 0.01;
+        // maximum distance in pixels between a drawn edge and the actual curve
+        double tolerance = 0.05;
+        // edges that span less pixels are not drawn
+        double min_edge_length = 1;
         string voronoi_vertex_color = "blue";
         string voronoi_edge_color = "black";
         string delaunay_edge_color = "red";
         string point_color = "black";
         string background_color = "white";
         bool draw_delaunay = true;
+        // number of threads used for tessellating the edges. 0 uses one thread per core
+        unsigned int threads = 1;
     };
 
     struct CartesianPoint {
@@ -46,249 +56,367 @@ namespace hyperbolic {
 
     using Path = vector<CartesianPoint>;
 
+    // distance between the point p and the line segment from a to b
+    inline double distance_to_segment(const CartesianPoint& p, const CartesianPoint& a, const CartesianPoint& b) {
+        double dx = b.x - a.x, dy = b.y - a.y;
+        double length_sq = dx*dx + dy*dy;
+        double s = (length_sq > 0) ? ((p.x - a.x)*dx + (p.y - a.y)*dy) / length_sq : 0;
+        s = std::clamp(s, 0.0, 1.0);
+        return std::hypot(p.x - (a.x + s*dx), p.y - (a.y + s*dy));
+    }
+
     /**
      * Class used for drawing Voronoi diagrams and Delaunay triangulations
      * */
     class VoronoiCanvas {
     private:
+        // edges whose paths are kept in memory before they are written to the file
+        static constexpr size_t EDGES_PER_CHUNK = 256;
+        static constexpr size_t CHUNKS_PER_BLOCK = 64;
+        static constexpr size_t POINTS_PER_BLOCK = 4096;
+        // every geodesic is split into at least 2^MIN_TESSELLATION_DEPTH and at most 2^MAX_TESSELLATION_DEPTH segments
+        static constexpr int MIN_TESSELLATION_DEPTH = 2;
+        static constexpr int MAX_TESSELLATION_DEPTH = 16;
+
         VoronoiDiagram& voronoiDiagram;
-        vector<Point<double>>& sites;
+        const vector<Point<double>>& sites;
 
         VoronoiCanvasOptions options;
 
         double max_r = 0, scale = 0;
         CartesianPoint offset = {0, 0};
+        // cosh of the radius of the circle enclosing the drawing. Edges are only drawn inside of it
+        double cosh_r_visible = 0;
 
-        static void add_delaunay_edge(const Edge& e, Path& p) {
-            p.push_back(CartesianPoint(e.siteA.point));
-            p.push_back(CartesianPoint(e.siteB.point));
+        CartesianPoint to_canvas(const CartesianPoint& p) const {
+            return {p.x*scale + offset.x, p.y*scale + offset.y};
         }
 
-        bool out_of_bounds(Point<double>& p) const {
-            return
-                (std::abs(cos(p.theta)*p.r*scale) + offset.x > options.width) ||
-                (std::abs(sin(p.theta)*p.r*scale) + offset.y > options.height);
+        CartesianPoint to_canvas(const Point<double>& p) const {
+            return to_canvas(CartesianPoint(p));
         }
 
-      void render_native_edge(Point<double>* from, Point<double>* to, std::vector<CartesianPoint>& p, bool ccw=true) const {
-            const double dt = options.resolution * scale;
-            double t = 0.0;
-            const double t_end = (to) ? distance<double>(*to, *from) : DBL_MAX;
-
-            const double rotationAngle1 = -from->theta;
-            const double translationDistance = -from->r;
+        // whether all points are closer to each other than min_edge_length
+        bool below_min_edge_length(const CartesianPoint& a, const CartesianPoint& b, const CartesianPoint& c) const {
+            double length = options.min_edge_length;
+            return std::hypot(a.x - b.x, a.y - b.y) < length && std::hypot(a.x - c.x, a.y - c.y) < length &&
+                   std::hypot(b.x - c.x, b.y - c.y) < length;
+        }
 
-            Point<double> rotatedTo = rotate(*to, rotationAngle1);
-            Point<double> translatedTo = translate(rotatedTo, translationDistance);
-            const double rotationAngle2 = -translatedTo.theta;
+        /**
+         * Buffers for tessellating geodesics. Every chunk of edges has its own buffers, so they are neither shared
+         * between threads nor allocated for every edge
+         * */
+        struct TessellationBuffers {
+            // polar coordinates and canvas points of the current polyline, and whether its segments are split again
+            vector<double> points, next_points;
+            Path canvas_points, next_canvas_points;
+            vector<char> split, next_split;
+            // the end points of the segments that are split in one level, and their midpoints
+            vector<double> starts, ends, middles, cartesian;
+        };
 
-            while (t < t_end) {
-              Point<double> p_t(t, 0.0);
-              Point<double> p_t_rotated = rotate(p_t, -rotationAngle2);
-              Point<double> p_t_translated = translate(p_t_rotated, -translationDistance);
-              Point<double> p_t_final = rotate(p_t_translated, -rotationAngle1);
+        /**
+         * adds the geodesic between two points to the path. It is halved until the geodesic at the middle of each
+         * segment is within options.tolerance pixels of the segment, so strongly curved and long geodesics are split
+         * into more segments than flat and short ones. All segments of one level are split with one call of the batch
+         * functions
+         * */
+        void add_geodesic(const Point<double>& from, const Point<double>& to, Path& p, TessellationBuffers& b) const {
+            b.points = {from.r, from.theta, to.r, to.theta};
+            b.canvas_points = {to_canvas(from), to_canvas(to)};
+            b.split = {1, 0};
+
+            for (int depth = 0; depth < MAX_TESSELLATION_DEPTH; depth++) {
+                b.starts.clear();
+                b.ends.clear();
+                for (size_t i = 0; i + 1 < b.canvas_points.size(); i++) {
+                    if (!b.split[i]) continue;
+                    b.starts.insert(b.starts.end(), {b.points[2*i], b.points[2*i + 1]});
+                    b.ends.insert(b.ends.end(), {b.points[2*i + 2], b.points[2*i + 3]});
+                }
+                size_t n = b.starts.size() / 2;
+                if (n == 0) break;
+                b.middles.resize(2*n);
+                b.cartesian.resize(2*n);
+                batch_geodesic_midpoint(b.starts.data(), b.ends.data(), b.middles.data(), n);
+                batch_to_cartesian(b.middles.data(), b.cartesian.data(), n);
+
+                if (depth == 0) {
+                    const CartesianPoint &begin = b.canvas_points[0], &end = b.canvas_points[1];
+                    CartesianPoint center = to_canvas(CartesianPoint(b.cartesian[0], b.cartesian[1]));
+                    if (!std::isfinite(begin.x + begin.y + end.x + end.y + center.x + center.y) ||
+                        below_min_edge_length(begin, end, center))
+                        return;
+                }
 
-              p.emplace_back(p_t_final);
-              t += dt;
+                b.next_points.clear();
+                b.next_canvas_points.clear();
+                b.next_split.clear();
+                for (size_t i = 0, j = 0; i < b.canvas_points.size(); i++) {
+                    b.next_points.insert(b.next_points.end(), {b.points[2*i], b.points[2*i + 1]});
+                    b.next_canvas_points.push_back(b.canvas_points[i]);
+                    if (!b.split[i]) {
+                        b.next_split.push_back(0);
+                        continue;
+                    }
+
+                    CartesianPoint center = to_canvas(CartesianPoint(b.cartesian[2*j], b.cartesian[2*j + 1]));
+                    // the comparison also fails for coordinates that are not finite, which stops the subdivision
+                    if (depth < MIN_TESSELLATION_DEPTH ||
+                        distance_to_segment(center, b.canvas_points[i], b.canvas_points[i + 1]) > options.tolerance) {
+                        b.next_split.push_back(1);
+                        b.next_points.insert(b.next_points.end(), {b.middles[2*j], b.middles[2*j + 1]});
+                        b.next_canvas_points.push_back(center);
+                        b.next_split.push_back(1);
+                    } else {
+                        b.next_split.push_back(0);
+                    }
+                    j++;
+                }
+                std::swap(b.points, b.next_points);
+                std::swap(b.canvas_points, b.next_canvas_points);
+                std::swap(b.split, b.next_split);
             }
-            p.emplace_back(*to);
+            p.insert(p.end(), b.canvas_points.begin(), b.canvas_points.end());
+        }
+
+        void add_delaunay_edge(size_t i, Path& p, TessellationBuffers& buffers) const {
+            add_geodesic(sites[voronoiDiagram.edgeSites[2*i]], sites[voronoiDiagram.edgeSites[2*i + 1]], p, buffers);
         }
 
-        void render_edge(Point<double>* from, Point<double>* to, HyperboloidBisector<double>& b, list<CartesianPoint>& p, bool ccw=true) const {
-            double dt = options.resolution * scale;
-            Point u_native(b.u);
-            double t = (from) ? distance<double>(*from, u_native) : 0;
-            double t_end = (to) ? distance<double>(*to, u_native) : DBL_MAX;
+        /**
+         * adds the part of the bisector of an edge between its vertices to the path. Edges without a vertex end at the
+         * circle enclosing the drawing
+         * */
+        void add_edge(size_t i, Path& p, TessellationBuffers& buffers) const {
+            // bidirectional edges run from their second vertex to their first one, the others from their first vertex
+            // to their second one
+            EdgeType edgeType = voronoiDiagram.getEdgeType(i);
+            bool reversed = edgeType == EdgeType::BIDIRECTIONAL;
+            int64_t from = voronoiDiagram.edgeVertices[2*i + (reversed ? 1 : 0)];
+            int64_t to = voronoiDiagram.edgeVertices[2*i + (reversed ? 0 : 1)];
+            bool has_from = from != VoronoiDiagram::NO_VERTEX, has_to = to != VoronoiDiagram::NO_VERTEX;
+            if (has_from && has_to) {
+                add_geodesic(voronoiDiagram.getVertex(from), voronoiDiagram.getVertex(to), p, buffers);
+                return;
+            }
 
-            HyperboloidVec<double> v = b.v;
-            Point v_polar(v);
-            Point u_polar(b.u);
-            double theta = clip(v_polar.theta - u_polar.theta);
+            // u*cosh(t) + v*sinh(t) runs along the bisector in counterclockwise or clockwise direction
+            Point<double> a = sites[voronoiDiagram.edgeSites[2*i]], b = sites[voronoiDiagram.edgeSites[2*i + 1]];
+            HyperboloidBisector<double> bisector(a, b);
+            const HyperboloidVec<double>& u = bisector.u;
+            HyperboloidVec<double> v = bisector.v;
+            bool ccw = edgeType != EdgeType::CW;
+            double theta = clip(atan2(v.y, v.x) - atan2(u.y, u.x));
             if ((ccw && theta >= M_PI) || (!ccw && theta <= M_PI))
                 v = v*(-1);
 
-            while (t < t_end) {
-                Point point(b.u*cosh(t) + v*sinh(t));
-                p.emplace_back(point);
-                t += dt;
-                if (out_of_bounds(point)) break;
-            }
-
-            if (from)
-                p.emplace_front(*from);
-            if (to)
-                p.emplace_back(*to);
+            // cosh(r) = u.z*cosh(t) + v.z*sinh(t) is convex in t, so the bisector leaves the circle enclosing the drawing
+            // at the two solutions of cosh(r) = cosh_r_visible, with exp(t_min)*exp(t_max) = (u.z - v.z)/(u.z + v.z)
+            double discriminant = cosh_r_visible*cosh_r_visible - (u.z*u.z - v.z*v.z);
+            if (discriminant < 0) return;
+            double t_min = log((u.z - v.z) / (cosh_r_visible + sqrt(discriminant)));
+            double t_max = log((cosh_r_visible + sqrt(discriminant)) / (u.z + v.z));
+            Point<double> begin = has_from ? voronoiDiagram.getVertex(from) : Point<double>(u*cosh(t_min) + v*sinh(t_min));
+            Point<double> end = has_to ? voronoiDiagram.getVertex(to) : Point<double>(u*cosh(t_max) + v*sinh(t_max));
+            add_geodesic(begin, end, p, buffers);
         }
 
-        void add_edge(Edge& e, Path& p) const {
-            HyperboloidBisector<double> b(e.siteA.point, e.siteB.point);
-            Point q(b.u);
-            if (e.edgeType == EdgeType::BIDIRECTIONAL) {
-                list<CartesianPoint> cw, ccw;
-                render_edge(nullptr, e.firstVertex, b, ccw, true);
-                render_edge(nullptr, e.secondVertex, b, cw, false);
-                cw.emplace_front(q);
-                cw.reverse();
-                p.insert(p.begin(), ccw.begin(), ccw.end());
-                p.insert(p.begin(), cw.begin(), cw.end());
-            }
-            else {
-                list<CartesianPoint> p_list;
-                render_edge(e.firstVertex, e.secondVertex, b, p_list, e.edgeType == EdgeType::CCW);
-                p.insert(p.begin(), p_list.begin(), p_list.end());
-            }
+        static void append_number(string& output, double value) {
+            char buffer[64];
+            auto result = std::to_chars(buffer, buffer + sizeof(buffer), value, std::chars_format::fixed, 6);
+            output.append(buffer, result.ptr);
         }
 
-        void save_to_file(string& filename) const {
-            string representation;
-            to_svg_representation(representation);
-
-            std::fstream output_file_stream(filename, std::fstream::out);
-            output_file_stream << representation;
+        void append_background(string& output, const string& color) const {
+            output += "<rect width=\"";
+            append_number(output, options.width);
+            output += "\" height=\"";
+            append_number(output, options.height);
+            output += "\" fill=\"" + color + "\"/>";
         }
 
-        void to_svg_representation(std::string &svg_representation) const {
-
-            svg_representation =
-                    "<?xml version=\"1.0\" encoding=\"UTF-8\"?>\n<!DOCTYPE svg PUBLIC "
-                    "\"-//W3C//DTD SVG 1.1//EN\" "
-                    "\"http://www.w3.org/Graphics/SVG/1.1/DTD/svg11.dtd\">\n\n<svg "
-                    "xmlns=\"http://www.w3.org/2000/svg\"\nxmlns:xlink=\"http://www.w3.org/"
-                    "1999/xlink\" "
-                    "xmlns:ev=\"http://www.w3.org/2001/xml-events\"\nversion=\"1.1\" ";
+        void append_path(string& output, const Path& path, const string& color="black") const {
+            if (path.empty()) return;
+
+            output += "<path d =\"M ";
+            append_number(output, path.front().x);
+            output += ",";
+            append_number(output, path.front().y);
+            output += " ";
+            for (size_t index = 1; index < path.size(); ++index) {
+                output += "L ";
+                append_number(output, path[index].x);
+                output += ", ";
+                append_number(output, path[index].y);
+                output += " ";
+            }
+            output += "\" stroke = \"" + color + "\" stroke-width = \"";
+            append_number(output, 0.01 * scale);
+            output += R"(" fill="none"/>)";
+        }
 
-            svg_representation += std::string("baseProfile=\"full\"\nwidth=\"") +
-                                  std::to_string(options.width) + "\" height=\"" +
-                                  std::to_string(options.height) + "\">\n\n";
+        void append_point(string& output, const CartesianPoint& p, double radius, const string& color) const {
+            CartesianPoint center = to_canvas(p);
+            output += "<circle cx=\"";
+            append_number(output, center.x);
+            output += "\" cy=\"";
+            append_number(output, center.y);
+            output += "\" r=\"";
+            append_number(output, radius * scale);
+            output += "\" fill=\"" + color + "\" stroke=\"" + color + "\" stroke-width=\"";
+            append_number(output, options.line_width * scale);
+            output += "\"/>\n";
+        }
 
-            std::string background_representation;
-            svg_background_representation(background_representation, options.background_color);
-            svg_representation += background_representation;
+        // writes the circles of n points, converting a block of them to Cartesian coordinates at a time
+        template<class F>
+        void write_points(std::ostream& output_stream, size_t n, F&& point, double radius, const string& color) const {
+            vector<double> points, cartesian;
+            string output;
+            for (size_t begin = 0; begin < n; begin += POINTS_PER_BLOCK) {
+                size_t block_size = std::min(POINTS_PER_BLOCK, n - begin);
+                points.resize(2*block_size);
+                cartesian.resize(2*block_size);
+                for (size_t i = 0; i < block_size; i++) {
+                    Point<double> p = point(begin + i);
+                    points[2*i] = p.r;
+                    points[2*i + 1] = p.theta;
+                }
+                batch_to_cartesian(points.data(), cartesian.data(), block_size);
 
-            for (auto& e : voronoiDiagram.edges) {
-                std::string path_representation;
-                Path p;
+                output.clear();
+                for (size_t i = 0; i < block_size; i++)
+                    append_point(output, CartesianPoint(cartesian[2*i], cartesian[2*i + 1]), radius, color);
+                output_stream << output;
+            }
+        }
 
-                add_edge(*e, p);
-                svg_path_representation(p, path_representation, options.voronoi_edge_color);
-                svg_representation += path_representation;
+        // appends the paths of the Voronoi edges in [begin, end) and their dual Delaunay edges
+        void append_edges(string& output, size_t begin, size_t end) const {
+            Path p;
+            TessellationBuffers buffers;
+            for (size_t i = begin; i < end; i++) {
+                p.clear();
+                add_edge(i, p, buffers);
+                append_path(output, p, options.voronoi_edge_color);
 
                 if (options.draw_delaunay) {
                     p.clear();
-                    // add_delaunay_edge(*e, p);
-
-                    std::vector<CartesianPoint> renderPoints;
-                    render_native_edge(&(e->siteA.point), &(e->siteB.point), renderPoints, e->edgeType == EdgeType::CCW);
-                    p.insert(p.begin(), renderPoints.begin(), renderPoints.end());
-
-                    svg_path_representation(p, path_representation, options.delaunay_edge_color);
-                    svg_representation += path_representation;
+                    add_delaunay_edge(i, p, buffers);
+                    append_path(output, p, options.delaunay_edge_color);
                 }
             }
-
-            for (const Point<double>& s : sites) {
-                std::string point_representation;
-                svg_point_representation(CartesianPoint(s), options.point_width, point_representation, options.point_color);
-                svg_representation += point_representation;
-            }
-
-            for (auto const & p : voronoiDiagram.vertices) {
-                std::string point_representation;
-                svg_point_representation(CartesianPoint(*p), options.point_width, point_representation, options.voronoi_vertex_color);
-                svg_representation += point_representation;
-            }
-
-            std::string point_representation;
-            svg_point_representation(CartesianPoint(0, 0), options.point_width/2, point_representation, options.point_color);
-            svg_representation += point_representation;
-
-            svg_representation += "\n</svg>\n";
-        }
-
-        void svg_background_representation(string& background_representation, const string& color) const {
-          background_representation = "<rect width=\"" +
-            std::to_string(options.width) +
-            "\" height=\"" +
-            std::to_string(options.height) +
-            "\" fill=\"" +
-            color +
-            "\"/>";
         }
 
-        void svg_path_representation(const Path& path, string& path_representation, const string& color="black") const {
-            path_representation = string("");
-
-            if (!path.empty()) {
-                path_representation = std::string("<path d =\"");
-                // Print the first point of the path.
-                CartesianPoint point(path.front()*scale);
-                point.x += offset.x;
-                point.y += offset.y;
-                path_representation += std::string("M ") + std::to_string(point.x) +
-                                       "," + std::to_string(point.y) + " ";
-
-                //Print the remaining points.
-                for (size_t index = 1; index < path.size(); ++index) {
-                    point = CartesianPoint(path[index]*scale);
-                    point.x += offset.x;
-                    point.y += offset.y;
-                    path_representation += std::string("L ") + std::to_string(point.x) + ", " + std::to_string(point.y) + " ";
-                }
-
-                double path_width = 0.01 * scale;
-                path_representation +=
-                        std::string("\" stroke = \"") + color + "\" stroke-width = \"" +
-                        std::to_string(path_width) + R"(" fill="none"/>)";
+        /**
+         * writes the SVG representation to the stream. The edges are tessellated in parallel, one block of chunks at
+         * a time, and each block is written before the next one is tessellated, so only the paths of a single block
+         * are held in memory
+         * */
+        void write_svg(std::ostream& output_stream) const {
+            string output =
+                    "<?xml version=\"1.0\" encoding=\"UTF-8\"?>\n<!DOCTYPE svg PUBLIC "
+                    "\"-//W3C//DTD SVG 1.1//EN\" "
+                    "\"http://www.w3.org/Graphics/SVG/1.1/DTD/svg11.dtd\">\n\n<svg "
+                    "xmlns=\"http://www.w3.org/2000/svg\"\nxmlns:xlink=\"http://www.w3.org/"
+                    "1999/xlink\" "
+                    "xmlns:ev=\"http://www.w3.org/2001/xml-events\"\nversion=\"1.1\" ";
+            output += "baseProfile=\"full\"\nwidth=\"";
+            append_number(output, options.width);
+            output += "\" height=\"";
+            append_number(output, options.height);
+            output += "\">\n\n";
+            append_background(output, options.background_color);
+            output_stream << output;
+
+            size_t number_of_edges = voronoiDiagram.numberOfEdges();
+            size_t number_of_chunks = (number_of_edges + EDGES_PER_CHUNK - 1) / EDGES_PER_CHUNK;
+            vector<string> chunks(std::min(number_of_chunks, CHUNKS_PER_BLOCK));
+            for (size_t first_chunk = 0; first_chunk < number_of_chunks; first_chunk += CHUNKS_PER_BLOCK) {
+                size_t block_size = std::min(CHUNKS_PER_BLOCK, number_of_chunks - first_chunk);
+                parallel_for(block_size, options.threads, [&](size_t chunk, unsigned int) {
+                    size_t begin = (first_chunk + chunk) * EDGES_PER_CHUNK;
+                    chunks[chunk].clear();
+                    append_edges(chunks[chunk], begin, std::min(begin + EDGES_PER_CHUNK, number_of_edges));
+                });
+                for (size_t chunk = 0; chunk < block_size; chunk++)
+                    output_stream << chunks[chunk];
             }
-        }
 
-        void svg_point_representation(const CartesianPoint& p, double radius, std::string &svg_point_representation, const string& color) const {
-            CartesianPoint center(p*scale);
-            center.x += offset.x;
-            center.y += offset.y;
-
-            double stroke_width = options.line_width * scale;
-            svg_point_representation =
-                    std::string("<circle cx=\"") + std::to_string(center.x) + "\" cy=\"" +
-                    std::to_string(center.y) + "\" r=\"" +
-                    std::to_string(radius * scale) + "\" fill=\"" + color +
-                    "\" stroke=\"" + color + "\" stroke-width=\"" +
-                    std::to_string(stroke_width) + "\"/>\n";
+            write_points(output_stream, sites.size(), [&](size_t i) { return sites[i]; },
+                         options.point_width, options.point_color);
+            write_points(output_stream, voronoiDiagram.numberOfVertices(), [&](size_t i) { return voronoiDiagram.getVertex(i); },
+                         options.point_width, options.voronoi_vertex_color);
+
+            output.clear();
+            append_point(output, CartesianPoint(0, 0), options.point_width/2, options.point_color);
+            output += "\n</svg>\n";
+            output_stream << output;
         }
 
     public:
-        explicit VoronoiCanvas(VoronoiDiagram& v, vector<Point<double>>& sites) : voronoiDiagram(v), sites(sites) {};
+        explicit VoronoiCanvas(VoronoiDiagram& v, const vector<Point<double>>& sites) : voronoiDiagram(v), sites(sites) {};
 
         void set_options(VoronoiCanvasOptions& opt) {
             options = opt;
         }
 
         /**
-        * writes a calculated Voronoi diagram and the corresponding sites to a file
+        * writes a calculated Voronoi diagram and the corresponding sites to an SVG file. Throws std::runtime_error if
+        * the file cannot be written
         * */
         void draw_diagram(string filename) {
             max_r = (max_element(sites.begin(), sites.end()))->r;
             double min_hw = min(options.width, options.height);
             scale = min_hw/(2*max_r);
             offset = CartesianPoint(options.width/2, options.height / 2);
-            save_to_file(filename);
+            // the circle through the corners of the drawing, widened by the width of the edges
+            cosh_r_visible = cosh(std::hypot(options.width, options.height) / (2*scale) + 0.01);
+
+            std::ofstream output_stream(filename);
+            write_svg(output_stream);
+            if (!output_stream)
+                throw std::runtime_error("Unable to write file \"" + filename + "\"");
         }
 
         /**
-         * writes the Delaunay triangulation of a Voronoi diagram to a file
+         * writes the Delaunay triangulation of a Voronoi diagram to a file, i.e., the IDs of the two sites of each edge
          * */
-        void write_delaunay_triangulation(string filename) {
-            std::fstream output_file_stream(filename, std::fstream::out);
-            for (auto& e : voronoiDiagram.edges) {
-                output_file_stream << e->siteA.ID << " " << e->siteB.ID << "\n";
+        void write_delaunay_triangulation(string filename, FileFormat format=FileFormat::BINARY) {
+            if (format == FileFormat::TEXT) {
+                std::ofstream output_file_stream(filename);
+                const vector<uint64_t>& ids = voronoiDiagram.edgeSites;
+                for (size_t i = 0; i < ids.size(); i += 2) {
+                    output_file_stream << ids[i] << " " << ids[i + 1] << "\n";
+                }
+                if (!output_file_stream)
+                    throw std::runtime_error("Unable to write file \"" + filename + "\"");
+                return;
             }
+
+            write_binary_file(filename, FileKind::TRIANGULATION, voronoiDiagram.edgeSites, 2);
         }
 
-        void write_diagram(string filename) {
-            std::fstream output_file_stream(filename, std::fstream::out);
-            for (const auto& p : voronoiDiagram.vertices) {
-              output_file_stream << p->r << " " << p->theta << "\n";
+        /**
+         * writes the vertices of a Voronoi diagram to a file, i.e., the radial and the angular coordinate of each vertex
+         * */
+        void write_diagram(string filename, FileFormat format=FileFormat::BINARY) {
+            if (format == FileFormat::TEXT) {
+                std::ofstream output_file_stream(filename);
+                // as many digits as needed to read back the exact coordinates
+                output_file_stream << std::setprecision(std::numeric_limits<double>::max_digits10);
+                const vector<double>& coordinates = voronoiDiagram.vertexCoordinates;
+                for (size_t i = 0; i < coordinates.size(); i += 2) {
+                  output_file_stream << coordinates[i] << " " << coordinates[i + 1] << "\n";
+                }
+                if (!output_file_stream)
+                    throw std::runtime_error("Unable to write file \"" + filename + "\"");
+                return;
             }
+
+            write_binary_file(filename, FileKind::DIAGRAM, voronoiDiagram.vertexCoordinates, 2);
         }
 
     };
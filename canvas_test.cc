@@ -0,0 +1,116 @@
+#include <gtest/gtest.h>
+
+#include "canvas.h"
+#include "fortune.h"
+
+#include <cstdio>
+#include <fstream>
+#include <random>
+#include <regex>
+#include <sstream>
+#include <string>
+#include <vector>
+
+using namespace hyperbolic;
+
+namespace {
+    vector<Point<double>> random_sites(int N) {
+        std::mt19937 rng(11);
+        std::uniform_real_distribution<double> uniform(0.0, 1.0);
+        vector<Point<double>> sites;
+        for (int i = 0; i < N; i++)
+            sites.emplace_back(10 * uniform(rng), 2 * M_PI * uniform(rng));
+        return sites;
+    }
+
+    std::string draw(VoronoiDiagram& v, const vector<Point<double>>& sites, VoronoiCanvasOptions& options) {
+        std::string file = ::testing::TempDir() + "canvas_test.svg";
+        VoronoiCanvas canvas(v, sites);
+        canvas.set_options(options);
+        canvas.draw_diagram(file);
+
+        std::ifstream input_stream(file);
+        std::stringstream svg;
+        svg << input_stream.rdbuf();
+        std::remove(file.c_str());
+        return svg.str();
+    }
+
+    size_t count(const std::string& svg, const std::string& element) {
+        size_t n = 0;
+        for (size_t pos = svg.find(element); pos != std::string::npos; pos = svg.find(element, pos + 1)) n++;
+        return n;
+    }
+}
+
+TEST(CanvasTest, DrawsEveryElement) {
+    vector<Point<double>> sites = random_sites(300);
+    VoronoiDiagram v;
+    FortuneHyperbolicImplementation<FullNativeKernel<double>, double> fortune(v, sites);
+    fortune.calculate();
+
+    VoronoiCanvasOptions options;
+    std::string svg = draw(v, sites, options);
+
+    EXPECT_EQ(0u, svg.rfind("<?xml", 0));
+    EXPECT_NE(std::string::npos, svg.find("</svg>"));
+    EXPECT_EQ(std::string::npos, svg.find("nan"));
+    // every site, every vertex and the origin
+    EXPECT_EQ(sites.size() + v.numberOfVertices() + 1, count(svg, "<circle"));
+    // sub-pixel edges are skipped
+    size_t paths = count(svg, "<path");
+    EXPECT_GT(paths, v.numberOfEdges());
+    EXPECT_LE(paths, 2 * v.numberOfEdges());
+}
+
+TEST(CanvasTest, DrawingDoesNotDependOnThreads) {
+    vector<Point<double>> sites = random_sites(2000);
+    VoronoiDiagram v;
+    FortuneHyperbolicImplementation<FullNativeKernel<double>, double> fortune(v, sites);
+    fortune.calculate();
+
+    VoronoiCanvasOptions options;
+    std::string sequential = draw(v, sites, options);
+    options.threads = 4;
+    EXPECT_EQ(sequential, draw(v, sites, options));
+}
+
+TEST(CanvasTest, DelaunayEdgesAreWithinTolerance) {
+    vector<Point<double>> sites = random_sites(200);
+    VoronoiDiagram v;
+    FortuneHyperbolicImplementation<FullNativeKernel<double>, double> fortune(v, sites);
+    fortune.calculate();
+
+    VoronoiCanvasOptions options;
+    options.voronoi_edge_color = "none";
+    std::string svg = draw(v, sites, options);
+
+    double max_r = std::max_element(sites.begin(), sites.end())->r;
+    double scale = std::min(options.width, options.height) / (2 * max_r);
+    auto to_point = [&](const CartesianPoint& p) {
+        double x = (p.x - options.width / 2) / scale, y = (p.y - options.height / 2) / scale;
+        return Point<double>(std::hypot(x, y), clip(atan2(y, x)));
+    };
+
+    // the geodesic between two consecutive points of a path stays within the tolerance of their segment
+    std::regex path_expression("<path d =\"([^\"]*)\" stroke = \"red\"");
+    std::regex point_expression("(-?[0-9.]+), ?(-?[0-9.]+)");
+    size_t segments = 0;
+    for (std::sregex_iterator path(svg.begin(), svg.end(), path_expression), end; path != end; ++path) {
+        std::string d = (*path)[1];
+        Path points;
+        for (std::sregex_iterator point(d.begin(), d.end(), point_expression); point != end; ++point)
+            points.emplace_back(std::stod((*point)[1]), std::stod((*point)[2]));
+        ASSERT_GE(points.size(), 5u);
+        for (size_t i = 0; i + 1 < points.size(); i++, segments++) {
+            Point<double> a = to_point(points[i]), b = to_point(points[i + 1]);
+            double endpoints[4] = {a.r, a.theta, b.r, b.theta}, middle[2];
+            batch_geodesic_midpoint(endpoints, endpoints + 2, middle, 1);
+            CartesianPoint center(CartesianPoint(Point<double>(middle[0], middle[1])) * scale);
+            center.x += options.width / 2;
+            center.y += options.height / 2;
+            EXPECT_LE(distance_to_segment(center, points[i], points[i + 1]), options.tolerance + 1e-4);
+        }
+    }
+    EXPECT_GT(segments, 0u);
+}
@@ -1,15 +1,14 @@
 #pragma once
 
+#include <cstdint>
 #include <vector>
-#include <queue>
 #include <random>
 #include <algorithm>
 #include <type_traits>
-#include <unordered_map>
 
 #include "geometry.h"
 
-using std::is_base_of, std::unique_ptr, std::shared_ptr, std::vector, std::priority_queue, std::size_t, std::string, std::to_string, std::hash, std::unordered_map;
+using std::is_base_of, std::unique_ptr, std::shared_ptr, std::vector, std::size_t, std::string, std::to_string;
 
 namespace hyperbolic {
     template<typename _float_T>
@@ -26,13 +25,6 @@ namespace hyperbolic {
         virtual ~Event() = default;
     };
 
-    template<typename _float_T>
-    class SiteEvent : public Event<_float_T> {
-    public:
-        Site<_float_T>& site;
-        explicit SiteEvent(Site<_float_T>& s) : Event<_float_T>(s.point.r), site(s) {};
-    };
-
     template<typename _float_T>
     class CircleEvent : public Event<_float_T> {
     private:
@@ -61,17 +53,119 @@ namespace hyperbolic {
             return e1->r > e2->r;
         }
 
-        bool operator()(const shared_ptr<T>& e1, const shared_ptr<T> &e2) {
-            return greater_equal(e1.get(), e2.get());
+        bool operator()(const T* e1, const T* e2) const {
+            return greater_equal(e1, e2);
         }
     };
 
-    // queue of events
+    // counters describing the work done by an EventQueue
+    struct EventQueueStatistics {
+        // number of events that were pushed into the queue
+        unsigned long long pushed = 0;
+        // number of events that were invalidated while being in the queue
+        unsigned long long invalidated = 0;
+        // number of invalid events that were popped from the queue (and thus skipped by the algorithm)
+        unsigned long long skipped = 0;
+        // number of invalid events that were removed from the queue by compactions
+        unsigned long long compacted = 0;
+        // number of compactions
+        unsigned long long compactions = 0;
+    };
+
+    /**
+     * queue of events, implemented as a binary heap ordered by radius.
+     * The queue does not own the events, they are owned by the Arena they were created in.
+     * Events that are invalidated via invalidate() stay in the heap until they are popped (lazy deletion). Since
+     * the heap would otherwise fill up with invalid events on dense inputs, it is compacted whenever the fraction of
+     * invalid events exceeds the compaction threshold, removing all of them at once and restoring the heap in
+     * linear time. A compaction may reorder events with equal radii, so the top event has to be popped before it is
+     * handled if handling it invalidates other events.
+     * */
     template <class T, typename _float_T>
-    class EventQueue : public priority_queue<shared_ptr<T>, vector<shared_ptr<T>>, CmpEvent<T, _float_T>> {
+    class EventQueue {
+    private:
+        vector<T*> heap;
+        CmpEvent<T, _float_T> cmp;
+        // number of invalidated events that are still in the heap
+        size_t invalid = 0;
+        double compactionThreshold;
+        size_t minimumCompactionSize;
+        EventQueueStatistics statistics;
+
+        template<typename F>
+        void compact(F& onRemove) {
+            auto end = std::partition(heap.begin(), heap.end(), [](const T* e) { return e->isValid(); });
+            for (auto it = end; it != heap.end(); ++it)
+                onRemove(**it);
+            statistics.compacted += heap.end() - end;
+            statistics.compactions++;
+            heap.erase(end, heap.end());
+            std::make_heap(heap.begin(), heap.end(), cmp);
+            invalid = 0;
+        }
+
     public:
+        // compactions are only worth their linear cost for heaps of at least this size
+        static constexpr size_t MINIMUM_COMPACTION_SIZE = 1024;
+
+        /**
+         * @param compactionThreshold Fraction of invalid events in the heap at which it is compacted. Values >= 1
+         * disable compactions
+         * @param minimumCompactionSize Minimum size of the heap for it to be compacted
+         */
+        explicit EventQueue(double compactionThreshold = 0.5, size_t minimumCompactionSize = MINIMUM_COMPACTION_SIZE)
+                : compactionThreshold(compactionThreshold), minimumCompactionSize(minimumCompactionSize) {};
+
+        void push(T* e) {
+            heap.push_back(e);
+            std::push_heap(heap.begin(), heap.end(), cmp);
+            statistics.pushed++;
+        }
+
         T* getTop() {
-            return (this->empty()) ? nullptr : this->top().get();
+            return (heap.empty()) ? nullptr : heap.front();
+        }
+
+        void pop() {
+            if constexpr (requires (const T& e) { e.isValid(); }) {
+                if (!heap.front()->isValid()) {
+                    statistics.skipped++;
+                    if (invalid > 0) invalid--;
+                }
+            }
+            std::pop_heap(heap.begin(), heap.end(), cmp);
+            heap.pop_back();
+        }
+
+        /**
+         * marks an event in the queue as invalid. If this triggers a compaction, onRemove is called for every invalid
+         * event that is removed from the queue, since these events are never popped
+         * */
+        template<typename F>
+        void invalidate(T* e, F&& onRemove) {
+            if (!e || !e->isValid()) return;
+            e->invalidate();
+            statistics.invalidated++;
+            invalid++;
+            if (heap.size() >= minimumCompactionSize && invalid > compactionThreshold * heap.size())
+                compact(onRemove);
+        }
+
+        void invalidate(T* e) {
+            invalidate(e, [](const T&) {});
+        }
+
+        [[nodiscard]] bool empty() const {
+            return heap.empty();
+        }
+
+        // number of events in the queue, including invalid ones that were not removed yet
+        [[nodiscard]] size_t size() const {
+            return heap.size();
+        }
+
+        [[nodiscard]] const EventQueueStatistics& getStatistics() const {
+            return statistics;
         }
     };
 
@@ -79,26 +173,126 @@ namespace hyperbolic {
     // struct identifying a set of three sites based on their IDs. Used for caching the prediction of circle events
     struct SiteTriple {
         ull ID1, ID2, ID3;
+        SiteTriple() : ID1(0), ID2(0), ID3(0) {};
         SiteTriple(ull a, ull b, ull c) {
-            vector<unsigned long long> ids = {a, b, c};
-            std::sort(ids.begin(), ids.end());
-            ID1 = ids[0], ID2 = ids[1], ID3 = ids[2];
+            // sorting network for three elements
+            if (a > b) std::swap(a, b);
+            if (b > c) std::swap(b, c);
+            if (a > b) std::swap(a, b);
+            ID1 = a, ID2 = b, ID3 = c;
+        }
+        bool operator==(const SiteTriple& t) const {
+            return ID1 == t.ID1 && ID2 == t.ID2 && ID3 == t.ID3;
         }
     };
     struct CmpSiteTriple {
         bool operator ()(const SiteTriple& a, const SiteTriple& b) const {
-            return a.ID1 == b.ID1 && a.ID2 == b.ID2 && a.ID3 == b.ID3;
+            return a == b;
         }
     };
     struct HashSiteTriple {
+        // finalizer of SplitMix64, mixes all bits of x into all bits of the result
+        static uint64_t mix(uint64_t x) {
+            x = (x ^ (x >> 30)) * 0xbf58476d1ce4e5b9;
+            x = (x ^ (x >> 27)) * 0x94d049bb133111eb;
+            return x ^ (x >> 31);
+        }
         size_t operator ()(const SiteTriple& a) const {
-            string s = to_string(a.ID1) + to_string(a.ID2) + to_string(a.ID3);
-            return hash<string>{}(s);
+            uint64_t h = mix(a.ID1 + 0x9e3779b97f4a7c15);
+            h = mix(h ^ (a.ID2 + 0x9e3779b97f4a7c15));
+            return mix(h ^ (a.ID3 + 0x9e3779b97f4a7c15));
         }
     };
 
+    /**
+     * hash table mapping site triples to the centers of the circle events they define.
+     * Uses open addressing with linear probing in a power of two sized table, so lookups and insertions do not
+     * allocate. The table can be bounded to a maximum number of entries: once it is full, it is cleared before the
+     * next insertion.
+     * */
     template<typename _float_T>
-    using SiteTripleMap = unordered_map<SiteTriple, Point<_float_T>, HashSiteTriple, CmpSiteTriple>;
+    class SiteTripleMap {
+    private:
+        enum class SlotState : uint8_t {EMPTY, FULL, DELETED};
+
+        struct Slot {
+            SiteTriple key;
+            Point<_float_T> value;
+        };
+
+        static constexpr size_t INITIAL_CAPACITY = 64;
+
+        vector<Slot> slots;
+        vector<SlotState> states;
+        // number of full and deleted slots
+        size_t full = 0, deleted = 0;
+        size_t maximumSize;
+
+        // returns the index of the slot holding key or of the first empty slot of its probe sequence
+        [[nodiscard]] size_t probe(const SiteTriple& key) const {
+            size_t mask = slots.size() - 1;
+            for (size_t i = HashSiteTriple{}(key) & mask;; i = (i + 1) & mask) {
+                if (states[i] == SlotState::EMPTY || (states[i] == SlotState::FULL && slots[i].key == key))
+                    return i;
+            }
+        }
+
+        void rehash(size_t capacity) {
+            vector<Slot> oldSlots(capacity);
+            vector<SlotState> oldStates(capacity, SlotState::EMPTY);
+            std::swap(oldSlots, slots);
+            std::swap(oldStates, states);
+            full = deleted = 0;
+            for (size_t i = 0; i < oldSlots.size(); i++) {
+                if (oldStates[i] == SlotState::FULL)
+                    insert(oldSlots[i].key, oldSlots[i].value);
+            }
+        }
 
+    public:
+        /**
+         * @param maximumSize The maximum number of entries in the table. 0 does not bound the table
+         */
+        explicit SiteTripleMap(size_t maximumSize = 0) : maximumSize(maximumSize) {
+            rehash(INITIAL_CAPACITY);
+        };
+
+        // returns a pointer to the value stored for key or nullptr if there is none
+        Point<_float_T>* find(const SiteTriple& key) {
+            size_t i = probe(key);
+            return (states[i] == SlotState::FULL) ? &slots[i].value : nullptr;
+        }
+
+        void insert(const SiteTriple& key, const Point<_float_T>& value) {
+            if (maximumSize > 0 && full >= maximumSize) clear();
+            // keep the load factor (including deleted slots) below 1/2
+            if (2 * (full + deleted + 1) > slots.size())
+                rehash((2 * (full + 1) > slots.size() / 2) ? 2 * slots.size() : slots.size());
+
+            size_t i = probe(key);
+            if (states[i] != SlotState::FULL) full++;
+            states[i] = SlotState::FULL;
+            slots[i] = {key, value};
+        }
+
+        // removes the entry stored for key, if any
+        bool erase(const SiteTriple& key) {
+            size_t i = probe(key);
+            if (states[i] != SlotState::FULL) return false;
+            states[i] = SlotState::DELETED;
+            full--;
+            deleted++;
+            return true;
+        }
+
+        void clear() {
+            std::fill(states.begin(), states.end(), SlotState::EMPTY);
+            full = deleted = 0;
+        }
+
+        [[nodiscard]] size_t size() const {
+            return full;
+        }
+    };
 
-}
+}
\ No newline at end of file
@@ -0,0 +1,189 @@
+#include <gtest/gtest.h>
+
+#include "datastructures.h"
+#include "sorting.h"
+
+#include <random>
+#include <tuple>
+
+using namespace hyperbolic;
+
+TEST(SiteTripleMapTest, IgnoresOrderOfSites) {
+    SiteTripleMap<double> map;
+    map.insert(SiteTriple(3, 1, 2), Point<double>(1, 2));
+
+    for (auto [a, b, c] : vector<std::tuple<ull, ull, ull>>{{1, 2, 3}, {2, 3, 1}, {3, 2, 1}}) {
+        auto p = map.find(SiteTriple(a, b, c));
+        ASSERT_NE(nullptr, p);
+        EXPECT_EQ(1, p->r);
+        EXPECT_EQ(2, p->theta);
+    }
+    EXPECT_EQ(nullptr, map.find(SiteTriple(1, 2, 4)));
+}
+
+TEST(SiteTripleMapTest, InsertsFindsAndErases) {
+    SiteTripleMap<double> map;
+    for (ull i = 0; i < 10000; i++)
+        map.insert(SiteTriple(i, i + 1, i + 2), Point<double>(i, 0));
+    EXPECT_EQ(10000, map.size());
+
+    for (ull i = 0; i < 10000; i += 2)
+        EXPECT_TRUE(map.erase(SiteTriple(i, i + 1, i + 2)));
+    EXPECT_FALSE(map.erase(SiteTriple(0, 1, 2)));
+    EXPECT_EQ(5000, map.size());
+
+    for (ull i = 0; i < 10000; i++) {
+        auto p = map.find(SiteTriple(i, i + 1, i + 2));
+        if (i % 2 == 0) {
+            EXPECT_EQ(nullptr, p);
+        } else {
+            ASSERT_NE(nullptr, p);
+            EXPECT_EQ(i, p->r);
+        }
+    }
+}
+
+TEST(SiteTripleMapTest, RespectsMaximumSize) {
+    SiteTripleMap<double> map(100);
+    for (ull i = 0; i < 1000; i++) {
+        map.insert(SiteTriple(i, i + 1, i + 2), Point<double>(i, 0));
+        EXPECT_LE(map.size(), 100);
+    }
+    EXPECT_NE(nullptr, map.find(SiteTriple(999, 1000, 1001)));
+}
+
+// event that can be invalidated, like a circle event, but does not depend on the beach line
+class TestEvent : public Event<double> {
+private:
+    bool valid = true;
+public:
+    explicit TestEvent(double r) : Event<double>(r) {};
+    void invalidate() {
+        valid = false;
+    }
+    [[nodiscard]] bool isValid() const {
+        return valid;
+    }
+};
+
+TEST(EventQueueTest, PopsEventsByIncreasingRadius) {
+    vector<TestEvent> events;
+    for (int i = 0; i < 100; i++)
+        events.emplace_back((i * 37) % 100);
+
+    EventQueue<TestEvent, double> queue;
+    for (auto& e : events)
+        queue.push(&e);
+
+    for (int i = 0; i < 100; i++) {
+        ASSERT_FALSE(queue.empty());
+        EXPECT_EQ(i, queue.getTop()->r);
+        queue.pop();
+    }
+    EXPECT_TRUE(queue.empty());
+    EXPECT_EQ(nullptr, queue.getTop());
+}
+
+TEST(EventQueueTest, CompactsInvalidEvents) {
+    vector<TestEvent> events;
+    for (int i = 0; i < 4000; i++)
+        events.emplace_back(i);
+
+    EventQueue<TestEvent, double> queue(0.5);
+    for (auto& e : events)
+        queue.push(&e);
+
+    // invalidating every event with an odd radius and the same events again
+    for (int i = 1; i < 4000; i += 2)
+        queue.invalidate(&events[i]);
+    for (int i = 1; i < 4000; i += 2)
+        queue.invalidate(&events[i]);
+    queue.invalidate(nullptr);
+    EXPECT_EQ(2000, queue.getStatistics().invalidated);
+    EXPECT_EQ(0, queue.getStatistics().compactions);
+
+    // passing the threshold removes all invalid events at once
+    queue.invalidate(&events[0]);
+    EXPECT_EQ(1, queue.getStatistics().compactions);
+    EXPECT_EQ(2001, queue.getStatistics().compacted);
+    EXPECT_EQ(1999, queue.size());
+
+    for (int i = 2; i < 4000; i += 2) {
+        ASSERT_TRUE(queue.getTop()->isValid());
+        EXPECT_EQ(i, queue.getTop()->r);
+        queue.pop();
+    }
+    EXPECT_TRUE(queue.empty());
+    EXPECT_EQ(0, queue.getStatistics().skipped);
+    EXPECT_EQ(4000, queue.getStatistics().pushed);
+}
+
+TEST(EventQueueTest, SkipsInvalidEventsWithoutCompaction) {
+    vector<TestEvent> events;
+    for (int i = 0; i < 10; i++)
+        events.emplace_back(i);
+
+    // the queue is too small to be compacted, so invalid events are removed lazily
+    EventQueue<TestEvent, double> queue;
+    for (auto& e : events)
+        queue.push(&e);
+    for (int i = 0; i < 10; i += 3)
+        queue.invalidate(&events[i]);
+
+    vector<double> valid;
+    while (!queue.empty()) {
+        if (queue.getTop()->isValid())
+            valid.push_back(queue.getTop()->r);
+        queue.pop();
+    }
+    EXPECT_EQ(vector<double>({1, 2, 4, 5, 7, 8}), valid);
+    EXPECT_EQ(4, queue.getStatistics().skipped);
+    EXPECT_EQ(0, queue.getStatistics().compactions);
+}
+
+TEST(EventQueueTest, ReportsEventsRemovedByCompaction) {
+    // all events share the same radius, so a compaction may reorder the heap arbitrarily
+    vector<TestEvent> events;
+    for (int i = 0; i < 8; i++)
+        events.emplace_back(1.0);
+
+    EventQueue<TestEvent, double> queue(0.0, 1);
+    for (auto& e : events)
+        queue.push(&e);
+
+    // popping the top before invalidating others keeps it from being popped twice
+    TestEvent* top = queue.getTop();
+    queue.pop();
+    vector<const TestEvent*> removed;
+    for (auto& e : events) {
+        if (&e != top && &e != &events[7])
+            queue.invalidate(&e, [&](const TestEvent& r) { removed.push_back(&r); });
+    }
+
+    EXPECT_EQ(6, queue.getStatistics().compactions);
+    EXPECT_EQ(6, removed.size());
+    for (const TestEvent* e : removed)
+        EXPECT_FALSE(e->isValid());
+    ASSERT_EQ(1, queue.size());
+    EXPECT_TRUE(queue.getTop()->isValid());
+    EXPECT_NE(top, queue.getTop());
+}
+
+TEST(SortingTest, SortsStablyByKey) {
+    // small inputs use a comparison sort, large ones the radix sort
+    for (size_t n : {size_t(100), 4 * RADIX_SORT_THRESHOLD}) {
+        std::mt19937 gen(n);
+        std::uniform_int_distribution<int> dis(-50, 50);
+        vector<double> keys(n);
+        for (double& k : keys) k = dis(gen) / 8.0;
+        // signed zeros compare equal, so they keep the order of their indices
+        keys[0] = 0.0;
+        keys[1] = -0.0;
+
+        vector<size_t> order = get_sorted_order(keys);
+        vector<size_t> expected(n);
+        std::iota(expected.begin(), expected.end(), 0);
+        std::stable_sort(expected.begin(), expected.end(), [&](size_t a, size_t b) { return keys[a] < keys[b]; });
+        EXPECT_EQ(expected, order);
+    }
+}
@@ -0,0 +1,137 @@
+# Shared engine of the utilities that aggregate the results of all site
+# sets into a single CSV file.
+#
+# Every directory results/{R}-{sample} is processed by a worker process and
+# yields a list of rows.  The rows of each directory are cached together
+# with the modification times and sizes of the files they were computed
+# from, so re-runs only recompute the directories whose files changed.
+
+from concurrent.futures import ProcessPoolExecutor
+import json
+import os
+from os import listdir
+from os.path import isdir, join
+from pathlib import Path
+
+from diagram_comparison import get_site_file
+
+CACHE_VERSION = 1
+
+
+def get_result_names(results_directory):
+    names = [
+        d for d in listdir(results_directory)
+        if isdir(join(results_directory, d))
+    ]
+    # Sorted by disk radius and sample, which is the order of the rows.
+    return sorted(names,
+                  key=lambda name: (float(name.split('-')[0]),
+                                    int(name.split('-')[1])))
+
+
+def get_fingerprint(name, results_directory):
+    # Modification time and size of all files that the rows of a directory
+    # can depend on, i.e., the results and the sites.
+    files = [
+        path for path in sorted(Path(results_directory, name).rglob('*'))
+        if path.is_file()
+    ]
+    disk_radius, diagram_id = name.split('-')[0:2]
+    site_file = get_site_file(disk_radius, diagram_id)
+    if site_file.exists():
+        files.append(site_file)
+
+    fingerprint = []
+    for path in files:
+        stat = path.stat()
+        fingerprint.append([str(path), stat.st_mtime_ns, stat.st_size])
+    return fingerprint
+
+
+def get_default_cache_file(output_file):
+    output_path = Path(output_file)
+    return output_path.parent / ('.' + output_path.name + '.cache.json')
+
+
+def read_cache(cache_file, parameters):
+    try:
+        with open(cache_file, 'r') as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    # Results computed with other parameters cannot be reused.
+    if cache.get('version') != CACHE_VERSION or cache.get(
+            'parameters') != parameters:
+        return {}
+    return cache.get('entries', {})
+
+
+def write_cache(cache_file, parameters, entries):
+    temporary_file = str(cache_file) + '.tmp'
+    with open(temporary_file, 'w') as f:
+        json.dump(
+            {
+                'version': CACHE_VERSION,
+                'parameters': parameters,
+                'entries': entries
+            }, f)
+    os.replace(temporary_file, cache_file)
+
+
+def get_string_rows(get_rows, name, results_directory):
+    return [[str(entry) for entry in row]
+            for row in get_rows(name, results_directory)]
+
+
+def aggregate(results_directory,
+              output_file,
+              header,
+              get_rows,
+              separator=', ',
+              jobs=None,
+              cache_file=None,
+              parameters=None):
+    """Writes the header and the rows that get_rows(name, results_directory)
+    returns for every result directory to the output CSV file.
+
+    get_rows is called in worker processes, so it has to be a module level
+    function (or a functools.partial of one).  The parameters identify the
+    configuration of get_rows (e.g., a tolerance), so that cached rows are
+    only reused if they were computed with the same parameters."""
+    if cache_file is None:
+        cache_file = get_default_cache_file(output_file)
+
+    cached_entries = read_cache(cache_file, parameters)
+    names = get_result_names(results_directory)
+    fingerprints = {
+        name: get_fingerprint(name, results_directory)
+        for name in names
+    }
+
+    entries = {}
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        futures = {}
+        for name in names:
+            cached = cached_entries.get(name)
+            if cached is not None and cached['fingerprint'] == fingerprints[
+                    name]:
+                entries[name] = cached
+            else:
+                futures[name] = executor.submit(get_string_rows, get_rows,
+                                                name, results_directory)
+
+        # The rows are written as soon as all directories before them are
+        # done, instead of building the whole table in memory.
+        with open(output_file, 'w') as csv_file:
+            csv_file.write(separator.join(header))
+            for name in names:
+                if name in futures:
+                    entries[name] = {
+                        'fingerprint': fingerprints[name],
+                        'rows': futures[name].result()
+                    }
+                for row in entries[name]['rows']:
+                    csv_file.write('\n' + separator.join(row))
+
+    write_cache(cache_file, parameters, entries)
+    print(f'Recomputed {len(futures)} of {len(names)} results.')
@@ -12,7 +12,9 @@
 #include <unordered_map>
 #include <vector>
 
+#include "batch_geometry.h"
 #include "cxxopts.h"
+#include "io.h"
 
 using Point_2 = CGAL::Hyperbolic_Delaunay_triangulation_traits_2<>::Point_2;
 using DelaunayTriangulation = CGAL::Hyperbolic_Delaunay_triangulation_2<
@@ -34,9 +36,12 @@ int main(int argc, char** argv) {
       cxxopts::value<std::string>())("t,output_triangulation",
                                      "Output Filename for writing the delaunay "
                                      "triangulation",
-                                     cxxopts::value<
-                                         std::string>())("h,help",
-                                                         "Print usage");
+                                     cxxopts::value<std::string>())(
+      "text",
+      "Write the diagram coordinates and the triangulation as text instead of "
+      "the binary format",
+      cxxopts::value<bool>()->default_value("false"))("h,help",
+                                                      "Print usage");
 
   auto result = options.parse(argc, argv);
 
@@ -48,26 +53,21 @@ int main(int argc, char** argv) {
   const std::string inputFile = result["i"].as<std::string>();
 
   // read the input
-  std::ifstream inputStream(inputFile);
   try {
-    if (inputStream.is_open()) {
-      std::string line;
-      while (getline(inputStream, line)) {
-        double theta, r;
-        auto pos = line.find(' ');
-        theta = stod(line.substr(0, pos));
-        r = stod(line.substr(pos));
-        r = tanh(r / 2);
-        Point_2 p(r * cos(theta), r * sin(theta));
-        pts.push_back(p);
-      }
-      inputStream.close();
-    } else {
-      std::cout << "Unable to open input file \"" << inputFile << "\"\n";
-      return EXIT_FAILURE;
+    std::vector<hyperbolic::Point<double>> sites =
+        hyperbolic::read_sites(inputFile);
+    std::vector<double> polar, poincare(2 * sites.size());
+    polar.reserve(2 * sites.size());
+    for (const hyperbolic::Point<double>& site : sites) {
+      polar.push_back(site.r);
+      polar.push_back(site.theta);
+    }
+    hyperbolic::batch_to_poincare(polar.data(), poincare.data(), sites.size());
+    for (size_t i = 0; i < sites.size(); i++) {
+      pts.emplace_back(poincare[2 * i], poincare[2 * i + 1]);
     }
-  } catch (...) {
-    std::cout << "Error while reading file \"" << inputFile << "\"\n";
+  } catch (const std::runtime_error& e) {
+    std::cout << e.what() << "\n";
     return EXIT_FAILURE;
   }
 
@@ -95,42 +95,71 @@ int main(int argc, char** argv) {
             << dtEnd.number_of_hyperbolic_edges() << std::endl;
   std::cout << "Time:                       " << timer.time() << std::endl;
 
-  // Writing the diagram
-  if (result.count("o")) {
-    const std::string diagramOutputFile = result["o"].as<std::string>();
-    std::fstream diagramOutputFileStream(diagramOutputFile, std::fstream::out);
-
-    for (DelaunayTriangulation::All_faces_iterator f = dtEnd.all_faces_begin();
-         f != dtEnd.all_faces_end(); ++f) {
-      auto voronoi_vertex = dtEnd.dual(f);
-      auto x = CGAL::to_double(voronoi_vertex.x());
-      auto y = CGAL::to_double(voronoi_vertex.y());
+  const bool text = result["text"].as<bool>();
 
-      auto r = sqrt(x * x + y * y);
-      r = 2.0 * atanh(r);
-      auto angle = atan2(y, x);
-
-      // Make sure angle is in [0, 2pi]
-      if (angle < 0.0) {
-        angle += 2 * M_PI;
+  try {
+    // Writing the diagram
+    if (result.count("o")) {
+      const std::string diagramOutputFile = result["o"].as<std::string>();
+      std::vector<double> poincare;
+
+      for (DelaunayTriangulation::All_faces_iterator f =
+               dtEnd.all_faces_begin();
+           f != dtEnd.all_faces_end(); ++f) {
+        auto voronoi_vertex = dtEnd.dual(f);
+        poincare.push_back(CGAL::to_double(voronoi_vertex.x()));
+        poincare.push_back(CGAL::to_double(voronoi_vertex.y()));
       }
 
-      diagramOutputFileStream << r << " " << angle << "\n";
+      // (r, theta) coordinates with the angle in [0, 2pi)
+      std::vector<double> coordinates(poincare.size());
+      hyperbolic::batch_from_poincare(poincare.data(), coordinates.data(),
+                                      poincare.size() / 2);
+
+      if (text) {
+        std::fstream diagramOutputFileStream(diagramOutputFile,
+                                             std::fstream::out);
+        for (size_t i = 0; i < coordinates.size(); i += 2) {
+          diagramOutputFileStream << coordinates[i] << " "
+                                  << coordinates[i + 1] << "\n";
+        }
+      } else {
+        hyperbolic::write_binary_file(diagramOutputFile,
+                                      hyperbolic::FileKind::DIAGRAM,
+                                      coordinates, 2);
+      }
     }
-  }
 
-  // Writing the triangulation
-  if (result.count("t")) {
-    const std::string triangulationOutputFile = result["t"].as<std::string>();
-    std::fstream outputFileStream(triangulationOutputFile, std::fstream::out);
-    for (DelaunayTriangulation::All_edges_iterator e = dtEnd.all_edges_begin();
-         e != dtEnd.all_edges_end(); e++) {
-      DelaunayTriangulation::Face_handle f = e->first;
-      DelaunayTriangulation::Vertex_handle a = f->vertex(f->cw(e->second));
-      DelaunayTriangulation::Vertex_handle b = f->vertex(f->ccw(e->second));
-      outputFileStream << vertext_to_id[a->handle()] << " "
-                       << vertext_to_id[b->handle()] << "\n";
+    // Writing the triangulation
+    if (result.count("t")) {
+      const std::string triangulationOutputFile =
+          result["t"].as<std::string>();
+      std::vector<uint64_t> ids;
+      for (DelaunayTriangulation::All_edges_iterator e =
+               dtEnd.all_edges_begin();
+           e != dtEnd.all_edges_end(); e++) {
+        DelaunayTriangulation::Face_handle f = e->first;
+        DelaunayTriangulation::Vertex_handle a = f->vertex(f->cw(e->second));
+        DelaunayTriangulation::Vertex_handle b = f->vertex(f->ccw(e->second));
+        ids.push_back(vertext_to_id[a->handle()]);
+        ids.push_back(vertext_to_id[b->handle()]);
+      }
+
+      if (text) {
+        std::fstream outputFileStream(triangulationOutputFile,
+                                      std::fstream::out);
+        for (size_t i = 0; i < ids.size(); i += 2) {
+          outputFileStream << ids[i] << " " << ids[i + 1] << "\n";
+        }
+      } else {
+        hyperbolic::write_binary_file(triangulationOutputFile,
+                                      hyperbolic::FileKind::TRIANGULATION,
+                                      ids, 2);
+      }
     }
+  } catch (const std::runtime_error& e) {
+    std::cout << e.what() << "\n";
+    return EXIT_FAILURE;
   }
 
   return EXIT_SUCCESS;
@@ -6,15 +6,17 @@
 #     --diagrams path/to/directory/containing/diagrams \
 #     --output path/to/where/the/result should be stored
 #
+# Only the results that changed since the last run are recomputed (see
+# aggregation.py).
+#
 
 import argparse
-from functools import cmp_to_key
+from functools import partial
 import sys
-from os import listdir
-from os.path import isdir, isfile, join
 from pathlib import Path
 
-from diagram_comparison import read_diagram, matches_between_point_sets, get_number_of_points_in_file, precision_sort
+from aggregation import aggregate
+from diagram_comparison import read_diagram, matches_between_point_sets, get_number_of_points_in_file, get_files_sorted_by_precision, get_existing_file
 
 
 def main(argv):
@@ -26,44 +28,49 @@ def main(argv):
                         '--results',
                         help='Path to the directory containing the diagrams.')
     parser.add_argument('-o', '--output', help="Path to the output CSV file.")
+    parser.add_argument(
+        '-t',
+        '--tolerance',
+        type=float,
+        default=None,
+        help=
+        'Match vertices whose Cartesian coordinates are at most this far apart instead of requiring equal coordinates.'
+    )
+    parser.add_argument(
+        '-j',
+        '--jobs',
+        type=int,
+        default=None,
+        help='Number of worker processes.  Defaults to the number of cores.')
     args = parser.parse_args(argv[1:])
-    csv = generate_csv_from_results(args.results)
-    write_csv_to_file(csv, args.output)
-
-
-def get_diagram_names(results_directory):
-    return [
-        d for d in listdir(results_directory)
-        if isdir(join(results_directory, d))
-    ]
+    aggregate(args.results,
+              args.output,
+              get_header(),
+              partial(get_rows, tolerance=args.tolerance),
+              jobs=args.jobs,
+              parameters={'tolerance': args.tolerance})
 
 
 def get_native_precision_diagram(name, results_directory):
     diagrams_path = Path(results_directory) / name / 'diagrams'
 
-    diagram_files = sorted([
-        join(diagrams_path, f)
-        for f in listdir(diagrams_path) if isfile(join(diagrams_path, f))
-    ],
-                           key=cmp_to_key(precision_sort))
+    diagram_files = get_files_sorted_by_precision(diagrams_path)
 
     return read_diagram(diagram_files[-1])
 
 
 def get_cgal_diagram(name, results_directory):
     diagrams_path = Path(results_directory) / name / 'diagrams-cgal'
-    file_name = name + '-diagram-cgal.txt'
-
-    return read_diagram(diagrams_path / file_name)
+    return read_diagram(get_existing_file(diagrams_path / (name + '-diagram-cgal')))
 
 
-def get_row_from_comparison_between(name, diagram1, diagram2):
+def get_row_from_comparison_between(name, diagram1, diagram2, tolerance=None):
     disk_radius, diagram_id = name.split('-')[0:2]
     number_of_points = get_number_of_points_in_file(disk_radius, diagram_id)
 
     vertex_percentage = float(len(diagram2)) / float(len(diagram1))
     number_of_matching_vertices = matches_between_point_sets(
-        diagram1, diagram2)
+        diagram1, diagram2, tolerance)
     match_percentage = float(number_of_matching_vertices) / float(
         len(diagram1))
 
@@ -88,30 +95,14 @@ def get_header():
     ]
 
 
-def generate_csv_from_results(results_directory):
-    header = get_header()
-    rows = []
-
-    diagram_names = get_diagram_names(results_directory)
-    for diagram_name in diagram_names:
-        diagram_native = get_native_precision_diagram(diagram_name,
-                                                      results_directory)
-        diagram_cgal = get_cgal_diagram(diagram_name, results_directory)
-        row = get_row_from_comparison_between(diagram_name, diagram_native,
-                                              diagram_cgal)
-        rows.append(row)
-
-    rows = sorted(rows, key=lambda x: (float(x[0]), int(x[1])))
-    rows = [[str(entry) for entry in row] for row in rows]
-
-    header_string = ', '.join(header)
-    row_strings = [', '.join(row) for row in rows]
-    return '\n'.join([header_string, *row_strings])
-
-
-def write_csv_to_file(csv, output_file):
-    with open(output_file, 'w') as csv_file:
-        csv_file.write(csv)
+def get_rows(diagram_name, results_directory, tolerance=None):
+    diagram_native = get_native_precision_diagram(diagram_name,
+                                                  results_directory)
+    diagram_cgal = get_cgal_diagram(diagram_name, results_directory)
+    return [
+        get_row_from_comparison_between(diagram_name, diagram_native,
+                                        diagram_cgal, tolerance)
+    ]
 
 
 if __name__ == '__main__':
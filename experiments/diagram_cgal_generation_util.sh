@@ -48,8 +48,13 @@ mkdir -p ${dataPath}
 resultsPath="${projectRoot}/results"
 mkdir -p ${resultsPath}
 
-for filePath in ${dataPath}/*.txt;
+for filePath in ${dataPath}/*.bin ${dataPath}/*.txt;
 do
+    # Skip patterns that did not match any file.
+    if [ ! -f "$filePath" ]; then
+        continue
+    fi
+
     filePathWithoutExtension=${filePath%.*}
     filename=${filePathWithoutExtension##*/}
 
@@ -66,6 +71,6 @@ do
     triangulationsDir="${targetDir}/triangulations-cgal"
     mkdir -p ${triangulationsDir}
 
-    sem -j $jobs "${cgalUtilPath} -i ${filePath} -o ${diagramsDir}/${filename}-diagram-cgal.txt -t ${triangulationsDir}/${filename}-triangulation-cgal.txt"
+    sem -j $jobs "${cgalUtilPath} -i ${filePath} -o ${diagramsDir}/${filename}-diagram-cgal.bin -t ${triangulationsDir}/${filename}-triangulation-cgal.bin"
 done
 sem --wait
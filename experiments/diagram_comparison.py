@@ -1,61 +1,247 @@
-from multiset import Multiset
+from functools import lru_cache
+from os import listdir
+from os.path import isfile, join
 from pathlib import Path
+import numpy as np
 import os
 
-
-class Point:
-    def __init__(self, radius, angle):
-        self.radius = radius
-        self.angle = angle
-
-    def __eq__(self, other):
-        return self.radius == other.radius and self.angle == other.angle
-
-    def __hash__(self):
-        return hash((self.radius, self.angle))
+# Layout of the header of the binary files written by the C++ tools (see
+# io.h).  The payload of rows x columns float64 or uint64 values follows
+# directly after the header.
+HEADER_SIZE = 64
+FILE_MAGIC = b'HYPVORO\0'
+FILE_VERSION = 1
+FILE_FLAG_CHECKSUM = 1
+HEADER_DTYPE = np.dtype([
+    ('magic', 'V8'),
+    ('version', '<u4'),
+    ('kind', '<u4'),
+    ('type', '<u4'),
+    ('flags', '<u4'),
+    ('rows', '<u8'),
+    ('columns', '<u8'),
+    ('checksum', '<u8'),
+    ('reserved', 'V16'),
+])
+VALUE_TYPES = {1: np.dtype('<f8'), 2: np.dtype('<u8')}
+
+# The coordinates of Voronoi vertices are rounded to 6 significant digits
+# before they are compared, to tolerate differences in the last bits.
+# Older text files were written with 6 significant digits, for which the
+# rounding does not change anything.
+SIGNIFICANT_DIGITS = 6
+
+
+# Voronoi vertices are compared as records of this type, which are ordered
+# by radius first and by angle second.
+POINT_DTYPE = np.dtype([('radius', '<f8'), ('angle', '<f8')])
+
+
+def is_binary_file(file_path):
+    with open(file_path, 'rb') as f:
+        return f.read(len(FILE_MAGIC)) == FILE_MAGIC
+
+
+def read_header(file_path):
+    header = np.fromfile(file_path, dtype=HEADER_DTYPE, count=1)
+    if len(header) == 0 or header['magic'][0].tobytes() != FILE_MAGIC:
+        raise ValueError(f'{file_path} is not a binary file')
+    if header['version'][0] != FILE_VERSION:
+        raise ValueError(
+            f'{file_path} has unsupported version {header["version"][0]}')
+    return header[0]
+
+
+def payload_checksum(payload):
+    words = payload.reshape(-1).view('<u8')
+    factors = 2 * np.arange(len(words), dtype=np.uint64) + np.uint64(1)
+    return np.sum(words * factors, dtype=np.uint64)
+
+
+def read_array(file_path, columns=2, dtype=np.float64, verify=False):
+    """Returns the rows stored in a binary or a text file as an array of shape
+    (rows, columns).  The payload of binary files is mapped into memory
+    instead of being read, so only the parts that are accessed are loaded.
+    If verify is set, the payload is checked against the checksum."""
+    if not is_binary_file(file_path):
+        return np.loadtxt(file_path, dtype=dtype, ndmin=2).reshape(-1, columns)
+
+    header = read_header(file_path)
+    value_type = VALUE_TYPES[int(header['type'])]
+    if header['columns'] != columns or value_type != np.dtype(dtype):
+        raise ValueError(f'{file_path} holds a different kind of data')
+
+    rows = int(header['rows'])
+    payload_size = os.path.getsize(file_path) - HEADER_SIZE
+    if payload_size != rows * columns * value_type.itemsize:
+        raise ValueError(f'{file_path} has an invalid size')
+    if rows == 0:
+        return np.empty((0, columns), dtype=value_type)
+    payload = np.memmap(file_path,
+                        dtype=value_type,
+                        mode='r',
+                        offset=HEADER_SIZE,
+                        shape=(rows, columns))
+    if verify and header['flags'] & FILE_FLAG_CHECKSUM:
+        if payload_checksum(payload) != header['checksum']:
+            raise ValueError(f'Checksum of {file_path} does not match')
+    return payload
+
+
+def round_to_significant_digits(values, digits=SIGNIFICANT_DIGITS):
+    """Rounds like formatting with '%.{digits}g' and parsing the result,
+    except for values whose last digit is a tie after scaling."""
+    values = np.asarray(values, dtype=np.float64)
+    magnitude = np.abs(values)
+    exponent = np.floor(
+        np.log10(
+            np.where(np.isfinite(magnitude) & (magnitude > 0), magnitude,
+                     1.0)))
+    decimals = digits - 1 - exponent
+    # Dividing by an exact power of ten yields the double closest to the
+    # rounded decimal number, i.e., the same value as parsing it.
+    scale = 10.0**np.abs(decimals)
+    return np.where(decimals >= 0,
+                    np.round(values * scale) / scale,
+                    np.round(values / scale) * scale)
+
+
+def to_points(coordinates):
+    # Converts an array of (r, theta) rows into POINT_DTYPE records, sorted
+    # by radius and angle.
+    coordinates = np.asarray(coordinates, dtype=np.float64).reshape(-1, 2)
+    keys = np.sort(coordinates[:, 0] + 1j * coordinates[:, 1])
+    points = np.empty(len(coordinates), dtype=POINT_DTYPE)
+    points['radius'] = keys.real
+    points['angle'] = keys.imag
+    return points
 
 
 def read_diagram(file_path):
-    points = []
-    with open(file_path, 'r') as f:
-        for line in f:
-            radius, angle = [float(x) for x in line.split(' ')]
-            points.append(Point(radius, angle))
-
-    def point_compare(p):
-        return (p.radius, p.angle)
-
-    return sorted(points, key=point_compare)
-
-
-def matches_between_point_sets(points1, points2):
-    point_set1 = Multiset(points1)
-    point_set2 = Multiset(points2)
-    return len(point_set1.intersection(point_set2))
+    """Returns the Voronoi vertices stored in a file as an array of
+    POINT_DTYPE records, sorted by radius and angle."""
+    coordinates = np.asarray(read_array(file_path))
+    return to_points(round_to_significant_digits(coordinates))
+
+
+def to_keys(points):
+    # Complex numbers are sorted by their real and then by their imaginary
+    # part, which is a lot faster than sorting structured arrays.
+    return points['radius'] + 1j * points['angle']
+
+
+def to_cartesian(points):
+    return np.column_stack([
+        points['radius'] * np.cos(points['angle']),
+        points['radius'] * np.sin(points['angle'])
+    ])
+
+
+class GroundTruthIndex:
+    """Index of the Voronoi vertices of a reference diagram that is built once
+    and can then be matched against any number of other diagrams."""
+    def __init__(self, points):
+        self.size = len(points)
+        self.points = points
+        self.keys, self.counts = np.unique(to_keys(points),
+                                           return_counts=True)
+        self.tree = None
+
+    def __len__(self):
+        return self.size
+
+    def exact_matches(self, points):
+        keys, counts = np.unique(to_keys(points), return_counts=True)
+        indices = np.searchsorted(self.keys, keys)
+        found = indices < len(self.keys)
+        found[found] = self.keys[indices[found]] == keys[found]
+        return int(
+            np.minimum(self.counts[indices[found]], counts[found]).sum())
+
+    def tolerant_matches(self, points, tolerance):
+        # Imported here, since scipy is only required for tolerance based
+        # matches.
+        from scipy.spatial import cKDTree
+
+        if self.size == 0 or len(points) == 0:
+            return 0
+
+        if self.tree is None:
+            self.tree = cKDTree(to_cartesian(self.points))
+        pairs = self.tree.sparse_distance_matrix(cKDTree(
+            to_cartesian(points)),
+                                                 tolerance,
+                                                 p=2.0,
+                                                 output_type='ndarray')
+        # Every vertex is matched at most once, closest pairs first.
+        pairs = pairs[np.argsort(pairs['v'], kind='stable')]
+        matched1 = np.zeros(self.size, dtype=bool)
+        matched2 = np.zeros(len(points), dtype=bool)
+
+        matches = 0
+        for a, b in zip(pairs['i'].tolist(), pairs['j'].tolist()):
+            if not matched1[a] and not matched2[b]:
+                matched1[a] = matched2[b] = True
+                matches += 1
+        return matches
+
+    def matches(self, points, tolerance=None):
+        """Returns the size of the multiset intersection of the indexed
+        vertices and an array of POINT_DTYPE records.  If a tolerance is
+        given, two vertices match if the Euclidean distance of their
+        Cartesian coordinates is at most the tolerance, and every vertex is
+        matched at most once."""
+        if tolerance is None:
+            return self.exact_matches(points)
+        return self.tolerant_matches(points, tolerance)
+
+
+def matches_between_point_sets(points1, points2, tolerance=None):
+    # See GroundTruthIndex.matches.  When comparing several diagrams with
+    # the same reference, build the index once instead.
+    return GroundTruthIndex(points1).matches(points2, tolerance)
+
+
+def get_existing_file(path_without_extension):
+    """Returns the binary file with the given path if it exists and the text
+    file otherwise."""
+    binary_path = Path(str(path_without_extension) + '.bin')
+    if binary_path.exists():
+        return binary_path
+    return Path(str(path_without_extension) + '.txt')
+
+
+def get_site_file(disk_radius, diagram_id):
+    points_path = Path(os.getcwd()) / 'experiments' / 'data'
+    return get_existing_file(points_path /
+                             (str(disk_radius) + '-' + str(diagram_id)))
 
 
+@lru_cache(maxsize=None)
 def get_number_of_points_in_file(disk_radius, diagram_id):
-    points_path = Path(os.getcwd()) / 'experiments' / 'data'
-    file_path = str(disk_radius) + '-' + str(diagram_id) + '.txt'
+    path = get_site_file(disk_radius, diagram_id)
+    if is_binary_file(path):
+        return int(read_header(path)['rows'])
 
-    path = points_path / Path(file_path)
     num_lines = sum(1 for line in open(path))
 
     return num_lines
 
 
 def get_precision_from_file_name(file_name):
-    file_name_without_extension = file_name.replace('.txt', '')
+    file_name_without_extension = Path(file_name).stem
     components = file_name_without_extension.split('-')
     return int(components[-1])
 
 
-def precision_sort(path1, path2):
+def sort_by_precision(file_paths):
+    return sorted(file_paths, key=get_precision_from_file_name)
 
-    precision1 = get_precision_from_file_name(path1)
-    precision2 = get_precision_from_file_name(path2)
 
-    if precision1 < precision2:
-        return -1
-    else:
-        return 1
+def get_files_sorted_by_precision(directory):
+    # The files of a results directory, from the lowest to the highest
+    # precision.
+    return sort_by_precision([
+        join(directory, f) for f in listdir(directory)
+        if isfile(join(directory, f))
+    ])
@@ -47,26 +47,11 @@ mkdir -p ${dataPath}
 # Path to where results should be stored.
 resultsPath="${projectRoot}/results"
 
-for filePath in ${dataPath}/*.txt;
-do
-    filePathWithoutExtension=${filePath%.*}
-    filename=${filePathWithoutExtension##*/}
-
-    if [ $filename == "parameters" ]; then
-        continue
-    fi
-
-    targetDir="${resultsPath}/${filename}"
-    mkdir -p ${targetDir}
-
-    diagramsDir="${targetDir}/diagrams"
-    mkdir -p ${diagramsDir}
-
-    triangulationsDir="${targetDir}/triangulations"
-    mkdir -p ${triangulationsDir}
-
-    for precision in $(seq 16 16 $conf_maximumPrecision); do 
-        sem -j $jobs "${voronoiUtilPath} -i ${filePath} -p ${precision} -o ${diagramsDir}/${filename}-diagram-precision-${precision}.txt -t ${triangulationsDir}/${filename}-triangulation-precision-${precision}.txt"
-    done
-    sem --wait
-done
+# All site files and precisions are computed by a single main_util
+# process, which reads every site file once and distributes the
+# precisions over its worker threads.  {name} is replaced with the name
+# of the site file and {precision} with the precision.
+precisions=$(seq -s, 16 16 $conf_maximumPrecision)
+${voronoiUtilPath} -b ${dataPath} -j $jobs -p ${precisions} \
+    -o "${resultsPath}/{name}/diagrams/{name}-diagram-precision-{precision}.bin" \
+    -t "${resultsPath}/{name}/triangulations/{name}-triangulation-precision-{precision}.bin"
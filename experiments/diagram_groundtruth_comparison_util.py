@@ -4,17 +4,18 @@
 # Usage:
 #   bazel run -c opt experiments/diagram_groundtruth_comparison_util -- --diagrams path/to/directory/containing/diagrams --output path/to/result/directory
 #
+# The ground truth is indexed once and the other diagrams are read and
+# matched against it one after another.  Diagrams that are already in memory
+# can be compared with compare_diagrams_in_memory.
+#
 
 import argparse
-from functools import cmp_to_key
 import sys
-from os import listdir
-from os.path import isfile, join
 
 from pathlib import Path
 
 from experiments.diagram_groundtruth_comparison_pb2 import Comparison
-from diagram_comparison import read_diagram, matches_between_point_sets, get_number_of_points_in_file, precision_sort
+from diagram_comparison import GroundTruthIndex, read_diagram, get_number_of_points_in_file, get_files_sorted_by_precision, get_precision_from_file_name, round_to_significant_digits, to_points
 
 
 def main(argv):
@@ -29,44 +30,27 @@ def main(argv):
         '-o',
         '--output',
         help="Path to the directory where the result file should be stored.")
+    parser.add_argument(
+        '-t',
+        '--tolerance',
+        type=float,
+        default=None,
+        help=
+        'Match vertices whose Cartesian coordinates are at most this far apart instead of requiring equal coordinates.'
+    )
     args = parser.parse_args(argv[1:])
 
-    diagrams_path = args.diagrams
-
-    diagram_files = sorted([
-        join(diagrams_path, f)
-        for f in listdir(diagrams_path) if isfile(join(diagrams_path, f))
-    ],
-                           key=cmp_to_key(precision_sort))
-
-    comparison = Comparison()
+    diagram_files = get_files_sorted_by_precision(args.diagrams)
 
     groundtruth_path = diagram_files[-1]
     (groundtruth_radius, groundtruth_id,
      groundtruth_precision) = get_parameters_from_file_path(groundtruth_path)
-    comparison.diskRadius = groundtruth_radius
-    comparison.diagram = groundtruth_id
-    comparison.numberOfPoints = get_number_of_points_in_file(
-        groundtruth_radius, groundtruth_id)
-
-    groundtruth_points = read_diagram(groundtruth_path)
-
-    comparison.groundTruth.precision = groundtruth_precision
-    comparison.groundTruth.numberOfVertices = len(groundtruth_points)
-    comparison.groundTruth.numberOfVerticesMatchingGroundTruth = -1
-
-    for cmp_file in diagram_files[:-1]:
-        (comparison_radius, comparison_id,
-         comparison_precision) = get_parameters_from_file_path(cmp_file)
-        comparison_points = read_diagram(cmp_file)
-
-        comparison_result = comparison.comparisons.add()
-        comparison_result.precision = comparison_precision
-        comparison_result.numberOfVertices = len(comparison_points)
 
-        number_of_matches = matches_between_point_sets(groundtruth_points,
-                                                       comparison_points)
-        comparison_result.numberOfVerticesMatchingGroundTruth = number_of_matches
+    comparison = compare_with_groundtruth(
+        groundtruth_radius, groundtruth_id,
+        get_number_of_points_in_file(groundtruth_radius, groundtruth_id),
+        (groundtruth_precision, read_diagram(groundtruth_path)),
+        read_diagrams(diagram_files[:-1]), args.tolerance)
 
     # Write the new comparison to file.
     output_file_name = Path(args.output) / Path(
@@ -78,10 +62,69 @@ def main(argv):
     print(f'Result written to file: {output_file_name}')
 
 
+def read_diagrams(diagram_files):
+    # Reads the diagrams lazily, so only one of them is kept in memory.
+    for diagram_file in diagram_files:
+        yield (get_precision_from_file_name(diagram_file),
+               read_diagram(diagram_file))
+
+
+def compare_with_groundtruth(disk_radius,
+                             diagram_id,
+                             number_of_points,
+                             groundtruth,
+                             diagrams,
+                             tolerance=None):
+    """Returns the Comparison of the diagrams with the ground truth.  The
+    ground truth is a pair of its precision and its vertices as POINT_DTYPE
+    records and diagrams is an iterable of such pairs, which is consumed one
+    diagram at a time."""
+    groundtruth_precision, groundtruth_points = groundtruth
+    groundtruth_index = GroundTruthIndex(groundtruth_points)
+
+    comparison = Comparison()
+    comparison.diskRadius = disk_radius
+    comparison.diagram = diagram_id
+    comparison.numberOfPoints = number_of_points
+
+    comparison.groundTruth.precision = groundtruth_precision
+    comparison.groundTruth.numberOfVertices = len(groundtruth_index)
+    comparison.groundTruth.numberOfVerticesMatchingGroundTruth = -1
+
+    for precision, points in diagrams:
+        comparison_result = comparison.comparisons.add()
+        comparison_result.precision = precision
+        comparison_result.numberOfVertices = len(points)
+        comparison_result.numberOfVerticesMatchingGroundTruth = groundtruth_index.matches(
+            points, tolerance)
+
+    return comparison
+
+
+def compare_diagrams_in_memory(disk_radius,
+                               diagram_id,
+                               number_of_points,
+                               diagrams,
+                               tolerance=None):
+    """Like compare_with_groundtruth, but for the outputs of a run with
+    several precisions that are still in memory.  diagrams maps each
+    precision to the vertices of its diagram as an array of (r, theta) rows
+    and the highest precision is used as the ground truth.  The coordinates
+    are rounded like the ones read from binary files."""
+    def get_points(precision):
+        return to_points(round_to_significant_digits(diagrams[precision]))
+
+    precisions = sorted(diagrams)
+    return compare_with_groundtruth(
+        disk_radius, diagram_id, number_of_points,
+        (precisions[-1], get_points(precisions[-1])),
+        ((precision, get_points(precision))
+         for precision in precisions[:-1]), tolerance)
+
+
 def get_parameters_from_file_path(file_path):
-    # 24-1-precision-64.txt
-    file_name = Path(file_path).name
-    file_name = file_name.replace('.txt', '')
+    # 24-1-precision-64.bin
+    file_name = Path(file_path).stem
     file_name_components = file_name.split('-')
     return (float(file_name_components[0]), int(file_name_components[1]),
             int(file_name_components[-1]))
@@ -19,6 +19,10 @@ conf_numberOfSites=100000
 # The number of samples per disk radius that are considered.
 conf_numberOfSamples=100
 
+# The seed from which the sites of all samples are generated.  Generating
+# the sites again with the same seed yields identical files.
+conf_siteSeed=1
+
 # The maximum precision in bits we consider. This should be a multiple
 # of 16 in [16, 256].
 conf_maximumPrecision=128
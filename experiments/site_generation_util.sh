@@ -13,7 +13,7 @@ if [[ ! -d "$DIR" ]]; then DIR="$PWD"; fi
 
 # Read command line flags
 
-# By default we perform all jobs sequentally -> 1 job at the time.
+# By default the samples are generated sequentially.
 jobs=1
 while getopts j: flag
 do
@@ -21,7 +21,7 @@ do
         j) jobs=${OPTARG};;
     esac
 done
-echo "Using: $jobs jobs in parallel";
+echo "Using: $jobs threads";
 
 # Path to the Bazel target of the generator
 generatorPath=$(rlocation "__main__/generator_util")
@@ -46,13 +46,11 @@ mkdir -p ${dataPath}
 # Path to where the parameters are stored.
 parametersPath="${dataPath}/parameters.txt"
 
-while IFS="" read -r parameters || [ -n "$parameters" ]
-do
-    parameterPair=( $parameters )
-    R=${parameterPair[0]}
-    N=${parameterPair[1]}
-    for sample in $(seq $conf_numberOfSamples); do
-        sem -j $jobs "${generatorPath} -R $R -N $N -o ${dataPath}/${R}-${sample}.txt"
-    done
-    sem --wait
-done < $parametersPath
+# All samples are generated by a single process.  Every sample is drawn
+# from its own random stream, so the files only depend on the seed.
+"${generatorPath}" \
+    --parameters "${parametersPath}" \
+    --samples "${conf_numberOfSamples}" \
+    --seed "${conf_siteSeed}" \
+    -j "${jobs}" \
+    -o "${dataPath}/{R}-{sample}.bin"
@@ -11,7 +11,9 @@
 #include <fstream>
 #include <random>
 
+#include "batch_geometry.h"
 #include "cxxopts.h"
+#include "io.h"
 
 typedef CGAL::Hyperbolic_Delaunay_triangulation_traits_2<>  Gt;
 typedef Gt::Point_2                                         Point_2;
@@ -36,6 +38,7 @@ int main(int argc, char** argv) {
     options.add_options()
             ("i,input", "Input Filename", cxxopts::value<std::string>())
             ("o,output", "Output Filename", cxxopts::value<std::string>())
+            ("text", "Write the triangulation as text instead of the binary format", cxxopts::value<bool>()->default_value("false"))
             ("h,help", "Print usage");
 
     auto result = options.parse(argc, argv);
@@ -49,26 +52,19 @@ int main(int argc, char** argv) {
     string output_file = result["o"].as<string>();
 
     // read the input
-    ifstream input_stream(input_file);
     try {
-        if (input_stream.is_open()) {
-            string line;
-            while (getline(input_stream, line)) {
-                double theta, r;
-                auto pos = line.find(' ');
-                theta = stod(line.substr(0, pos));
-                r = stod(line.substr(pos));
-                r = tanh(r/2);
-                Point_2 p(r*cos(theta), r*sin(theta));
-                pts.push_back(p);
-            }
-            input_stream.close();
-        } else {
-            cout << "Unable to open input file \"" << input_file << "\"\n";
-            exit(1);
+        vector<hyperbolic::Point<double>> sites = hyperbolic::read_sites(input_file);
+        vector<double> polar, poincare(2 * sites.size());
+        polar.reserve(2 * sites.size());
+        for (const hyperbolic::Point<double>& site : sites) {
+            polar.push_back(site.r);
+            polar.push_back(site.theta);
         }
-    } catch (...) {
-        cout << "Error while reading file \"" << input_file << "\"\n";
+        hyperbolic::batch_to_poincare(polar.data(), poincare.data(), sites.size());
+        for (size_t i = 0; i < sites.size(); i++)
+            pts.emplace_back(poincare[2*i], poincare[2*i + 1]);
+    } catch (const std::runtime_error& e) {
+        cout << e.what() << "\n";
         exit(1);
     }
 
@@ -89,12 +85,26 @@ int main(int argc, char** argv) {
     std::cout << "Time:                       " << timer.time() << std::endl;
 
 
-    std::fstream output_file_stream(output_file, std::fstream::out);
+    vector<uint64_t> ids;
     for (Dt::All_edges_iterator e = dt_end.all_edges_begin(); e != dt_end.all_edges_end(); e++) {
         Dt::Face_handle f = e->first;
         Dt::Vertex_handle a = f->vertex(f->cw(e->second));
         Dt::Vertex_handle b = f->vertex(f->ccw(e->second));
-        output_file_stream << vertext_to_id[a->handle()] << " " << vertext_to_id[b->handle()] << "\n";
+        ids.push_back(vertext_to_id[a->handle()]);
+        ids.push_back(vertext_to_id[b->handle()]);
+    }
+
+    if (result["text"].as<bool>()) {
+        std::fstream output_file_stream(output_file, std::fstream::out);
+        for (size_t i = 0; i < ids.size(); i += 2)
+            output_file_stream << ids[i] << " " << ids[i + 1] << "\n";
+    } else {
+        try {
+            hyperbolic::write_binary_file(output_file, hyperbolic::FileKind::TRIANGULATION, ids, 2);
+        } catch (const std::runtime_error& e) {
+            cout << e.what() << "\n";
+            exit(1);
+        }
     }
 
     return EXIT_SUCCESS;
@@ -1,51 +1,94 @@
-from os.path import isdir, isfile, join
-from os import listdir
-import networkit as nk
+import numpy as np
 from pathlib import Path
-from functools import cmp_to_key
 
-from diagram_comparison import precision_sort, get_precision_from_file_name
+from diagram_comparison import get_files_sorted_by_precision, get_precision_from_file_name, read_array, get_existing_file
 
+# Site IDs are packed into the upper and the lower half of an edge key.
+ID_BITS = 32
 
-def get_triangulation_names(results_directory):
-    return [
-        d for d in listdir(results_directory)
-        if isdir(join(results_directory, d))
-    ]
 
+def to_edge_keys(edges):
+    # Packs every undirected edge {u, v} into the canonical key
+    # min(u, v) << 32 | max(u, v), such that edge sets can be compared with
+    # the set operations of NumPy.
+    edges = np.asarray(edges, dtype=np.uint64).reshape(-1, 2)
+    if len(edges) > 0 and edges.max() >= 2**ID_BITS:
+        raise ValueError(f'Site IDs have to be smaller than 2^{ID_BITS}')
+    lower = np.minimum(edges[:, 0], edges[:, 1])
+    upper = np.maximum(edges[:, 0], edges[:, 1])
+    return np.unique((lower << np.uint64(ID_BITS)) | upper)
 
-def read_graph_from_file(file_path):
-    return nk.readGraph(str(file_path), nk.Format.EdgeListSpaceZero)
+
+def from_edge_keys(keys):
+    return (keys >> np.uint64(ID_BITS),
+            keys & np.uint64(2**ID_BITS - 1))
+
+
+def read_edges_from_file(file_path):
+    # Returns the sorted keys of the edges of a triangulation stored in a
+    # binary or a text file.
+    return to_edge_keys(read_array(file_path, dtype=np.uint64))
+
+
+def get_number_of_nodes(keys):
+    # As when reading the triangulations as edge lists, the nodes are the
+    # IDs from 0 to the largest ID of an edge.
+    if len(keys) == 0:
+        return 0
+    u, v = from_edge_keys(keys)
+    return int(max(u.max(), v.max())) + 1
+
+
+def get_number_of_connected_components(keys):
+    u, v = from_edge_keys(keys)
+    n = get_number_of_nodes(keys)
+    try:
+        import networkit as nk
+    except ImportError:
+        # NetworKit is optional, scipy is used without it.
+        from scipy.sparse import coo_matrix
+        from scipy.sparse.csgraph import connected_components
+        adjacency = coo_matrix((np.ones(len(keys)), (u, v)), shape=(n, n))
+        return connected_components(adjacency, directed=False)[0]
+
+    graph = nk.Graph(n)
+    for a, b in zip(u.tolist(), v.tolist()):
+        graph.addEdge(a, b)
+    cc = nk.components.ConnectedComponents(graph)
+    cc.run()
+    return cc.numberOfComponents()
+
+
+def covered_edges(keys1, keys2):
+    # Returns a tuple containing:
+    # % of edges in 1 that can also be found in 2
+    # Absolute number of edges that 1 has but 2 has not
+    # % of edges in 2 that can also be found in 1
+    # Absolute number of edges that 2 has but 1 has not
+    common = len(np.intersect1d(keys1, keys2, assume_unique=True))
+    return (float(common) / float(len(keys1)), len(keys1) - common,
+            float(common) / float(len(keys2)), len(keys2) - common)
 
 
 def get_native_precision_triangulation(name, results_directory):
     triangulations_path = Path(results_directory) / name / 'triangulations'
+    triangulation_files = get_files_sorted_by_precision(triangulations_path)
 
-    triangulation_files = sorted([
-        join(triangulations_path, f) for f in listdir(triangulations_path)
-        if isfile(join(triangulations_path, f))
-    ],
-                                 key=cmp_to_key(precision_sort))
-
-    return read_graph_from_file(triangulation_files[-1])
+    return read_edges_from_file(triangulation_files[-1])
 
 
 def get_native_triangulations(name, results_directory):
+    # Yields the triangulations one after another, from the lowest to the
+    # highest precision, so only one of them is kept in memory.
     triangulations_path = Path(results_directory) / name / 'triangulations'
+    triangulation_files = get_files_sorted_by_precision(triangulations_path)
 
-    triangulation_files = sorted([
-        join(triangulations_path, f) for f in listdir(triangulations_path)
-        if isfile(join(triangulations_path, f))
-    ],
-                                 key=cmp_to_key(precision_sort))
-
-    return [(get_precision_from_file_name(f), read_graph_from_file(f))
-            for f in triangulation_files]
+    for f in triangulation_files:
+        yield (get_precision_from_file_name(f), read_edges_from_file(f))
 
 
 def get_cgal_triangulation(name, results_directory):
     diagrams_path = Path(results_directory) / name / 'triangulations-cgal'
-    file_name = name + '-triangulation-cgal.txt'
-    file_path = diagrams_path / file_name
+    file_path = get_existing_file(diagrams_path / (name + '-triangulation-cgal'))
 
-    return read_graph_from_file(file_path)
+    return read_edges_from_file(file_path)
@@ -1,10 +1,14 @@
 # A utility to check whether triangulations are identical
+#
+# Only the results that changed since the last run are recomputed (see
+# aggregation.py).
 
 import argparse
 import sys
 
+from aggregation import aggregate
 from diagram_comparison import get_number_of_points_in_file
-from triangulation_comparison import get_triangulation_names, get_native_precision_triangulation, get_cgal_triangulation, get_native_triangulations
+from triangulation_comparison import covered_edges, get_native_precision_triangulation, get_cgal_triangulation, get_native_triangulations
 
 
 def main(argv):
@@ -19,38 +23,20 @@ def main(argv):
         '-o',
         '--output',
         help="Path to the directory where the result file should be stored.")
+    parser.add_argument(
+        '-j',
+        '--jobs',
+        type=int,
+        default=None,
+        help='Number of worker processes.  Defaults to the number of cores.')
     args = parser.parse_args(argv[1:])
 
-    csv = generate_csv_from_results(args.results)
-    write_csv_to_file(csv, args.output)
-
-
-def covered_edges(triangulation1, triangulation2):
-    # Returns a tuple containing:
-    # % of edges in 1 that can also be found in 2
-    # Absolute number of edges that 1 has but 2 has not
-    # % of edges in 2 that can also be found in 1
-    # Absolute number of edges that 2 has but 1 has not
-    edges_from_1_covered_by_2 = 0
-    edges_from_2_covered_by_1 = 0
-
-    edges_in_1 = 0
-    edges_in_2 = 0
-    for u, v in triangulation1.iterEdges():
-        edges_in_1 += 1
-
-        if triangulation2.hasEdge(u, v):
-            edges_from_1_covered_by_2 += 1
-
-    for u, v in triangulation2.iterEdges():
-        edges_in_2 += 1
-        if triangulation1.hasEdge(u, v):
-            edges_from_2_covered_by_1 += 1
-
-    return (float(edges_from_1_covered_by_2) / float(edges_in_1),
-            edges_in_1 - edges_from_1_covered_by_2,
-            float(edges_from_2_covered_by_1) / float(edges_in_2),
-            edges_in_2 - edges_from_2_covered_by_1)
+    aggregate(args.results,
+              args.output,
+              get_header(),
+              get_rows,
+              separator=',',
+              jobs=args.jobs)
 
 
 def get_rows_from_comparison_between(name, precision_triangulation,
@@ -100,34 +86,17 @@ def get_header():
     return header
 
 
-def generate_csv_from_results(results_directory):
-    header = get_header()
-    rows = []
-
-    triangulation_names = get_triangulation_names(results_directory)
-    for triangulation_name in triangulation_names:
-        triangulation_precise = get_native_precision_triangulation(
-            triangulation_name, results_directory)
-        triangulations_native = get_native_triangulations(
-            triangulation_name, results_directory)
-        triangulation_cgal = get_cgal_triangulation(triangulation_name,
-                                                    results_directory)
-        compare_rows = get_rows_from_comparison_between(
-            triangulation_name, triangulation_precise, triangulations_native,
-            triangulation_cgal)
-        rows += compare_rows
-
-    rows = sorted(rows, key=lambda x: (float(x[0]), int(x[1])))
-    rows = [[str(entry) for entry in row] for row in rows]
-
-    header_string = ','.join(header)
-    row_strings = [','.join(row) for row in rows]
-    return '\n'.join([header_string, *row_strings])
-
-
-def write_csv_to_file(csv, output_file):
-    with open(output_file, 'w') as csv_file:
-        csv_file.write(csv)
+def get_rows(triangulation_name, results_directory):
+    triangulation_precise = get_native_precision_triangulation(
+        triangulation_name, results_directory)
+    triangulations_native = get_native_triangulations(triangulation_name,
+                                                      results_directory)
+    triangulation_cgal = get_cgal_triangulation(triangulation_name,
+                                                results_directory)
+    return get_rows_from_comparison_between(triangulation_name,
+                                            triangulation_precise,
+                                            triangulations_native,
+                                            triangulation_cgal)
 
 
 if __name__ == '__main__':
@@ -4,8 +4,9 @@
 
 import sys
 import argparse
+import numpy as np
 
-from triangulation_comparison import read_graph_from_file
+from triangulation_comparison import read_edges_from_file, from_edge_keys
 
 
 def main(argv):
@@ -21,8 +22,8 @@ def main(argv):
                         help='Path to the second triangulation file.')
     args = parser.parse_args(argv[1:])
 
-    triangulation1 = read_graph_from_file(args.triangulation1)
-    triangulation2 = read_graph_from_file(args.triangulation2)
+    triangulation1 = read_edges_from_file(args.triangulation1)
+    triangulation2 = read_edges_from_file(args.triangulation2)
 
     coverage_2, coverage_1 = percent_of_covered_edges(triangulation1,
                                                       triangulation2)
@@ -30,29 +31,20 @@ def main(argv):
     print(f'1 covers {coverage_1 * 100.0}% of the edges in 2.')
 
 
+def print_missing_edges(keys1, keys2, name1, name2):
+    missing = np.setdiff1d(keys1, keys2, assume_unique=True)
+    for u, v in zip(*[ids.tolist() for ids in from_edge_keys(missing)]):
+        print(f'Edge {u} {v} appears in {name1} but not in {name2}.')
+
+
 def percent_of_covered_edges(triangulation1, triangulation2):
-    edges_from_1_covered_by_2 = 0
-    edges_from_2_covered_by_1 = 0
-
-    edges_in_1 = 0
-    edges_in_2 = 0
-    for u, v in triangulation1.iterEdges():
-        edges_in_1 += 1
-
-        if triangulation2.hasEdge(u, v):
-            edges_from_1_covered_by_2 += 1
-        else:
-            print(f'Edge {u} {v} appears in 1 but not in 2.')
-
-    for u, v in triangulation2.iterEdges():
-        edges_in_2 += 1
-        if triangulation1.hasEdge(u, v):
-            edges_from_2_covered_by_1 += 1
-        else:
-            print(f'Edge {u} {v} appears in 2 but not in 1.')
-
-    return (float(edges_from_1_covered_by_2) / float(edges_in_1),
-            float(edges_from_2_covered_by_1) / float(edges_in_2))
+    print_missing_edges(triangulation1, triangulation2, 1, 2)
+    print_missing_edges(triangulation2, triangulation1, 2, 1)
+
+    common = len(
+        np.intersect1d(triangulation1, triangulation2, assume_unique=True))
+    return (float(common) / float(len(triangulation1)),
+            float(common) / float(len(triangulation2)))
 
 
 if __name__ == '__main__':
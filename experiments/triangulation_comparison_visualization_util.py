@@ -2,9 +2,9 @@
 #
 # Usage:
 #   bazel run -c opt triangulation_comparison_visualization_util -- \
-#     --sites path/to/sites.txt
-#     --triangulation1 path/to/triangulation1.txt
-#     --triangulation2 path/to/triangulation2.txt
+#     --sites path/to/sites.bin
+#     --triangulation1 path/to/triangulation1.bin
+#     --triangulation2 path/to/triangulation2.bin
 #     --output_svg path/to/output/visualization.svg
 
 import argparse
@@ -13,6 +13,10 @@ import math
 import numpy as np
 import cairo
 
+import fortune_hyperbolic
+
+from diagram_comparison import read_array
+
 line_width = 0.0005
 point_radius = 0.0005
 offset = 0.5
@@ -45,36 +49,24 @@ def main(argv):
     args = parser.parse_args(argv[1:])
 
     sites = read_sites(args.sites)
-    triangulation1 = read_graph(args.triangulation1)
-    triangulation2 = read_graph(args.triangulation2)
+    triangulation1 = read_graph(args.triangulation1, len(sites))
+    triangulation2 = read_graph(args.triangulation2, len(sites))
     output_file_path = args.output_svg
     visualize_comparison(sites, triangulation1, triangulation2,
                          output_file_path)
 
 
-def add(adj, a, b):
-    if not a in adj.keys():
-        adj[a] = []
-    adj[a].append(b)
-
-
-def read_graph(filename):
-    adj = {}
-    with open(filename, 'r') as f:
-        for line in f:
-            a, b = [int(x) for x in line.split(' ')]
-            add(adj, a, b)
-            add(adj, b, a)
-    return adj
+def read_graph(filename, number_of_sites):
+    """Returns the (offsets, neighbors) arrays of the triangulation stored
+    in a file, with the neighbors of site u in
+    neighbors[offsets[u]:offsets[u + 1]]."""
+    return fortune_hyperbolic.delaunay_graph(
+        read_array(filename, dtype=np.uint64), number_of_sites)
 
 
 def read_sites(filename):
-    coordinates = []
-    with open(filename, 'r') as f:
-        for line in f:
-            theta, r = [float(x) for x in line.split(' ')]
-            coordinates.append([r * math.cos(theta), r * math.sin(theta)])
-    coordinates = np.array(coordinates)
+    theta, r = read_array(filename).T
+    coordinates = fortune_hyperbolic.to_cartesian(np.column_stack([r, theta]))
     max_val = np.max(coordinates.ravel()) + 0.3
     coordinates /= max_val
     return coordinates
@@ -100,15 +92,14 @@ def draw_edge(context, a, b, coordinates):
     context.stroke()
 
 
-def draw_edges(context, adj1, adj2, coordinates):
+def draw_edges(context, graph1, graph2, coordinates):
     context.set_line_width(line_width)
 
-    for u in adj1.keys():
-        set1 = set(adj1[u])
-        if u in adj2.keys():
-            set2 = set(adj2[u])
-        else:
-            set2 = set()
+    offsets1, neighbors1 = graph1
+    offsets2, neighbors2 = graph2
+    for u in range(len(offsets1) - 1):
+        set1 = set(neighbors1[offsets1[u]:offsets1[u + 1]].tolist())
+        set2 = set(neighbors2[offsets2[u]:offsets2[u + 1]].tolist())
 
         context.set_source_rgb(0.5, 0.5, 0.5)
         for v in set1.intersection(set2):
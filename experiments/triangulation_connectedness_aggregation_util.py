@@ -3,13 +3,16 @@
 #
 # Usage:
 #   bazel run -c opt triangulation_connectedness_aggregation_util -- --results path/to/results
+#
+# Only the results that changed since the last run are recomputed (see
+# aggregation.py).
 
 import argparse
 import sys
-import networkit as nk
 
+from aggregation import aggregate
 from diagram_comparison import get_number_of_points_in_file
-from triangulation_comparison import get_triangulation_names, get_native_precision_triangulation, get_cgal_triangulation
+from triangulation_comparison import get_native_precision_triangulation, get_cgal_triangulation, get_number_of_connected_components
 
 
 def main(argv):
@@ -22,16 +25,19 @@ def main(argv):
         '--results',
         help='Path to the results directory containing the triangluations.')
     parser.add_argument('-o', '--output', help="Path to the output CSV file.")
+    parser.add_argument(
+        '-j',
+        '--jobs',
+        type=int,
+        default=None,
+        help='Number of worker processes.  Defaults to the number of cores.')
     args = parser.parse_args(argv[1:])
 
-    csv = generate_csv_from_results(args.results)
-    write_csv_to_file(csv, args.output)
-
-
-def get_number_of_connected_components(graph):
-    cc = nk.components.ConnectedComponents(graph)
-    cc.run()
-    return cc.numberOfComponents()
+    aggregate(args.results,
+              args.output,
+              get_header(),
+              get_rows,
+              jobs=args.jobs)
 
 
 def get_row_from_comparison_between(name, native_triangulation,
@@ -56,32 +62,16 @@ def get_header():
     ]
 
 
-def generate_csv_from_results(results_directory):
-    header = get_header()
-    rows = []
-
-    triangulation_names = get_triangulation_names(results_directory)
-    for triangulation_name in triangulation_names:
-        triangulation_native = get_native_precision_triangulation(
-            triangulation_name, results_directory)
-        triangulation_cgal = get_cgal_triangulation(triangulation_name,
-                                                    results_directory)
-        row = get_row_from_comparison_between(triangulation_name,
-                                              triangulation_native,
-                                              triangulation_cgal)
-        rows.append(row)
-
-    rows = sorted(rows, key=lambda x: (float(x[0]), int(x[1])))
-    rows = [[str(entry) for entry in row] for row in rows]
-
-    header_string = ', '.join(header)
-    row_strings = [', '.join(row) for row in rows]
-    return '\n'.join([header_string, *row_strings])
-
-
-def write_csv_to_file(csv, output_file):
-    with open(output_file, 'w') as csv_file:
-        csv_file.write(csv)
+def get_rows(triangulation_name, results_directory):
+    triangulation_native = get_native_precision_triangulation(
+        triangulation_name, results_directory)
+    triangulation_cgal = get_cgal_triangulation(triangulation_name,
+                                                results_directory)
+    return [
+        get_row_from_comparison_between(triangulation_name,
+                                        triangulation_native,
+                                        triangulation_cgal)
+    ]
 
 
 if __name__ == '__main__':
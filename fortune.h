@@ -2,7 +2,6 @@
 
 #include <utility>
 #include <vector>
-#include <queue>
 #include <memory>
 #include <type_traits>
 
@@ -10,21 +9,28 @@
 #include "datastructures.h"
 #include "beachline.h"
 #include "kernels.h"
+#include "arena.h"
+#include "sorting.h"
 
-using std::vector, std::make_unique, std::make_shared, std::to_string;
+using std::vector, std::to_string;
 
 namespace hyperbolic {
     /**
      * Main class that implements the algorithm. Requires a kernel K and a floating point type _float_T to use.
-     * The kernel floating point type must match _float_T
+     * The kernel floating point type must match _float_T. If collectStatistics is set, the events, the evaluations of
+     * the predicates and the time spent in the phases of the sweep are recorded (see getStatistics()). Otherwise, the
+     * instrumentation is compiled away
      * */
-    template<class K, typename _float_T>
+    template<class K, typename _float_T, bool collectStatistics = false> requires Kernel<K, _float_T>
     class FortuneHyperbolicImplementation {
     private:
+            using Timer = PhaseTimer<collectStatistics>;
+
             bool verbose;
 
             K kernel;
-            BeachLine<K, _float_T> beachLine;
+            SweepStatistics statistics;
+            BeachLine<K, _float_T, collectStatistics> beachLine;
             _float_T r_sweep;
 
             using pBeachLineElement = BeachLineElement<_float_T>*;
@@ -32,35 +38,51 @@ namespace hyperbolic {
             using rSite = Site<_float_T>&;
             using pSite = Site<_float_T>*;
 
-            EventQueue<SiteEvent<_float_T>, _float_T> siteEventQueue;
+            // all beach line elements and circle events are owned by these arenas and released when the computation ends
+            Arena<BeachLineElement<_float_T>> beachLineElements;
+            Arena<CircleEvent<_float_T>> circleEvents;
+
             EventQueue<CircleEvent<_float_T>, _float_T> circleEventQueue;
 
+            // the sites sorted by increasing radius. Since all site events are known in advance, they are processed in
+            // this order, with nextSite being the index of the next site event
             vector<Site<_float_T>> sites;
+            size_t nextSite = 0;
             VoronoiDiagram& voronoiDiagram;
 
             bool isCalculated = false;
 
             bool eventsRemaining() {
-                return !(siteEventQueue.empty() && circleEventQueue.empty());
+                return nextSite < sites.size() || !circleEventQueue.empty();
             };
 
-            static void invalidateCircleEvent(CircleEvent<_float_T>* e){
-                if (e) e->invalidate();
+            void invalidateCircleEvent(CircleEvent<_float_T>* e){
+                Timer timer(statistics.queueNanoseconds);
+                // events removed by a compaction are never handled, so their sites are released here
+                circleEventQueue.invalidate(e, [this](const CircleEvent<_float_T>& removed) {
+                    kernel.release_circle_event(removed.first.first, removed.first.second, removed.second.second);
+                });
             }
 
             /**
              * method that predicts and assigns new circle events
              * */
             void addCircleEvent(rBeachLineElement first, rBeachLineElement second) {
-                invalidateCircleEvent(first.next.get());
-                invalidateCircleEvent(second.previous.get());
+                invalidateCircleEvent(first.next);
+                invalidateCircleEvent(second.previous);
                 Point<_float_T> centerCircleEvent;
-                if (kernel.predict_circle_event(centerCircleEvent, first.first, first.second, second.second)) {
-                    _float_T radius = distance<_float_T>(centerCircleEvent, first.first.point);
-                    shared_ptr<CircleEvent<_float_T>> ce = make_shared<CircleEvent<_float_T>>(first, second, centerCircleEvent, radius);
-                    if (ce->r >= r_sweep) {
+                bool predicted;
+                {
+                    Timer timer(statistics.predictionNanoseconds);
+                    predicted = kernel.predict_circle_event(centerCircleEvent, first.first, first.second, second.second);
+                }
+                if (predicted) {
+                    _float_T radius = distance<_float_T>(centerCircleEvent, first.first);
+                    if (radius + centerCircleEvent.r >= r_sweep) {
+                        CircleEvent<_float_T>* ce = circleEvents.create(first, second, centerCircleEvent, radius);
                         first.next = ce;
                         second.previous = ce;
+                        Timer timer(statistics.queueNanoseconds);
                         circleEventQueue.push(ce);
                     }
                 }
@@ -70,40 +92,44 @@ namespace hyperbolic {
              * Initializes the first elements in the beach line.
              * */
             void initializeBeachLine() {
-                rSite a = siteEventQueue.top()->site;
-                siteEventQueue.pop();
-                rSite b = siteEventQueue.top()->site;
-                siteEventQueue.pop();
+                rSite a = sites[nextSite++];
+                rSite b = sites[nextSite++];
                 r_sweep = b.point.r;
 
-                Edge* edge = getNewEdge(b, a, EdgeType::BIDIRECTIONAL);
-                auto first = new BeachLineElement<_float_T>(b, a, edge, edge->firstVertex);
-                auto last = new BeachLineElement<_float_T>(a, b, edge, edge->secondVertex);
-                beachLine.insert(0, *first, *last);
+                size_t edge = voronoiDiagram.addEdge(b.ID, a.ID, EdgeType::BIDIRECTIONAL);
+                auto first = beachLineElements.create(b, a, edge, 0);
+                auto last = beachLineElements.create(a, b, edge, 1);
+                beachLine.insert(nullptr, *first, *last);
+                if constexpr (collectStatistics) statistics.siteEvents += 2;
             };
 
             /**
              * Called when a site event is handled.
              * */
-            void handleSiteEvent(const SiteEvent<_float_T>& e) {
+            void handleSiteEvent(rSite site) {
 #ifndef NDEBUG
                 if (verbose)
-                    std::cout << "Handling Site Event with radius " << e.r << std::endl;
+                    std::cout << "Handling Site Event with radius " << site.point.r << std::endl;
 #endif
-                r_sweep = e.r;
+                r_sweep = site.point.r;
+                if constexpr (collectStatistics) statistics.siteEvents++;
 
                 pBeachLineElement first, second;
-                int positionFirst = beachLine.search(e.site.point, e.r, first, second);
+                {
+                    Timer timer(statistics.searchNanoseconds);
+                    beachLine.search(site.point, r_sweep, first, second);
+                }
                 rSite hitSite = first->second;
 
-                Edge* edge = getNewEdge(e.site, hitSite, EdgeType::BIDIRECTIONAL);
-                auto firstNew = new BeachLineElement<_float_T>(e.site, hitSite, edge, edge->firstVertex);
-                auto secondNew = new BeachLineElement<_float_T>(hitSite, e.site, edge, edge->secondVertex);
+                size_t edge = voronoiDiagram.addEdge(site.ID, hitSite.ID, EdgeType::BIDIRECTIONAL);
+                auto firstNew = beachLineElements.create(site, hitSite, edge, 0);
+                auto secondNew = beachLineElements.create(hitSite, site, edge, 1);
 
                 addCircleEvent(*first, *secondNew);
                 addCircleEvent(*firstNew, *second);
 
-                beachLine.insert(positionFirst, *firstNew, *secondNew);
+                Timer timer(statistics.treapNanoseconds);
+                beachLine.insert(first, *firstNew, *secondNew);
             };
 
             /**
@@ -121,35 +147,36 @@ namespace hyperbolic {
                 }
 #endif
 
-                if (!e.isValid()) return;
+                // the sites of the event are never predicted again since the sweep circle passed the event
+                kernel.release_circle_event(e.first.first, e.first.second, e.second.second);
+
+                if (!e.isValid()) {
+                    if constexpr (collectStatistics) statistics.invalidCircleEvents++;
+                    return;
+                }
+                if constexpr (collectStatistics) statistics.circleEvents++;
                 r_sweep = e.r;
-                Point<double>* v = getNewVertex(e.center);
+                size_t v = voronoiDiagram.addVertex(static_cast<Point<double>>(e.center));
 
-                e.first.assignVertex(*v);
-                e.second.assignVertex(*v);
+                voronoiDiagram.setEdgeVertex(e.first.edge, e.first.edgeEnd, v);
+                voronoiDiagram.setEdgeVertex(e.second.edge, e.second.edgeEnd, v);
 
                 // replace first and second with new beach line element
                 rSite a = e.first.first, b = e.second.second;
-                Edge* edge = getNewEdge(a, b, (a.point.r >= b.point.r) ? EdgeType::CCW : EdgeType::CW);
-                edge->firstVertex = v;
-                auto newElement = new BeachLineElement(a, b, edge, edge->secondVertex);
+                size_t edge = voronoiDiagram.addEdge(a.ID, b.ID, (a.point.r >= b.point.r) ? EdgeType::CCW : EdgeType::CW);
+                voronoiDiagram.setEdgeVertex(edge, 0, v);
+                auto newElement = beachLineElements.create(a, b, edge, 1);
 
                 pBeachLineElement leftNeighbor, rightNeighbor;
-                beachLine.replace(e, *newElement, leftNeighbor, rightNeighbor);
+                {
+                    Timer timer(statistics.treapNanoseconds);
+                    beachLine.replace(e, *newElement, leftNeighbor, rightNeighbor);
+                }
 
                 // predict new circle events
                 addCircleEvent(*leftNeighbor, *newElement);
                 addCircleEvent(*newElement, *rightNeighbor);
             };
-
-            Edge* getNewEdge(rSite a, rSite b, EdgeType edgeType) {
-                voronoiDiagram.edges.emplace_back(make_unique<Edge>(static_cast<Site<double>>(a), static_cast<Site<double>>(b), edgeType));
-                return voronoiDiagram.edges.back().get();
-            };
-            Point<double>* getNewVertex(const Point<_float_T>& p) {
-                voronoiDiagram.vertices.push_back(make_unique<Point<double>>(p));
-                return voronoiDiagram.vertices.back().get();
-            };
         public:
             /**
              * Instantiate the class.
@@ -157,16 +184,55 @@ namespace hyperbolic {
              * @param v Reference to the Voronoi Diagram to be computed
              * @param sites A vector of sites used as input
              * @param verbose Whether to print the beach line in each iteration or not
+             * @param memoryMode How beach line elements and events are allocated
+             * @param seed Seed for the priorities of the beach line treap. Identical seeds yield identical treap shapes
              */
-            FortuneHyperbolicImplementation(VoronoiDiagram& v, const vector<Point<double>>& sites, bool verbose=false) : verbose(verbose), beachLine(kernel), voronoiDiagram(v) {
-                unsigned long long id = 0;
-                for (const Point<double>& p : sites) {
-                    this->sites.emplace_back(Site<_float_T>(Point<_float_T>(p.r, p.theta), id));
-                    id++;
-                }
+            FortuneHyperbolicImplementation(VoronoiDiagram& v, const vector<Point<double>>& sites, bool verbose=false,
+                                            MemoryMode memoryMode=MemoryMode::ARENA, uint64_t seed=DEFAULT_PRIORITY_SEED)
+                    : verbose(verbose), beachLine(kernel, seed, &statistics), beachLineElements(memoryMode), circleEvents(memoryMode), voronoiDiagram(v) {
+                // the radii are sorted in double precision, which yields the same order as _float_T since every double
+                // is represented exactly. The ID of a site is its index in the input
+                vector<double> radii(sites.size());
+                for (size_t i = 0; i < sites.size(); i++)
+                    radii[i] = sites[i].r;
+
+                this->sites.reserve(sites.size());
+                for (size_t id : get_sorted_order(radii))
+                    this->sites.emplace_back(Point<_float_T>(sites[id].r, sites[id].theta), id);
                 r_sweep = 0;
             };
 
+            // gives access to the kernel, e.g., for configuring it before the diagram is calculated
+            K& getKernel() {
+                return kernel;
+            }
+
+            // configures when the circle event queue is compacted (see EventQueue). Must be called before calculate()
+            void setCompaction(double threshold, size_t minimumSize) {
+                circleEventQueue = EventQueue<CircleEvent<_float_T>, _float_T>(threshold, minimumSize);
+            }
+
+            // selects where the searches in the beach line start (see SearchMode)
+            void setSearchMode(SearchMode mode) {
+                beachLine.setSearchMode(mode);
+            }
+
+            // counters of the circle event queue, e.g., how many circle events were invalidated and skipped
+            [[nodiscard]] const EventQueueStatistics& getCircleEventStatistics() const {
+                return circleEventQueue.getStatistics();
+            }
+
+            // statistics of the sweep, including the counters of the circle event queue and of the kernel's cache
+            [[nodiscard]] SweepStatistics getStatistics() const requires collectStatistics {
+                SweepStatistics result = statistics;
+                result.circleEventQueue = circleEventQueue.getStatistics();
+                if constexpr (requires { kernel.getCacheStatistics(); }) {
+                    result.cacheHits = kernel.getCacheStatistics().hits;
+                    result.cacheMisses = kernel.getCacheStatistics().misses;
+                }
+                return result;
+            }
+
             /**
              * calculates the Voronoi diagram.
              * */
@@ -176,25 +242,27 @@ namespace hyperbolic {
 
                 if (sites.size() <= 1) return;
 
-                for (rSite s : sites) {
-                    siteEventQueue.push(make_shared<SiteEvent<_float_T>>(s));
-                }
-
+                Timer timer(statistics.totalNanoseconds);
                 initializeBeachLine();
 #ifndef NDEBUG
                 if (verbose) beachLine.print(r_sweep);
 #endif
 
                 while (eventsRemaining()) {
-                    const SiteEvent<_float_T>* se = siteEventQueue.getTop();
                     const CircleEvent<_float_T>* ce = circleEventQueue.getTop();
 
-                    if (!ce || (se && CmpEvent<Event<_float_T>, _float_T>::greater_equal(ce, se))) {
-                        handleSiteEvent(*se);
-                        siteEventQueue.pop();
+                    // circle events are handled first unless the next site event has a strictly smaller radius
+                    if (!ce || (nextSite < sites.size() && ce->r > sites[nextSite].point.r)) {
+                        handleSiteEvent(sites[nextSite]);
+                        nextSite++;
                     } else {
+                        // the event is popped before it is handled, since handling it may compact the queue, which
+                        // can move another event with the same radius to the top. The arena keeps the event alive
+                        {
+                            Timer timer(statistics.queueNanoseconds);
+                            circleEventQueue.pop();
+                        }
                         handleCircleEvent(*ce);
-                        circleEventQueue.pop();
                     }
 
 #ifndef NDEBUG
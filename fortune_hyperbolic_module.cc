@@ -0,0 +1,410 @@
+#include <pybind11/pybind11.h>
+#include <pybind11/numpy.h>
+#include <pybind11/stl.h>
+
+#include <algorithm>
+#include <cstdint>
+#include <string>
+#include <utility>
+#include <vector>
+
+#include "geometry.h"
+#include "kernels.h"
+#include "fortune.h"
+#include "batch.h"
+#include "batch_geometry.h"
+#include "nearest_site.h"
+#include "topology.h"
+
+namespace py = pybind11;
+using namespace hyperbolic;
+
+namespace {
+    using Array = py::array_t<double, py::array::c_style | py::array::forcecast>;
+    using IdArray = py::array_t<uint64_t, py::array::c_style | py::array::forcecast>;
+    using IndexArray = py::array_t<int64_t, py::array::c_style | py::array::forcecast>;
+
+    /**
+     * hands the buffer of a vector over to NumPy. The vector is moved to the heap and released by the capsule
+     * once the array is garbage collected, so the data is never copied.
+     * */
+    template<typename T>
+    py::array_t<T> to_array(vector<T>&& data, vector<py::ssize_t> shape) {
+        auto* buffer = new vector<T>(std::move(data));
+        py::capsule owner(buffer, [](void* p) { delete reinterpret_cast<vector<T>*>(p); });
+        return py::array_t<T>(std::move(shape), buffer->data(), owner);
+    }
+
+    // reads an (N,2) array of (r, theta) coordinates
+    vector<Point<double>> to_sites(const Array& sites) {
+        if (sites.ndim() != 2 || sites.shape(1) != 2)
+            throw py::value_error("sites must be an array of shape (N, 2) holding (r, theta) coordinates");
+
+        auto view = sites.unchecked<2>();
+        vector<Point<double>> result;
+        result.reserve(view.shape(0));
+        for (py::ssize_t i = 0; i < view.shape(0); i++)
+            result.emplace_back(view(i, 0), view(i, 1));
+        return result;
+    }
+
+    /**
+     * hands the arrays of a computed diagram over to NumPy as a tuple (vertices, edges) or, if topology is set,
+     * (vertices, edges, edge_vertices, edge_types)
+     * */
+    py::tuple to_result(VoronoiDiagram&& v, bool topology) {
+        auto numberOfVertices = static_cast<py::ssize_t>(v.numberOfVertices());
+        auto numberOfEdges = static_cast<py::ssize_t>(v.numberOfEdges());
+        py::array vertices = to_array(std::move(v.vertexCoordinates), {numberOfVertices, 2});
+        py::array edges = to_array(std::move(v.edgeSites), {numberOfEdges, 2});
+        if (!topology)
+            return py::make_tuple(vertices, edges);
+        return py::make_tuple(vertices, edges, to_array(std::move(v.edgeVertices), {numberOfEdges, 2}),
+                              to_array(std::move(v.edgeTypes), {numberOfEdges}));
+    }
+
+    /**
+     * the shape of an array whose last dimension holds the coordinates of points, with that dimension replaced by
+     * result_dimension values per point, or removed if result_dimension is 0
+     * */
+    vector<py::ssize_t> point_shape(const Array& points, py::ssize_t dimension, py::ssize_t result_dimension,
+                                    const char* name) {
+        if (points.ndim() < 1 || points.shape(points.ndim() - 1) != dimension)
+            throw py::value_error(std::string(name) + " must be an array whose last dimension has size " +
+                                  std::to_string(dimension));
+        vector<py::ssize_t> shape(points.shape(), points.shape() + points.ndim());
+        shape.pop_back();
+        if (result_dimension > 0) shape.push_back(result_dimension);
+        return shape;
+    }
+
+    /**
+     * applies a batch function that maps every point of an array of shape (..., dimension) to result_dimension
+     * values, returning an array of shape (..., result_dimension)
+     * */
+    template<class F>
+    Array map_points(const Array& points, py::ssize_t dimension, py::ssize_t result_dimension, const char* name, F&& f) {
+        Array result(point_shape(points, dimension, result_dimension, name));
+        auto n = static_cast<size_t>(points.size() / dimension);
+        const double* input = points.data();
+        double* output = result.mutable_data();
+        {
+            py::gil_scoped_release release;
+            f(input, output, n);
+        }
+        return result;
+    }
+
+    /**
+     * applies a batch function to pairs of (r, theta) points. Either both arrays have the same shape (..., 2), or one
+     * of them holds a single point that is paired with every point of the other one
+     * */
+    template<class F>
+    Array map_point_pairs(const Array& a, const Array& b, py::ssize_t result_dimension, F&& f) {
+        point_shape(a, 2, result_dimension, "a");
+        point_shape(b, 2, result_dimension, "b");
+        bool single_a = a.size() == 2, single_b = b.size() == 2;
+        if (!single_a && !single_b &&
+            (a.ndim() != b.ndim() || !std::equal(a.shape(), a.shape() + a.ndim(), b.shape())))
+            throw py::value_error("a and b must have the same shape or hold a single point");
+
+        const Array& larger = (single_a && !single_b) ? b : a;
+        Array result(point_shape(larger, 2, result_dimension, "a"));
+        auto n = static_cast<size_t>(larger.size() / 2);
+        const double* first = a.data();
+        const double* second = b.data();
+        double* output = result.mutable_data();
+        {
+            py::gil_scoped_release release;
+            // a single point is repeated, so that the batch function still runs over contiguous buffers
+            vector<double> repeated;
+            if (single_a != single_b) {
+                const double* single = single_a ? first : second;
+                repeated.resize(2 * n);
+                for (size_t i = 0; i < n; i++) {
+                    repeated[2 * i] = single[0];
+                    repeated[2 * i + 1] = single[1];
+                }
+                if (single_a) first = repeated.data();
+                else second = repeated.data();
+            }
+            f(first, second, output, n);
+        }
+        return result;
+    }
+
+    // checks that an array has the shape (rows, columns), where rows < 0 allows any number of rows
+    template<class A>
+    void check_shape(const A& array, py::ssize_t rows, py::ssize_t columns, const char* name) {
+        if (array.ndim() != 2 || (rows >= 0 && array.shape(0) != rows) || array.shape(1) != columns)
+            throw py::value_error(std::string(name) + " must be an array of shape (" +
+                                  (rows >= 0 ? std::to_string(rows) : std::string("N")) + ", " +
+                                  std::to_string(columns) + ")");
+    }
+
+    // checks that all IDs in an array are smaller than n
+    void check_ids(const IdArray& ids, uint64_t n, const char* name) {
+        const uint64_t* data = ids.data();
+        if (std::any_of(data, data + ids.size(), [n](uint64_t id) { return id >= n; }))
+            throw py::value_error(std::string(name) + " holds IDs that are not smaller than " + std::to_string(n));
+    }
+
+    py::tuple delaunay_graph_arrays(const IdArray& edges, uint64_t numberOfSites) {
+        check_shape(edges, -1, 2, "edges");
+        check_ids(edges, numberOfSites, "edges");
+        DelaunayGraph graph;
+        {
+            py::gil_scoped_release release;
+            graph = delaunay_graph(edges.data(), edges.shape(0), numberOfSites);
+        }
+        auto numberOfNeighbors = static_cast<py::ssize_t>(graph.neighbors.size());
+        return py::make_tuple(to_array(std::move(graph.offsets), {static_cast<py::ssize_t>(numberOfSites) + 1}),
+                              to_array(std::move(graph.neighbors), {numberOfNeighbors}));
+    }
+
+    py::tuple voronoi_cell_arrays(const Array& sites, const Array& vertices, const IdArray& edges,
+                            const IndexArray& edgeVertices) {
+        check_shape(sites, -1, 2, "sites");
+        check_shape(vertices, -1, 2, "vertices");
+        check_shape(edges, -1, 2, "edges");
+        check_shape(edgeVertices, edges.shape(0), 2, "edge_vertices");
+        check_ids(edges, sites.shape(0), "edges");
+        const int64_t* indices = edgeVertices.data();
+        if (std::any_of(indices, indices + edgeVertices.size(), [&](int64_t i) {
+            return i < VoronoiDiagram::NO_VERTEX || i >= vertices.shape(0);
+        }))
+            throw py::value_error("edge_vertices holds indices that are not rows of vertices or -1");
+
+        VoronoiCells cells;
+        {
+            py::gil_scoped_release release;
+            cells = voronoi_cells(sites.data(), sites.shape(0), vertices.data(), vertices.shape(0),
+                                              edges.data(), edgeVertices.data(), edges.shape(0));
+        }
+        auto numberOfSites = static_cast<py::ssize_t>(sites.shape(0));
+        auto length = static_cast<py::ssize_t>(cells.edges.size());
+        return py::make_tuple(to_array(std::move(cells.offsets), {numberOfSites + 1}),
+                              to_array(std::move(cells.edges), {length}),
+                              to_array(std::move(cells.vertices), {length}));
+    }
+
+    NearestSiteIndex nearest_site_index(const Array& sites, const IdArray& edges) {
+        check_shape(sites, -1, 2, "sites");
+        check_shape(edges, -1, 2, "edges");
+        check_ids(edges, sites.shape(0), "edges");
+        py::gil_scoped_release release;
+        return NearestSiteIndex(sites.data(), sites.shape(0), edges.data(), edges.shape(0));
+    }
+
+    py::array_t<uint64_t> nearest_sites(const NearestSiteIndex& index, const Array& queries, unsigned int threads) {
+        py::array_t<uint64_t> result(point_shape(queries, 2, 0, "queries"));
+        auto n = static_cast<size_t>(queries.size() / 2);
+        if (n > 0 && index.numberOfSites() == 0)
+            throw py::value_error("the index holds no sites");
+        const double* input = queries.data();
+        uint64_t* output = result.mutable_data();
+        {
+            py::gil_scoped_release release;
+            index.nearest(input, output, n, threads);
+        }
+        return result;
+    }
+
+    py::tuple compute_diagram(const Array& sites, uint64_t seed, bool topology) {
+        vector<Point<double>> points = to_sites(sites);
+
+        VoronoiDiagram v;
+        {
+            py::gil_scoped_release release;
+            FortuneHyperbolicImplementation<FullNativeKernel<double>, double> fortune(v, points, false, MemoryMode::ARENA, seed);
+            fortune.calculate();
+        }
+        return to_result(std::move(v), topology);
+    }
+
+    py::list compute_diagrams(const vector<Array>& site_sets, unsigned int threads, uint64_t seed, bool topology) {
+        vector<vector<Point<double>>> points;
+        points.reserve(site_sets.size());
+        for (const Array& sites : site_sets)
+            points.push_back(to_sites(sites));
+
+        vector<VoronoiDiagram> diagrams;
+        {
+            py::gil_scoped_release release;
+            calculate_diagrams<FullNativeKernel<double>, double>(points, diagrams, threads, false, seed);
+        }
+
+        py::list result;
+        for (VoronoiDiagram& v : diagrams)
+            result.append(to_result(std::move(v), topology));
+        return result;
+    }
+}
+
+PYBIND11_MODULE(fortune_hyperbolic, m) {
+    m.doc() = "Hyperbolic Voronoi diagrams and Delaunay triangulations computed with Fortune's Algorithm.";
+
+    m.def("compute_diagram", &compute_diagram, py::arg("sites"), py::arg("seed") = DEFAULT_PRIORITY_SEED,
+          py::arg("topology") = false,
+          R"(Computes the Voronoi diagram of a set of sites using double precision.
+
+Args:
+    sites: array of shape (N, 2) holding the polar coordinates (r, theta) of the sites.
+    seed: seed for the priorities of the beach line treap.
+    topology: whether to also return the vertices and the types of the Voronoi edges.
+
+Returns:
+    A tuple (vertices, edges). vertices is a float64 array of shape (V, 2) holding the
+    (r, theta) coordinates of the Voronoi vertices. edges is a uint64 array of shape (E, 2)
+    holding the IDs (row indices in sites) of the sites connected by Delaunay edges.
+    Row i of edges is the Delaunay edge dual to the Voronoi edge i. If topology is set, the
+    tuple additionally holds edge_vertices, an int64 array of shape (E, 2) holding the row
+    indices in vertices of the end points of the Voronoi edges (-1 for ends without a
+    vertex), and edge_types, a uint8 array of shape (E,) holding 0 (CCW), 1 (CW) or
+    2 (BIDIRECTIONAL). All arrays wrap the memory of the computed diagram.)");
+
+    m.def("compute_diagrams", &compute_diagrams, py::arg("site_sets"), py::arg("threads") = 0,
+          py::arg("seed") = DEFAULT_PRIORITY_SEED, py::arg("topology") = false,
+          R"(Computes the Voronoi diagrams of many independent sets of sites on a pool of worker threads.
+
+Each diagram is computed by its own instance of the algorithm, so no state is shared between the workers.
+
+Args:
+    site_sets: list of arrays of shape (N_i, 2), each holding the (r, theta) coordinates of one set of sites.
+    threads: the number of worker threads. 0 uses one worker per hardware thread.
+    seed: seed for the priorities of the beach line treaps.
+    topology: whether to also return the vertices and the types of the Voronoi edges.
+
+Returns:
+    A list holding one tuple per site set, as returned by compute_diagram.)");
+
+    m.def("delaunay_graph", &delaunay_graph_arrays, py::arg("edges"), py::arg("number_of_sites"),
+          R"(Builds the Delaunay graph in compressed sparse row format.
+
+Args:
+    edges: uint64 array of shape (E, 2) holding the IDs of the sites connected by an edge, as returned by
+        compute_diagram or stored in a triangulation file.
+    number_of_sites: the number of sites N. All IDs must be smaller.
+
+Returns:
+    A tuple (offsets, neighbors) of uint64 arrays of shapes (N + 1,) and (offsets[N],). The neighbors of
+    site i are neighbors[offsets[i]:offsets[i + 1]], sorted by ID and without duplicates.)");
+
+    m.def("voronoi_cells", &voronoi_cell_arrays, py::arg("sites"), py::arg("vertices"), py::arg("edges"),
+          py::arg("edge_vertices"),
+          R"(Orders the edges of every Voronoi cell along its boundary.
+
+Args:
+    sites: array of shape (N, 2) holding the (r, theta) coordinates of the sites.
+    vertices, edges, edge_vertices: the arrays returned by compute_diagram with topology=True.
+
+Returns:
+    A tuple (offsets, cell_edges, cell_vertices). offsets is a uint64 array of shape (N + 1,), the others
+    have shape (2E,). The boundary of the cell of site i consists of the edges (row indices in edges)
+    cell_edges[offsets[i]:offsets[i + 1]] in counterclockwise order, and the edge at position k ends at the
+    vertex cell_vertices[k], where the edge at position k + 1 (or the first edge of the cell) begins. The
+    boundary of an unbounded cell consists of one or more chains of edges, each of which begins and ends
+    at -1.)");
+
+    py::class_<NearestSiteIndex>(m, "NearestSiteIndex",
+          R"(Answers nearest site queries by walking along the Delaunay graph from a seed site of the
+angular sector of the query.)")
+        .def(py::init(&nearest_site_index), py::arg("sites"), py::arg("edges"),
+             R"(Builds the index of a set of sites.
+
+Args:
+    sites: array of shape (N, 2) holding the (r, theta) coordinates of the sites.
+    edges: uint64 array of shape (E, 2) holding the IDs of the sites connected by an edge, as returned by
+        compute_diagram.)")
+        .def("nearest_sites", &nearest_sites, py::arg("queries"), py::arg("threads") = 0,
+             R"(Finds the sites closest to query points on a pool of worker threads.
+
+Args:
+    queries: array of shape (..., 2) holding (r, theta) coordinates.
+    threads: the number of worker threads. 0 uses one worker per hardware thread.
+
+Returns:
+    A uint64 array of shape (...) holding the ID of a site closest to each query point.)")
+        .def_property_readonly("number_of_sites", &NearestSiteIndex::numberOfSites);
+
+    m.def("distance", [](const Array& a, const Array& b) {
+        return map_point_pairs(a, b, 0, [](const double* first, const double* second, double* result, size_t n) {
+            batch_distance(first, second, result, n);
+        });
+    }, py::arg("a"), py::arg("b"),
+          R"(Computes the hyperbolic distances between pairs of points.
+
+Args:
+    a, b: arrays of shape (..., 2) holding (r, theta) coordinates. Both have the same shape, or one of them
+        holds a single point that is paired with every point of the other one.
+
+Returns:
+    An array of shape (...) holding the distance of each pair.)");
+
+    m.def("geodesic_midpoint", [](const Array& a, const Array& b) {
+        return map_point_pairs(a, b, 2, batch_geodesic_midpoint);
+    }, py::arg("a"), py::arg("b"),
+          R"(Computes the midpoints of the geodesics between pairs of points.
+
+Args:
+    a, b: arrays of shape (..., 2) holding (r, theta) coordinates, paired as in distance.
+
+Returns:
+    An array of shape (..., 2) holding the (r, theta) coordinates of the midpoints.)");
+
+    m.def("translate", [](const Array& points, double d) {
+        return map_points(points, 2, 2, "points", [d](const double* input, double* result, size_t n) {
+            batch_translate(input, d, result, n);
+        });
+    }, py::arg("points"), py::arg("d"),
+          R"(Translates points by the distance d along the x-axis.
+
+Args:
+    points: array of shape (..., 2) holding (r, theta) coordinates.
+    d: the distance. Positive distances move the origin towards the angle 0.
+
+Returns:
+    An array of the same shape holding the translated points.)");
+
+    m.def("rotate", [](const Array& points, double angle) {
+        return map_points(points, 2, 2, "points", [angle](const double* input, double* result, size_t n) {
+            batch_rotate(input, angle, result, n);
+        });
+    }, py::arg("points"), py::arg("angle"),
+          R"(Rotates points around the origin.
+
+Args:
+    points: array of shape (..., 2) holding (r, theta) coordinates.
+    angle: the angle of the rotation. The resulting angles are in [0, 2*pi).
+
+Returns:
+    An array of the same shape holding the rotated points.)");
+
+    m.def("to_hyperboloid", [](const Array& points) {
+        return map_points(points, 2, 3, "points", batch_to_hyperboloid);
+    }, py::arg("points"),
+          R"(Converts (r, theta) coordinates of shape (..., 2) to (x, y, z) coordinates in the hyperboloid model
+of shape (..., 3).)");
+
+    m.def("from_hyperboloid", [](const Array& coordinates) {
+        return map_points(coordinates, 3, 2, "coordinates", batch_from_hyperboloid);
+    }, py::arg("coordinates"),
+          R"(Converts (x, y, z) coordinates in the hyperboloid model of shape (..., 3) to (r, theta) coordinates
+of shape (..., 2).)");
+
+    m.def("to_poincare", [](const Array& points) {
+        return map_points(points, 2, 2, "points", batch_to_poincare);
+    }, py::arg("points"),
+          R"(Converts (r, theta) coordinates of shape (..., 2) to (x, y) coordinates in the Poincare disk.)");
+
+    m.def("from_poincare", [](const Array& coordinates) {
+        return map_points(coordinates, 2, 2, "coordinates", batch_from_poincare);
+    }, py::arg("coordinates"),
+          R"(Converts (x, y) coordinates in the Poincare disk of shape (..., 2) to (r, theta) coordinates.)");
+
+    m.def("to_cartesian", [](const Array& points) {
+        return map_points(points, 2, 2, "points", batch_to_cartesian);
+    }, py::arg("points"),
+          R"(Converts (r, theta) coordinates of shape (..., 2) to (x, y) coordinates of the native
+representation, in which the Euclidean distance of a point to the origin is its hyperbolic one.)");
+}
@@ -3,9 +3,11 @@
 #include "beachline.h"
 #include "kernels.h"
 #include "fortune.h"
+#include "batch.h"
 
 #include <vector>
 #include <memory>
+#include <random>
 
 using std::shared_ptr, std::make_shared;
 using namespace hyperbolic;
@@ -21,14 +23,188 @@ TEST(VoronoiTest, ComputesCorrectly) {
     FortuneHyperbolicImplementation<FullNativeKernel<double>, double>fortune(v, sites);
     fortune.calculate();
 
-    EXPECT_EQ(3, v.edges.size());
+    EXPECT_EQ(3, v.numberOfEdges());
 
-    EXPECT_EQ(0, v.edges[0]->siteA.ID);
-    EXPECT_EQ(1, v.edges[0]->siteB.ID);
+    EXPECT_EQ(0, v.edgeSites[0]);
+    EXPECT_EQ(1, v.edgeSites[1]);
 
-    EXPECT_EQ(2, v.edges[1]->siteA.ID);
-    EXPECT_EQ(1, v.edges[1]->siteB.ID);
+    EXPECT_EQ(2, v.edgeSites[2]);
+    EXPECT_EQ(1, v.edgeSites[3]);
 
-    EXPECT_EQ(3, v.edges[2]->siteA.ID);
-    EXPECT_EQ(1, v.edges[2]->siteB.ID);
+    EXPECT_EQ(3, v.edgeSites[4]);
+    EXPECT_EQ(1, v.edgeSites[5]);
+}
+
+TEST(VoronoiTest, EdgesReferenceTheirVertices) {
+    std::mt19937 rng(7);
+    std::uniform_real_distribution<double> uniform(0.0, 1.0);
+    vector<Point<double>> sites;
+    for (int i = 0; i < 1000; i++)
+        sites.emplace_back(acosh(1 + (cosh(12.0) - 1) * uniform(rng)), 2 * M_PI * uniform(rng));
+
+    VoronoiDiagram v;
+    FortuneHyperbolicImplementation<FullNativeKernel<double>, double> fortune(v, sites);
+    fortune.calculate();
+
+    ASSERT_EQ(2 * v.numberOfEdges(), v.edgeSites.size());
+    ASSERT_EQ(2 * v.numberOfEdges(), v.edgeVertices.size());
+    // every vertex is the end point of the three edges between the sites of its circle event
+    vector<int> degrees(v.numberOfVertices(), 0);
+    for (size_t i = 0; i < v.numberOfEdges(); i++) {
+        EXPECT_LT(v.edgeSites[2 * i], sites.size());
+        EXPECT_LT(v.edgeSites[2 * i + 1], sites.size());
+        EXPECT_NE(v.edgeSites[2 * i], v.edgeSites[2 * i + 1]);
+        // edges created at circle events start at the vertex of the event
+        if (v.getEdgeType(i) != EdgeType::BIDIRECTIONAL) {
+            EXPECT_NE(VoronoiDiagram::NO_VERTEX, v.edgeVertices[2 * i]);
+        }
+        for (int end = 0; end < 2; end++) {
+            int64_t vertex = v.edgeVertices[2 * i + end];
+            if (vertex == VoronoiDiagram::NO_VERTEX) continue;
+            ASSERT_GE(vertex, 0);
+            ASSERT_LT(static_cast<size_t>(vertex), v.numberOfVertices());
+            degrees[vertex]++;
+        }
+    }
+    for (int degree : degrees)
+        EXPECT_EQ(3, degree);
+}
+
+TEST(VoronoiTest, ComputesBatchesLikeSingleDiagrams) {
+    std::mt19937 rng(42);
+    std::uniform_real_distribution<double> uniform(0.0, 1.0);
+
+    vector<vector<Point<double>>> siteSets(8);
+    for (auto& sites : siteSets) {
+        for (int i = 0; i < 200; i++)
+            sites.emplace_back(acosh(1 + (cosh(10.0) - 1) * uniform(rng)), 2 * M_PI * uniform(rng));
+    }
+
+    vector<VoronoiDiagram> diagrams;
+    calculate_diagrams<FullNativeKernel<double>, double>(siteSets, diagrams, 4);
+    ASSERT_EQ(siteSets.size(), diagrams.size());
+
+    for (size_t i = 0; i < siteSets.size(); i++) {
+        VoronoiDiagram v;
+        FortuneHyperbolicImplementation<FullNativeKernel<double>, double> fortune(v, siteSets[i]);
+        fortune.calculate();
+
+        EXPECT_EQ(v.edgeSites, diagrams[i].edgeSites);
+    }
+}
+
+TEST(VoronoiTest, CollectsStatisticsWithoutChangingTheDiagram) {
+    std::mt19937 rng(3);
+    std::uniform_real_distribution<double> uniform(0.0, 1.0);
+    vector<Point<double>> sites;
+    for (int i = 0; i < 1000; i++)
+        sites.emplace_back(acosh(1 + (cosh(12.0) - 1) * uniform(rng)), 2 * M_PI * uniform(rng));
+
+    VoronoiDiagram v, instrumented;
+    FortuneHyperbolicImplementation<FullNativeKernel<double>, double> fortune(v, sites);
+    fortune.calculate();
+    FortuneHyperbolicImplementation<FullNativeKernel<double>, double, true> instrumentedFortune(instrumented, sites);
+    instrumentedFortune.calculate();
+
+    EXPECT_EQ(v.edgeSites, instrumented.edgeSites);
+    EXPECT_EQ(v.vertexCoordinates, instrumented.vertexCoordinates);
+
+    SweepStatistics statistics = instrumentedFortune.getStatistics();
+    EXPECT_EQ(sites.size(), statistics.siteEvents);
+    EXPECT_EQ(v.numberOfVertices(), statistics.circleEvents);
+    EXPECT_EQ(statistics.circleEventQueue.skipped, statistics.invalidCircleEvents);
+    EXPECT_EQ(statistics.circleEventQueue.pushed,
+              statistics.circleEvents + statistics.invalidCircleEvents + statistics.circleEventQueue.compacted);
+    EXPECT_GT(statistics.beforeCalls, sites.size());
+    EXPECT_GE(statistics.cacheHits + statistics.cacheMisses, statistics.circleEventQueue.pushed);
+    EXPECT_GT(statistics.maximumBeachLineSize, 2u);
+    EXPECT_LE(statistics.maximumBeachLineSize, 2 * sites.size());
+    EXPECT_GT(statistics.totalNanoseconds, 0u);
+    EXPECT_LE(statistics.searchNanoseconds + statistics.treapNanoseconds + statistics.predictionNanoseconds +
+              statistics.queueNanoseconds, statistics.totalNanoseconds);
+}
+
+TEST(VoronoiTest, FingerSearchYieldsTheSameDiagram) {
+    std::mt19937 rng(5);
+    std::uniform_real_distribution<double> uniform(0.0, 1.0);
+    // uniform sites and sites on a spiral, whose consecutive site events are angularly close
+    vector<Point<double>> uniformSites, spiralSites;
+    for (int i = 0; i < 2000; i++) {
+        uniformSites.emplace_back(acosh(1 + (cosh(12.0) - 1) * uniform(rng)), 2 * M_PI * uniform(rng));
+        spiralSites.emplace_back(1 + i * 0.005 + 0.001 * uniform(rng), fmod(i * 0.05, 2 * M_PI));
+    }
+
+    for (const auto& sites : {uniformSites, spiralSites}) {
+        VoronoiDiagram v, finger;
+        FortuneHyperbolicImplementation<FullNativeKernel<double>, double, true> fortune(v, sites);
+        fortune.calculate();
+        FortuneHyperbolicImplementation<FullNativeKernel<double>, double, true> fingerFortune(finger, sites);
+        fingerFortune.setSearchMode(SearchMode::FINGER);
+        fingerFortune.calculate();
+
+        EXPECT_EQ(v.edgeSites, finger.edgeSites);
+
+        // the saved evaluations are exactly the difference to the searches from the root
+        SweepStatistics root = fortune.getStatistics(), statistics = fingerFortune.getStatistics();
+        EXPECT_EQ(0, root.savedBeforeCalls);
+        EXPECT_EQ(static_cast<long long>(root.beforeCalls) - static_cast<long long>(statistics.beforeCalls),
+                  statistics.savedBeforeCalls);
+    }
+
+    VoronoiDiagram v;
+    FortuneHyperbolicImplementation<FullNativeKernel<double>, double, true> fingerFortune(v, spiralSites);
+    fingerFortune.setSearchMode(SearchMode::FINGER);
+    fingerFortune.calculate();
+    EXPECT_GT(fingerFortune.getStatistics().savedBeforeCalls, static_cast<long long>(spiralSites.size()));
+}
+
+TEST(VoronoiTest, HandlesEveryCircleEventOnceWhenCompactingWithTiedRadii) {
+    // sites on a polar grid, many of whose circle events have equal radii
+    vector<Point<double>> sites;
+    for (int i = 1; i <= 20; i++)
+        for (int j = 0; j < 32; j++)
+            sites.emplace_back(0.5 * i, 2 * M_PI * j / 32);
+
+    // compacting the queue at every invalidation
+    VoronoiDiagram v;
+    FortuneHyperbolicImplementation<FullNativeKernel<double>, double, true> fortune(v, sites);
+    fortune.setCompaction(0.0, 1);
+    fortune.calculate();
+
+    SweepStatistics statistics = fortune.getStatistics();
+    EXPECT_GT(statistics.circleEventQueue.compactions, 0u);
+    EXPECT_EQ(0u, statistics.circleEventQueue.skipped);
+    EXPECT_EQ(statistics.circleEventQueue.pushed, statistics.circleEvents + statistics.circleEventQueue.compacted);
+    EXPECT_EQ(v.numberOfVertices(), statistics.circleEvents);
+
+    // an event that is handled twice overwrites the vertices of the edges of its first handling
+    vector<int> degrees(v.numberOfVertices(), 0);
+    for (int64_t vertex : v.edgeVertices) {
+        if (vertex != VoronoiDiagram::NO_VERTEX)
+            degrees[vertex]++;
+    }
+    for (int degree : degrees)
+        EXPECT_EQ(3, degree);
+}
+
+TEST(VoronoiTest, HandlesCircleEventsBeforeSiteEventsWithTheSameRadius) {
+    vector<Point<double>> sites = {{1.0, 0.0}, {1.5, 1.0}, {2.0, 2.0}};
+    VoronoiDiagram v;
+    FortuneHyperbolicImplementation<FullNativeKernel<double>, double> fortune(v, sites);
+    fortune.calculate();
+    ASSERT_EQ(1, v.numberOfVertices());
+
+    // a site on the opposite side whose radius is exactly the radius of the circle event
+    Point<double> center(v.vertexCoordinates[0], v.vertexCoordinates[1]);
+    double r = distance<double>(center, Site<double>(sites[0], 0)) + center.r;
+    sites.emplace_back(r, 2.0 + M_PI);
+
+    VoronoiDiagram tied;
+    FortuneHyperbolicImplementation<FullNativeKernel<double>, double> tiedFortune(tied, sites);
+    tiedFortune.calculate();
+
+    // the edge created by the circle event precedes the edge created by the site event
+    ASSERT_LT(3, tied.numberOfEdges());
+    EXPECT_EQ(v.edgeSites, vector<uint64_t>(tied.edgeSites.begin(), tied.edgeSites.begin() + 6));
+    EXPECT_EQ(3, tied.edgeSites[6]);
 }
@@ -1,24 +1,87 @@
 #include <cmath>
+#include <cstdint>
 #include <cstdlib>
+#include <filesystem>
+#include <fstream>
 #include <iostream>
 #include <random>
-#include <fstream>
-#include <iomanip>
+#include <sstream>
+#include <stdexcept>
+#include <string>
+#include <vector>
 
 #include "cxxopts.h"
+#include "geometry.h"
+#include "io.h"
+#include "parallel.h"
+#include "sampling.h"
 
 using namespace std;
+using namespace hyperbolic;
+
+// a line of a parameter table. The radius is kept as written, since it is part of the output filenames
+struct Parameters {
+    string R;
+    size_t N;
+};
+
+/**
+ * reads a parameter table, e.g., the parameters.txt written by site_parameters_util.py. Each line holds a disk radius
+ * and the number of sites that are sampled in it
+ * */
+vector<Parameters> read_parameters(const string& filename) {
+    ifstream input_stream(filename);
+    if (!input_stream.is_open())
+        throw runtime_error("Unable to open file \"" + filename + "\"");
+
+    vector<Parameters> parameters;
+    string line;
+    while (getline(input_stream, line)) {
+        istringstream line_stream(line);
+        string R;
+        double N;
+        if (!(line_stream >> R)) continue;
+        if (!(line_stream >> N) || N < 0)
+            throw runtime_error("Error while reading file \"" + filename + "\"");
+        try {
+            stod(R);
+        } catch (const logic_error&) {
+            throw runtime_error("Error while reading file \"" + filename + "\"");
+        }
+        parameters.push_back({R, static_cast<size_t>(N)});
+    }
+    return parameters;
+}
+
+// replaces every occurrence of placeholder in pattern with value
+string substitute(string pattern, const string& placeholder, const string& value) {
+    for (auto pos = pattern.find(placeholder); pos != string::npos; pos = pattern.find(placeholder, pos + value.size()))
+        pattern.replace(pos, placeholder.size(), value);
+    return pattern;
+}
+
+// writes the sites to a file, creating its parent directories if necessary
+void write_sample(const string& filename, const vector<Point<double>>& sites, FileFormat format) {
+    auto parent = filesystem::path(filename).parent_path();
+    if (!parent.empty()) filesystem::create_directories(parent);
+    write_sites(filename, sites, format);
+}
 
 int main(int argc, char* argv[]) {
     cxxopts::Options options(
             "generator", "Generator for sampling points in the hyperbolic plane and writing them to a file.");
 
     options.add_options()
-            ("o,output", "Output Filename", cxxopts::value<std::string>()->default_value("sample.txt"))
-            ("N", "Number of points to sample", cxxopts::value<int>()->default_value("-1")) 
+            ("o,output", "Output Filename.  With a parameter table, {R} and {sample} are replaced with the disk radius and the sample number", cxxopts::value<std::string>())
+            ("N", "Number of points to sample", cxxopts::value<int>()->default_value("-1"))
             ("R", "Radius within which points are sampled", cxxopts::value<double>()->default_value("-1"))
             ("a,alpha", "Parameter alpha of the distribution from which we sample",cxxopts::value<double>()->default_value("1"))
             ("d", "Desired average degree",cxxopts::value<double>()->default_value("8"))
+            ("s,seed", "Seed of the random numbers.  Runs with the same seed and parameters produce identical files.  By default, a random seed is chosen and printed", cxxopts::value<uint64_t>())
+            ("p,parameters", "Parameter table whose lines hold a disk radius R and a number of sites N.  Samples are generated for every line", cxxopts::value<std::string>())
+            ("n,samples", "Number of samples that are generated for every line of the parameter table", cxxopts::value<int>()->default_value("1"))
+            ("j,threads", "Number of worker threads generating the samples of a parameter table.  0 uses one thread per core", cxxopts::value<unsigned int>()->default_value("0"))
+            ("text", "Write the points as text instead of the binary format", cxxopts::value<bool>()->default_value("false"))
             ("h,help", "Print usage");
 
     auto result = options.parse(argc, argv);
@@ -28,8 +91,48 @@ int main(int argc, char* argv[]) {
         exit(0);
     }
 
+    // This parameter can be used to skew the distribution away from
+    // the boundary of the disk.  The smaller alpha, the more likely
+    // it is that a point is sampled closeer to the origin.
+    double alpha = result["alpha"].as<double>();
+
+    uint64_t seed = result.count("seed") ? result["seed"].as<uint64_t>()
+                                         : (static_cast<uint64_t>(random_device()()) << 32) | random_device()();
+    FileFormat format = result["text"].as<bool>() ? FileFormat::TEXT : FileFormat::BINARY;
+    cout << "Using seed = " << seed << "\n";
+
+    if (result.count("parameters")) {
+        // Every sample is drawn from its own stream, which is identified by the line of the parameter table and the
+        // sample number. Hence, the files do not depend on the number of threads or the order in which they are written.
+        string pattern = result.count("output") ? result["output"].as<string>() : "{R}-{sample}.bin";
+        int samples = result["samples"].as<int>();
+        if (samples < 1) {
+            std::cerr << "The number of samples has to be positive.\n";
+            return EXIT_FAILURE;
+        }
+
+        try {
+            vector<Parameters> parameters = read_parameters(result["parameters"].as<string>());
+            size_t jobs = parameters.size() * samples;
+            cout << "Generating " << samples << " samples for each of " << parameters.size() << " parameters\n";
+            cout << "Writing to files: " << pattern << "\n";
+
+            parallel_for(jobs, result["threads"].as<unsigned int>(), [&](size_t job, unsigned int) {
+                size_t line = job / samples, sample = job % samples + 1;
+                CounterRandom random(seed, ((line + 1) << 32) | sample);
+                vector<Point<double>> sites = sample_sites(parameters[line].N, stod(parameters[line].R), alpha, random);
+                string filename = substitute(pattern, "{R}", parameters[line].R);
+                write_sample(substitute(filename, "{sample}", to_string(sample)), sites, format);
+            });
+        } catch (const std::runtime_error& e) {
+            std::cerr << e.what() << "\n";
+            return EXIT_FAILURE;
+        }
+        return 0;
+    }
+
     // Path to output
-    string filename = result["o"].as<string>();
+    string filename = result.count("output") ? result["output"].as<string>() : "sample.bin";
 
     // Radius of disk containing the points
     double R = result["R"].as<double>();
@@ -42,34 +145,22 @@ int main(int argc, char* argv[]) {
       return EXIT_FAILURE;
     }
 
-    // This parameter can be used to skew the distribution away from
-    // the boundary of the disk.  The smaller alpha, the more likely
-    // it is that a point is sampled closeer to the origin.
-    double alpha = result["alpha"].as<double>();
-
     // If R is not specified
     if (R < 0) {
-      double d = result["d"].as<double>();
-      double alpha_fraction = alpha / (alpha - 0.5);
-      R = 2.0 * log(2.0 * N / (M_PI * d) * (alpha_fraction * alpha_fraction));
+      R = disk_radius(N, alpha, result["d"].as<double>());
     }
 
     cout << "Using R = " << R << "\n";
     cout << "Using N = " << N << "\n";
     cout << "Writing to file: " << filename << "\n";
 
-    std::random_device rd;
-    std::mt19937 gen(rd());
-    std::uniform_real_distribution<> dis(0.0, 1.0);
-
-    std::fstream output_file_stream(filename, std::fstream::out);
-    output_file_stream << std::fixed << std::setprecision(6);
-
-    for(int i=0; i<N; ++i) {
-        double angle = dis(gen) * 2 * M_PI;
-        double radius = acosh(1+(cosh(alpha*R)-1)*dis(gen))/alpha;
+    vector<Point<double>> points = sample_sites(N, R, alpha, CounterRandom(seed, 0));
 
-        output_file_stream << angle << " " << radius << "\n";
+    try {
+        write_sample(filename, points, format);
+    } catch (const std::runtime_error& e) {
+        std::cerr << e.what() << "\n";
+        return EXIT_FAILURE;
     }
     return 0;
 }
@@ -1,8 +1,11 @@
 #pragma once
 
 #include <cmath>
+#include <cstddef>
+#include <cstdint>
 #include <vector>
 #include <memory>
+#include <optional>
 
 using std::vector, std::max, std::min, std::unique_ptr;
 
@@ -28,6 +31,18 @@ namespace hyperbolic {
             return Point<double>(static_cast<double>(r), static_cast<double>(theta));
         }
     };
+    /*
+     * hyperbolic and trigonometric functions of the coordinates of a point that are needed by most calculations
+     * */
+    template<typename _float_T>
+    struct PointTerms {
+        _float_T cosh_r, sinh_r, cos_theta, sin_theta;
+        PointTerms(_float_T cosh_r, _float_T sinh_r, _float_T cos_theta, _float_T sin_theta)
+                : cosh_r(cosh_r), sinh_r(sinh_r), cos_theta(cos_theta), sin_theta(sin_theta) {};
+        explicit PointTerms(const Point<_float_T>& p)
+                : cosh_r(cosh(p.r)), sinh_r(sinh(p.r)), cos_theta(cos(p.theta)), sin_theta(sin(p.theta)) {};
+    };
+
     /*
      * Sites for internal use that assign an ID to a point which is used for caching
      * */
@@ -36,29 +51,87 @@ namespace hyperbolic {
         Point<_float_T> point;
         const unsigned long long ID;
         Site(Point<_float_T> point, unsigned long long id) : point(point), ID(id) {};
+        Site(Point<_float_T> point, unsigned long long id, const PointTerms<_float_T>& terms)
+                : point(point), ID(id), cachedTerms(terms) {};
         explicit operator Site<double> () const {
             return Site<double>(static_cast<Point<double>>(point), ID);
         }
-    };
 
-    enum EdgeType {CCW, CW, BIDIRECTIONAL};
+        // the terms of point, computed on first use and shared by all calculations involving the site
+        const PointTerms<_float_T>& terms() const {
+            if (!cachedTerms) cachedTerms.emplace(point);
+            return *cachedTerms;
+        }
+
+    private:
+        mutable std::optional<PointTerms<_float_T>> cachedTerms;
+    };
 
     /*
-     * represents an edge of the Voronoi diagram
+     * the sweep circle at radius r together with the terms of r that are shared by all calculations during one step
+     * of the algorithm
      * */
-    struct Edge {
-        EdgeType edgeType;
-        // the sites that define the bisector corresponding to the edge
-        Site<double> siteA, siteB;
-        // the vertices of the Voronoi diagram the edge is adjacent to
-        Point<double> *firstVertex = nullptr, *secondVertex = nullptr;
-        Edge(Site<double> a, Site<double> b, EdgeType edgeType) :
-                edgeType(edgeType), siteA(a), siteB(b) {};
+    template<typename _float_T>
+    struct SweepCircle {
+        _float_T r, cosh_r, sinh_r;
+        SweepCircle(_float_T r, _float_T cosh_r, _float_T sinh_r) : r(r), cosh_r(cosh_r), sinh_r(sinh_r) {};
+        explicit SweepCircle(_float_T r) : r(r), cosh_r(cosh(r)), sinh_r(sinh(r)) {};
     };
 
+    enum EdgeType : uint8_t {CCW, CW, BIDIRECTIONAL};
+
+    /*
+     * the Voronoi diagram, stored as a structure of arrays so that it can be written to files and handed to NumPy
+     * without conversion. Vertex i has the coordinates (r, theta) stored at positions 2i and 2i + 1 of
+     * vertexCoordinates. Edge i lies on the bisector of the sites whose IDs (their indices in the input) are stored at
+     * positions 2i and 2i + 1 of edgeSites, its end points are the vertices whose indices are stored at the same
+     * positions of edgeVertices (NO_VERTEX for ends without a vertex) and its EdgeType is stored in edgeTypes
+     * */
     class VoronoiDiagram {
     public:
-        vector<unique_ptr<Point<double>>> vertices;
-        vector<unique_ptr<Edge>> edges;
+        static constexpr int64_t NO_VERTEX = -1;
+
+        vector<double> vertexCoordinates;
+        vector<uint64_t> edgeSites;
+        vector<int64_t> edgeVertices;
+        vector<uint8_t> edgeTypes;
+
+        [[nodiscard]] size_t numberOfVertices() const {
+            return vertexCoordinates.size() / 2;
+        }
+
+        [[nodiscard]] size_t numberOfEdges() const {
+            return edgeTypes.size();
+        }
+
+        [[nodiscard]] Point<double> getVertex(size_t i) const {
+            return {vertexCoordinates[2 * i], vertexCoordinates[2 * i + 1]};
+        }
+
+        [[nodiscard]] EdgeType getEdgeType(size_t i) const {
+            return static_cast<EdgeType>(edgeTypes[i]);
+        }
+
+        // appends a vertex and returns its index
+        size_t addVertex(const Point<double>& p) {
+            vertexCoordinates.push_back(p.r);
+            vertexCoordinates.push_back(p.theta);
+            return numberOfVertices() - 1;
+        }
+
+        // appends an edge without vertices between the sites with the IDs a and b and returns its index
+        size_t addEdge(uint64_t a, uint64_t b, EdgeType edgeType) {
+            edgeSites.push_back(a);
+            edgeSites.push_back(b);
+            edgeVertices.push_back(NO_VERTEX);
+            edgeVertices.push_back(NO_VERTEX);
+            edgeTypes.push_back(edgeType);
+            return numberOfEdges() - 1;
+        }
+
+        // sets the vertex at one end (0 or 1) of an edge
+        void setEdgeVertex(size_t edge, int end, size_t vertex) {
+            edgeVertices[2 * edge + end] = static_cast<int64_t>(vertex);
+        }
     };
 }
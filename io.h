@@ -0,0 +1,220 @@
+#pragma once
+
+#include <bit>
+#include <cstdint>
+#include <cstring>
+#include <fstream>
+#include <iomanip>
+#include <limits>
+#include <stdexcept>
+#include <string>
+#include <type_traits>
+#include <vector>
+
+#include "geometry.h"
+
+namespace hyperbolic {
+    static_assert(std::endian::native == std::endian::little, "the binary files are written in little-endian order");
+
+    /**
+     * Binary container for sites, Voronoi vertices and Delaunay edges. A file consists of a header of HEADER_SIZE bytes,
+     * followed by a contiguous row-major payload of rows x columns values of type float64 or uint64 (little-endian).
+     * Hence, the payload can be mapped into memory directly, e.g., with
+     * numpy.memmap(path, dtype, mode='r', offset=HEADER_SIZE, shape=(rows, columns)).
+     *
+     * The columns are the same as in the text files: sites are stored as (theta, r), Voronoi vertices as (r, theta)
+     * and Delaunay edges as (ID of the first site, ID of the second site).
+     * */
+    enum class FileKind : uint32_t {
+        SITES = 1,
+        DIAGRAM = 2,
+        TRIANGULATION = 3
+    };
+
+    enum class ValueType : uint32_t {
+        FLOAT64 = 1,
+        UINT64 = 2
+    };
+
+    // text files are still supported, but only written on request
+    enum class FileFormat {
+        BINARY,
+        TEXT
+    };
+
+    constexpr char FILE_MAGIC[8] = {'H', 'Y', 'P', 'V', 'O', 'R', 'O', '\0'};
+    constexpr uint32_t FILE_VERSION = 1;
+    // set in the flags if the header holds a checksum of the payload
+    constexpr uint32_t FILE_FLAG_CHECKSUM = 1;
+
+    struct FileHeader {
+        char magic[8];
+        uint32_t version;
+        FileKind kind;
+        ValueType type;
+        uint32_t flags;
+        uint64_t rows;
+        uint64_t columns;
+        uint64_t checksum;
+        uint8_t reserved[16];
+    };
+
+    constexpr size_t HEADER_SIZE = 64;
+    static_assert(sizeof(FileHeader) == HEADER_SIZE);
+
+    /**
+     * Sum of the payload words, where the i-th word is multiplied with 2i + 1, modulo 2^64. Other than a byte-wise hash,
+     * it can be computed with vectorized integer arithmetic (e.g., in numpy) and still detects truncated, altered or
+     * swapped words.
+     * */
+    inline uint64_t payload_checksum(const uint64_t* words, size_t count) {
+        uint64_t checksum = 0;
+        for (size_t i = 0; i < count; i++)
+            checksum += words[i] * (2 * static_cast<uint64_t>(i) + 1);
+        return checksum;
+    }
+
+    template<typename T>
+    constexpr ValueType value_type() {
+        static_assert(std::is_same_v<T, double> || std::is_same_v<T, uint64_t>, "only float64 and uint64 payloads are supported");
+        return std::is_same_v<T, double> ? ValueType::FLOAT64 : ValueType::UINT64;
+    }
+
+    // whether the file starts with the magic bytes of the binary format
+    inline bool is_binary_file(const std::string& filename) {
+        std::ifstream input_stream(filename, std::ios::binary);
+        char magic[sizeof(FILE_MAGIC)];
+        return input_stream.read(magic, sizeof(magic)) && std::memcmp(magic, FILE_MAGIC, sizeof(magic)) == 0;
+    }
+
+    /**
+     * writes values.size() / columns rows of a table to a binary file. Throws std::runtime_error if the file cannot be
+     * written.
+     * */
+    template<typename T>
+    void write_binary_file(const std::string& filename, FileKind kind, const std::vector<T>& values, size_t columns,
+                           bool checksum=true) {
+        if (columns == 0 || values.size() % columns != 0)
+            throw std::runtime_error("Payload of \"" + filename + "\" does not consist of complete rows");
+
+        FileHeader header{};
+        std::memcpy(header.magic, FILE_MAGIC, sizeof(FILE_MAGIC));
+        header.version = FILE_VERSION;
+        header.kind = kind;
+        header.type = value_type<T>();
+        header.rows = values.size() / columns;
+        header.columns = columns;
+        if (checksum) {
+            header.flags |= FILE_FLAG_CHECKSUM;
+            std::vector<uint64_t> words(values.size());
+            std::memcpy(words.data(), values.data(), values.size() * sizeof(T));
+            header.checksum = payload_checksum(words.data(), words.size());
+        }
+
+        std::ofstream output_stream(filename, std::ios::binary);
+        output_stream.write(reinterpret_cast<const char*>(&header), sizeof(header));
+        output_stream.write(reinterpret_cast<const char*>(values.data()), static_cast<std::streamsize>(values.size() * sizeof(T)));
+        if (!output_stream)
+            throw std::runtime_error("Unable to write file \"" + filename + "\"");
+    }
+
+    /**
+     * reads the payload of a binary file, checking that the file holds a table of the given kind, value type and number
+     * of columns and that the payload matches its checksum. Throws std::runtime_error otherwise.
+     * */
+    template<typename T>
+    std::vector<T> read_binary_file(const std::string& filename, FileKind kind, size_t columns) {
+        std::ifstream input_stream(filename, std::ios::binary);
+        if (!input_stream.is_open())
+            throw std::runtime_error("Unable to open file \"" + filename + "\"");
+
+        FileHeader header;
+        if (!input_stream.read(reinterpret_cast<char*>(&header), sizeof(header)) ||
+            std::memcmp(header.magic, FILE_MAGIC, sizeof(FILE_MAGIC)) != 0)
+            throw std::runtime_error("\"" + filename + "\" is not a binary file");
+        if (header.version != FILE_VERSION)
+            throw std::runtime_error("\"" + filename + "\" has unsupported version " + std::to_string(header.version));
+        if (header.kind != kind || header.type != value_type<T>() || header.columns != columns)
+            throw std::runtime_error("\"" + filename + "\" holds a different kind of data");
+
+        // the payload has to hold exactly the rows of the header. This is checked before allocating the payload, so
+        // that a corrupted header cannot request an arbitrary amount of memory, and without multiplying, which could
+        // overflow
+        input_stream.seekg(0, std::ios::end);
+        uint64_t payload_size = static_cast<uint64_t>(input_stream.tellg()) - HEADER_SIZE;
+        input_stream.seekg(HEADER_SIZE);
+        uint64_t payload_values = payload_size / sizeof(T);
+        bool valid_size = payload_size % sizeof(T) == 0 && (header.columns == 0 ? payload_values == 0 :
+                payload_values % header.columns == 0 && payload_values / header.columns == header.rows);
+        if (!valid_size)
+            throw std::runtime_error("\"" + filename + "\" has an invalid size");
+
+        std::vector<T> values(header.rows * header.columns);
+        if (!input_stream.read(reinterpret_cast<char*>(values.data()), static_cast<std::streamsize>(values.size() * sizeof(T))))
+            throw std::runtime_error("\"" + filename + "\" is truncated");
+
+        if (header.flags & FILE_FLAG_CHECKSUM) {
+            std::vector<uint64_t> words(values.size());
+            std::memcpy(words.data(), values.data(), values.size() * sizeof(T));
+            if (payload_checksum(words.data(), words.size()) != header.checksum)
+                throw std::runtime_error("Checksum of \"" + filename + "\" does not match");
+        }
+        return values;
+    }
+
+    /**
+     * reads the sites stored in a binary or a text file. Each line of a text file holds the angular and the radial
+     * coordinate of one site. Throws std::runtime_error if the file cannot be read.
+     * */
+    inline std::vector<Point<double>> read_sites(const std::string& filename) {
+        std::vector<Point<double>> sites;
+        if (is_binary_file(filename)) {
+            std::vector<double> values = read_binary_file<double>(filename, FileKind::SITES, 2);
+            sites.reserve(values.size() / 2);
+            for (size_t i = 0; i < values.size(); i += 2)
+                sites.emplace_back(values[i + 1], values[i]);
+            return sites;
+        }
+
+        std::ifstream input_stream(filename);
+        if (!input_stream.is_open())
+            throw std::runtime_error("Unable to open file \"" + filename + "\"");
+        try {
+            std::string line;
+            while (getline(input_stream, line)) {
+                auto pos = line.find(' ');
+                double theta = std::stod(line.substr(0, pos));
+                double r = std::stod(line.substr(pos));
+                sites.emplace_back(r, theta);
+            }
+        } catch (const std::logic_error&) {
+            throw std::runtime_error("Error while reading file \"" + filename + "\"");
+        }
+        return sites;
+    }
+
+    /**
+     * writes sites to a file. Text files hold one site per line with as many digits as needed to read back the exact
+     * coordinates
+     * */
+    inline void write_sites(const std::string& filename, const std::vector<Point<double>>& sites,
+                            FileFormat format=FileFormat::BINARY) {
+        if (format == FileFormat::TEXT) {
+            std::ofstream output_stream(filename);
+            output_stream << std::setprecision(std::numeric_limits<double>::max_digits10);
+            for (const Point<double>& p : sites)
+                output_stream << p.theta << " " << p.r << "\n";
+            if (!output_stream)
+                throw std::runtime_error("Unable to write file \"" + filename + "\"");
+            return;
+        }
+
+        std::vector<double> values;
+        values.reserve(2 * sites.size());
+        for (const Point<double>& p : sites) {
+            values.push_back(p.theta);
+            values.push_back(p.r);
+        }
+        write_binary_file(filename, FileKind::SITES, values, 2);
+    }
+}
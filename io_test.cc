@@ -0,0 +1,166 @@
+#include <gtest/gtest.h>
+
+#include "canvas.h"
+#include "fortune.h"
+#include "io.h"
+
+#include <cstddef>
+#include <cstdio>
+#include <filesystem>
+#include <fstream>
+#include <limits>
+#include <random>
+#include <stdexcept>
+#include <string>
+#include <vector>
+
+using namespace hyperbolic;
+
+namespace {
+    vector<Point<double>> random_sites(int N) {
+        std::mt19937 rng(7);
+        std::uniform_real_distribution<double> uniform(0.0, 1.0);
+        vector<Point<double>> sites;
+        for (int i = 0; i < N; i++)
+            sites.emplace_back(10 * uniform(rng), 2 * M_PI * uniform(rng));
+        return sites;
+    }
+}
+
+TEST(IOTest, ReadsSitesInBothFormats) {
+    vector<Point<double>> sites = random_sites(100);
+    std::string binary_file = ::testing::TempDir() + "io_test_sites.bin";
+    std::string text_file = ::testing::TempDir() + "io_test_sites.txt";
+    write_sites(binary_file, sites);
+    write_sites(text_file, sites, FileFormat::TEXT);
+
+    EXPECT_TRUE(is_binary_file(binary_file));
+    EXPECT_FALSE(is_binary_file(text_file));
+
+    // both formats store the coordinates exactly
+    vector<Point<double>> binary_sites = read_sites(binary_file);
+    vector<Point<double>> text_sites = read_sites(text_file);
+    ASSERT_EQ(sites.size(), binary_sites.size());
+    ASSERT_EQ(sites.size(), text_sites.size());
+    for (size_t i = 0; i < sites.size(); i++) {
+        EXPECT_EQ(sites[i].r, binary_sites[i].r);
+        EXPECT_EQ(sites[i].theta, binary_sites[i].theta);
+        EXPECT_EQ(sites[i].r, text_sites[i].r);
+        EXPECT_EQ(sites[i].theta, text_sites[i].theta);
+    }
+
+    std::remove(binary_file.c_str());
+    std::remove(text_file.c_str());
+}
+
+TEST(IOTest, WritesDiagramsAsContiguousPayload) {
+    vector<Point<double>> sites = random_sites(200);
+    VoronoiDiagram v;
+    FortuneHyperbolicImplementation<FullNativeKernel<double>, double> fortune(v, sites);
+    fortune.calculate();
+
+    VoronoiCanvas canvas(v, sites);
+    std::string diagram_file = ::testing::TempDir() + "io_test_diagram.bin";
+    std::string triangulation_file = ::testing::TempDir() + "io_test_triangulation.bin";
+    canvas.write_diagram(diagram_file);
+    canvas.write_delaunay_triangulation(triangulation_file);
+
+    vector<double> coordinates = read_binary_file<double>(diagram_file, FileKind::DIAGRAM, 2);
+    EXPECT_EQ(v.vertexCoordinates, coordinates);
+
+    vector<uint64_t> ids = read_binary_file<uint64_t>(triangulation_file, FileKind::TRIANGULATION, 2);
+    EXPECT_EQ(v.edgeSites, ids);
+
+    // the payload starts right after the header, so it can be mapped into memory
+    std::ifstream input_stream(diagram_file, std::ios::binary | std::ios::ate);
+    EXPECT_EQ(HEADER_SIZE + coordinates.size() * sizeof(double), static_cast<size_t>(input_stream.tellg()));
+
+    // triangulations cannot be read as diagrams
+    EXPECT_THROW(read_binary_file<double>(triangulation_file, FileKind::DIAGRAM, 2), std::runtime_error);
+
+    std::remove(diagram_file.c_str());
+    std::remove(triangulation_file.c_str());
+}
+
+TEST(IOTest, WritesDiagramsAsExactText) {
+    vector<Point<double>> sites = random_sites(200);
+    VoronoiDiagram v;
+    FortuneHyperbolicImplementation<FullNativeKernel<double>, double> fortune(v, sites);
+    fortune.calculate();
+
+    VoronoiCanvas canvas(v, sites);
+    std::string diagram_file = ::testing::TempDir() + "io_test_diagram.txt";
+    canvas.write_diagram(diagram_file, FileFormat::TEXT);
+
+    vector<double> coordinates;
+    std::ifstream input_stream(diagram_file);
+    for (double value; input_stream >> value;)
+        coordinates.push_back(value);
+    EXPECT_EQ(v.vertexCoordinates, coordinates);
+
+    std::string missing_file = ::testing::TempDir() + "io_test_missing/diagram.txt";
+    EXPECT_THROW(canvas.write_diagram(missing_file, FileFormat::TEXT), std::runtime_error);
+    EXPECT_THROW(canvas.write_delaunay_triangulation(missing_file, FileFormat::TEXT), std::runtime_error);
+
+    std::remove(diagram_file.c_str());
+}
+
+TEST(IOTest, DetectsCorruptedFiles) {
+    vector<Point<double>> sites = random_sites(10);
+    std::string file = ::testing::TempDir() + "io_test_corrupted.bin";
+    write_sites(file, sites);
+
+    {
+        std::fstream stream(file, std::ios::binary | std::ios::in | std::ios::out);
+        stream.seekp(HEADER_SIZE + 3 * sizeof(double));
+        double value = 1.5;
+        stream.write(reinterpret_cast<const char*>(&value), sizeof(value));
+    }
+    EXPECT_THROW(read_sites(file), std::runtime_error);
+
+    // files written without a checksum are not verified
+    vector<double> values(2 * sites.size());
+    write_binary_file(file, FileKind::SITES, values, 2, false);
+    EXPECT_EQ(sites.size(), read_sites(file).size());
+
+    std::remove(file.c_str());
+}
+
+TEST(IOTest, DetectsTruncatedFiles) {
+    vector<Point<double>> sites = random_sites(10);
+    std::string file = ::testing::TempDir() + "io_test_truncated.bin";
+    write_sites(file, sites);
+
+    std::filesystem::resize_file(file, HEADER_SIZE + 5 * sizeof(double));
+    EXPECT_THROW(read_sites(file), std::runtime_error);
+
+    // a header whose size of the payload overflows is rejected before anything is allocated
+    {
+        std::fstream stream(file, std::ios::binary | std::ios::in | std::ios::out);
+        stream.seekp(offsetof(FileHeader, rows));
+        uint64_t rows = std::numeric_limits<uint64_t>::max() / 2 + 1;
+        stream.write(reinterpret_cast<const char*>(&rows), sizeof(rows));
+    }
+    EXPECT_THROW(read_sites(file), std::runtime_error);
+
+    std::remove(file.c_str());
+}
+
+TEST(IOTest, DetectsTrailingBytes) {
+    vector<Point<double>> sites = random_sites(10);
+    std::string file = ::testing::TempDir() + "io_test_trailing.bin";
+    // without a checksum, a header with too few rows would otherwise read back a shortened table
+    vector<double> values(2 * sites.size());
+    write_binary_file(file, FileKind::SITES, values, 2, false);
+    EXPECT_EQ(sites.size(), read_sites(file).size());
+
+    {
+        std::ofstream stream(file, std::ios::binary | std::ios::app);
+        double value = 1.5;
+        stream.write(reinterpret_cast<const char*>(&value), sizeof(value));
+        stream.write(reinterpret_cast<const char*>(&value), sizeof(value));
+    }
+    EXPECT_THROW(read_sites(file), std::runtime_error);
+
+    std::remove(file.c_str());
+}
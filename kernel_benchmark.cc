@@ -0,0 +1,146 @@
+// Compares kernels that are resolved at compile time (satisfying the Kernel
+// concept) with the same kernels called through virtual functions, as it was
+// the case when kernels derived from an abstract base class.
+//
+// Usage:
+//   bazel run -c opt kernel_benchmark -- -N 10000,100000,1000000
+
+#include <chrono>
+#include <iomanip>
+#include <iostream>
+#include <memory>
+#include <random>
+#include <vector>
+
+#include "benchmark_util.h"
+#include "fortune.h"
+#include "kernels.h"
+
+#include "cxxopts.h"
+
+using namespace std;
+using namespace hyperbolic;
+
+// the former kernel interface with virtual methods
+template<typename _float_T>
+class VirtualKernel {
+public:
+    virtual ~VirtualKernel() = default;
+    virtual bool before(_float_T theta, _float_T reference_angle, Site<_float_T>& s, Site<_float_T>& t,
+                        const SweepCircle<_float_T>& sweep) = 0;
+    virtual bool predict_circle_event(Point<_float_T>& result, Site<_float_T>& r, Site<_float_T>& s, Site<_float_T>& t) = 0;
+    virtual void release_circle_event(Site<_float_T>& r, Site<_float_T>& s, Site<_float_T>& t) = 0;
+};
+
+template<class K, typename _float_T>
+class VirtualKernelAdapter : public VirtualKernel<_float_T> {
+    K kernel;
+public:
+    bool before(_float_T theta, _float_T reference_angle, Site<_float_T>& s, Site<_float_T>& t,
+                const SweepCircle<_float_T>& sweep) override {
+        return kernel.before(theta, reference_angle, s, t, sweep);
+    }
+    bool predict_circle_event(Point<_float_T>& result, Site<_float_T>& r, Site<_float_T>& s, Site<_float_T>& t) override {
+        return kernel.predict_circle_event(result, r, s, t);
+    }
+    void release_circle_event(Site<_float_T>& r, Site<_float_T>& s, Site<_float_T>& t) override {
+        kernel.release_circle_event(r, s, t);
+    }
+};
+
+// satisfies the Kernel concept, but dispatches every call through the virtual interface
+class DynamicKernel {
+    unique_ptr<VirtualKernel<double>> kernel = make_unique<VirtualKernelAdapter<FullNativeKernel<double>, double>>();
+public:
+    bool before(double theta, double reference_angle, Site<double>& s, Site<double>& t, const SweepCircle<double>& sweep) {
+        return kernel->before(theta, reference_angle, s, t, sweep);
+    }
+    bool predict_circle_event(Point<double>& result, Site<double>& r, Site<double>& s, Site<double>& t) {
+        return kernel->predict_circle_event(result, r, s, t);
+    }
+    void release_circle_event(Site<double>& r, Site<double>& s, Site<double>& t) {
+        kernel->release_circle_event(r, s, t);
+    }
+};
+
+template<class K>
+double measure_diagram(const vector<Point<double>>& sites) {
+    VoronoiDiagram v;
+    auto begin = chrono::steady_clock::now();
+    FortuneHyperbolicImplementation<K, double> fortune(v, sites);
+    fortune.calculate();
+    return chrono::duration<double, milli>(chrono::steady_clock::now() - begin).count();
+}
+
+// nanoseconds per call of before for random pairs of sites
+template<class K>
+double measure_before(K& kernel, vector<Site<double>>& sites, const vector<double>& thetas, const SweepCircle<double>& sweep) {
+    auto begin = chrono::steady_clock::now();
+    size_t count = 0;
+    for (size_t i = 0; i + 1 < sites.size(); i++)
+        count += kernel.before(thetas[i], 0, sites[i], sites[i + 1], sweep);
+    double nanoseconds = chrono::duration<double, nano>(chrono::steady_clock::now() - begin).count();
+    // keeps the calls from being optimized away
+    static volatile size_t sink;
+    sink = count;
+    return nanoseconds / static_cast<double>(sites.size() - 1);
+}
+
+int main(int argc, char* argv[]) {
+    cxxopts::Options options(
+            argv[0], "Measures the cost of calling kernels through virtual functions.");
+
+    options.add_options()
+            ("N", "Numbers of sites", cxxopts::value<vector<int>>()->default_value("10000,100000,1000000"))
+            ("r,repetitions", "Number of repetitions per configuration", cxxopts::value<int>()->default_value("3"))
+            ("s,seed", "Seed used for sampling the sites", cxxopts::value<unsigned int>()->default_value("1"))
+            ("h,help", "Print usage");
+
+    auto result = options.parse(argc, argv);
+
+    if (result.count("help")) {
+        cout << options.help() << endl;
+        exit(0);
+    }
+
+    int repetitions = result["r"].as<int>();
+    unsigned int seed = result["s"].as<unsigned int>();
+
+    cout << setw(10) << "N" << setw(16) << "virtual ms" << setw(16) << "concept ms" << setw(10) << "speedup"
+         << setw(18) << "virtual ns/call" << setw(18) << "concept ns/call" << setw(10) << "speedup" << "\n";
+
+    for (int N : result["N"].as<vector<int>>()) {
+        vector<Point<double>> points = sample_sites(N, seed);
+
+        vector<Site<double>> sites;
+        sites.reserve(N);
+        for (int i = 0; i < N; i++) sites.emplace_back(points[i], i);
+        vector<double> thetas(N);
+        mt19937 gen(seed);
+        uniform_real_distribution<> dis(0.0, 2 * M_PI);
+        for (double& theta : thetas) theta = dis(gen);
+        // a sweep circle enclosing all sites
+        double r_sweep = 0;
+        for (const Point<double>& p : points) r_sweep = max(r_sweep, p.r);
+        SweepCircle<double> sweep(r_sweep);
+
+        // the minimum over all repetitions is least affected by noise
+        double virtual_ms = INFINITY, concept_ms = INFINITY, virtual_ns = INFINITY, concept_ns = INFINITY;
+        for (int i = 0; i < repetitions; i++) {
+            virtual_ms = min(virtual_ms, measure_diagram<DynamicKernel>(points));
+            concept_ms = min(concept_ms, measure_diagram<FullNativeKernel<double>>(points));
+
+            DynamicKernel dynamic;
+            FullNativeKernel<double> native;
+            virtual_ns = min(virtual_ns, measure_before(dynamic, sites, thetas, sweep));
+            concept_ns = min(concept_ns, measure_before(native, sites, thetas, sweep));
+        }
+
+        cout << setw(10) << N << fixed << setprecision(1) << setw(16) << virtual_ms << setw(16) << concept_ms
+             << setw(9) << setprecision(2) << virtual_ms / concept_ms << "x"
+             << setw(18) << setprecision(1) << virtual_ns << setw(18) << concept_ns
+             << setw(9) << setprecision(2) << virtual_ns / concept_ns << "x" << "\n";
+    }
+
+    return 0;
+}
@@ -1,59 +1,83 @@
 #pragma once
 
+#include <concepts>
+
 #include "geometry.h"
 #include "calculations.h"
 #include "datastructures.h"
+#include "bounded.h"
 
 namespace hyperbolic {
     /**
-     * Abstraction class for allow for different implementations of the before method (for doing the binary search on the beach line) and the prediction of circle events
+     * Contract for the different implementations of the before method (for doing the binary search on the beach line)
+     * and the prediction of circle events. A kernel K is a policy that is resolved at compile time, so its methods can
+     * be inlined into the beach line search. The kernel floating point type must match _float_T. Required methods:
+     *
+     * bool before(_float_T theta, _float_T reference_angle, Site<_float_T>& s, Site<_float_T>& t, const SweepCircle<_float_T>& sweep)
+     *     checks whether the angle theta is between the reference angle and the Beach Line intersection defined by the
+     *     tuple of sites (s,t) in ccw direction
+     *
+     * bool predict_circle_event(Point<_float_T>& result, Site<_float_T>& r, Site<_float_T>& s, Site<_float_T>& t)
+     *     predicts the coordinates of a circle event
+     *
+     * void release_circle_event(Site<_float_T>& r, Site<_float_T>& s, Site<_float_T>& t)
+     *     notifies the kernel that the circle event defined by r, s, and t has been passed by the sweep circle, so that
+     *     it is never predicted again
+     *
+     * Kernels that cache circle events can additionally provide
+     *
+     * const CacheStatistics& getCacheStatistics() const
+     *     counts how many predictions were answered from the cache
      * */
-    template<typename _float_T>
-    class Kernel {
-    public:
-        /**
-         * checks whether the angle theta is between the reference angle and the Beach Line intersection defined by the tuple of sites (p_s,p_t) in ccw direction
-         * */
-        virtual bool before (
-                _float_T theta, _float_T reference_angle,
-                Point<_float_T>& p_s, Point<_float_T>& p_t, _float_T r_sweep) = 0;
+    template<class K, typename _float_T>
+    concept Kernel = requires(K& kernel, _float_T angle, Point<_float_T>& result, Site<_float_T>& site,
+                              const SweepCircle<_float_T>& sweep) {
+        { kernel.before(angle, angle, site, site, sweep) } -> std::convertible_to<bool>;
+        { kernel.predict_circle_event(result, site, site, site) } -> std::convertible_to<bool>;
+        kernel.release_circle_event(site, site, site);
+    };
 
-        /**
-         * predicts the coordinates of a circle event
-         * */
-        virtual bool predict_circle_event(
-                Point<_float_T>& result,
-                Site<_float_T>& r, Site<_float_T>& s, Site<_float_T>& t)  = 0;
+    // counts the circle event predictions that were answered from the cache of a kernel and those that were not
+    struct CacheStatistics {
+        unsigned long long hits = 0, misses = 0;
     };
 
     /**
      * Implementation of a kernel that fully works in the native (polar coordinate) model of hyperbolic space
      * */
     template<typename _float_T>
-    class FullNativeKernel: public Kernel<_float_T> {
+    class FullNativeKernel final {
         SiteTripleMap<_float_T> circleEventCache;
+        bool evictPassedCircleEvents;
+        CacheStatistics cacheStatistics;
     public:
+        /**
+         * @param maximumCacheSize The maximum number of cached circle events. 0 does not bound the cache
+         * @param evictPassedCircleEvents Whether circle events are removed from the cache once they were passed
+         */
+        explicit FullNativeKernel(size_t maximumCacheSize = 0, bool evictPassedCircleEvents = true)
+                : circleEventCache(maximumCacheSize), evictPassedCircleEvents(evictPassedCircleEvents) {};
+
         bool before (
                 _float_T theta, _float_T reference_angle,
-                Point<_float_T>& p_s, Point<_float_T>& p_t, _float_T r_sweep) {
-            Point<_float_T> *s = &p_s, *t = &p_t;
-
-            auto r_sweep_internal = static_cast<_float_T>(r_sweep);
+                Site<_float_T>& p_s, Site<_float_T>& p_t, const SweepCircle<_float_T>& sweep) {
+            Site<_float_T> *s = &p_s, *t = &p_t;
 
             bool use_second = false;
-            if (s->r < t->r) {
+            if (s->point.r < t->point.r) {
                 std::swap(s, t);
                 use_second = true;
             }
 
+            const PointTerms<_float_T> &s_terms = s->terms(), &t_terms = t->terms();
             cosine<_float_T> combined =
-                    cosine<_float_T> ((cosh(r_sweep_internal) - cosh(t->r)) * sinh(s->r), 0, (cosh(t->r) - cosh(s->r)) * sinh(r_sweep_internal)) +
-                    cosine<_float_T> (-(cosh(r_sweep_internal) - cosh(s->r)) * sinh(t->r), s->theta - t->theta, 0);
+                    cosine<_float_T> ((sweep.cosh_r - t_terms.cosh_r) * s_terms.sinh_r, 0, (t_terms.cosh_r - s_terms.cosh_r) * sweep.sinh_r) +
+                    cosine<_float_T> (-(sweep.cosh_r - s_terms.cosh_r) * t_terms.sinh_r, s->point.theta - t->point.theta, 0);
             auto[z1, z2] = combined.zeros();
             if (z1 > z2) std::swap(z1, z2);
 
-            z1 = clip<_float_T>(z1 + s->theta);
-            z2 = clip<_float_T>(z2 + s->theta);
+            z1 = clip<_float_T>(z1 + s->point.theta);
+            z2 = clip<_float_T>(z2 + s->point.theta);
             auto z = (use_second) ? z2 : z1;
 
             z = clip<_float_T>(z - reference_angle);
@@ -81,9 +105,9 @@ namespace hyperbolic {
             return false;
         }
 
-        bool calculate_circle_event_center(Point<_float_T>& result, const Point<_float_T>& r, const Point<_float_T>& s, const Point<_float_T>& t) {
-            Bisector<_float_T> rs(&r, &s);
-            Bisector<_float_T> st(&s, &t);
+        bool calculate_circle_event_center(Point<_float_T>& result, const Site<_float_T>& r, const Site<_float_T>& s, const Site<_float_T>& t) {
+            Bisector<_float_T> rs(r, s);
+            Bisector<_float_T> st(s, t);
 
             // if one of the bisectors is a straight line, intersection calculation becomes straightforward
             if (rs.is_straight) {
@@ -120,19 +144,179 @@ namespace hyperbolic {
             auto siteTriple = SiteTriple(r.ID, s.ID, t.ID);
             if (siteTriple.ID1 == siteTriple.ID2 || siteTriple.ID2 == siteTriple.ID3) return false;
 
-            auto it = circleEventCache.find(siteTriple);
-            if (it != circleEventCache.end()) {
+            if (auto cached = circleEventCache.find(siteTriple)) {
                 // use cached value
-                result = it->second;
+                cacheStatistics.hits++;
+                result = *cached;
             } else {
                 // calculate point and cache it if existent
-                if (calculate_circle_event_center(result, r.point, s.point, t.point))
-                    circleEventCache[siteTriple] = result;
+                cacheStatistics.misses++;
+                if (calculate_circle_event_center(result, r, s, t))
+                    circleEventCache.insert(siteTriple, result);
                 else return false;
             }
 
             return (on_active_site(r.point, s.point, result) &&
                     on_active_site(s.point, t.point, result));
         };
+
+        void release_circle_event(Site<_float_T>& r, Site<_float_T>& s, Site<_float_T>& t) {
+            // the three sites do not form a triple on the beach line anymore
+            if (evictPassedCircleEvents)
+                circleEventCache.erase(SiteTriple(r.ID, s.ID, t.ID));
+        }
+
+        [[nodiscard]] const CacheStatistics& getCacheStatistics() const {
+            return cacheStatistics;
+        }
+    };
+
+    // counts how often the predicates of a FilteredKernel were evaluated and how often they had to fall back
+    struct FilterStatistics {
+        unsigned long long beforeCalls = 0, beforeFallbacks = 0;
+        unsigned long long predictionCalls = 0, predictionFallbacks = 0;
+    };
+
+    /**
+     * Implementation of a kernel that evaluates the predicates in double precision while keeping track of an upper
+     * bound on the error (see BoundedDouble). Only if a decision cannot be made based on these bounds, the predicate
+     * is evaluated again using the floating point type _exact_T. Since this is only necessary for almost degenerate
+     * configurations and for circle events far away from the origin (whose radius cannot be represented accurately
+     * in intermediate double calculations), the kernel is much faster than a FullNativeKernel<_exact_T> while making
+     * the same decisions for the same inputs. The algorithm itself (i.e., the radii of the events and the coordinates
+     * of the vertices) uses double precision, i.e., the kernel is used as
+     * FortuneHyperbolicImplementation<FilteredKernel<_exact_T>, double>.
+     * */
+    template<typename _exact_T>
+    class FilteredKernel final {
+        // the calculations of both kernels are used, their caches are not
+        FullNativeKernel<BoundedDouble> filter;
+        FullNativeKernel<_exact_T> exact;
+
+        SiteTripleMap<BoundedDouble> circleEventCache;
+        bool evictPassedCircleEvents;
+
+        FilterStatistics statistics;
+        CacheStatistics cacheStatistics;
+
+        // the cached terms of double sites are only off by the error of the functions that computed them
+        static BoundedDouble rounded(double value) {
+            return {value, BoundedDouble::FUNCTION_ERROR * std::fabs(value)};
+        }
+
+        static BoundedDouble rounded_trigonometric(double value) {
+            return {value, BoundedDouble::FUNCTION_ERROR};
+        }
+
+        static Point<BoundedDouble> to_bounded(const Point<double>& p) {
+            return {p.r, p.theta};
+        }
+
+        static Site<BoundedDouble> to_bounded(const Site<double>& s) {
+            const PointTerms<double>& terms = s.terms();
+            return {to_bounded(s.point), s.ID, PointTerms<BoundedDouble>(
+                    rounded(terms.cosh_r), rounded(terms.sinh_r),
+                    rounded_trigonometric(terms.cos_theta), rounded_trigonometric(terms.sin_theta))};
+        }
+
+        static SweepCircle<BoundedDouble> to_bounded(const SweepCircle<double>& sweep) {
+            return {sweep.r, rounded(sweep.cosh_r), rounded(sweep.sinh_r)};
+        }
+
+        static Point<_exact_T> to_exact(const Point<double>& p) {
+            return {_exact_T(p.r), _exact_T(p.theta)};
+        }
+
+        static Site<_exact_T> to_exact(const Site<double>& s) {
+            return {to_exact(s.point), s.ID};
+        }
+
+    public:
+        /**
+         * @param maximumCacheSize The maximum number of cached circle events. 0 does not bound the cache
+         * @param evictPassedCircleEvents Whether circle events are removed from the cache once they were passed
+         */
+        explicit FilteredKernel(size_t maximumCacheSize = 0, bool evictPassedCircleEvents = true)
+                : circleEventCache(maximumCacheSize), evictPassedCircleEvents(evictPassedCircleEvents) {};
+
+        bool before (
+                double theta, double reference_angle,
+                Site<double>& p_s, Site<double>& p_t, const SweepCircle<double>& sweep) {
+            statistics.beforeCalls++;
+
+            BoundedDouble::resetUncertainty();
+            Site<BoundedDouble> s = to_bounded(p_s), t = to_bounded(p_t);
+            bool result = filter.before(theta, reference_angle, s, t, to_bounded(sweep));
+            if (!BoundedDouble::isUncertain()) return result;
+
+            statistics.beforeFallbacks++;
+            Site<_exact_T> s_exact = to_exact(p_s), t_exact = to_exact(p_t);
+            return exact.before(_exact_T(theta), _exact_T(reference_angle), s_exact, t_exact, SweepCircle<_exact_T>(_exact_T(sweep.r)));
+        };
+
+        bool predict_circle_event(
+                Point<double>& result,
+                Site<double>& r, Site<double>& s, Site<double>& t) {
+
+            auto siteTriple = SiteTriple(r.ID, s.ID, t.ID);
+            if (siteTriple.ID1 == siteTriple.ID2 || siteTriple.ID2 == siteTriple.ID3) return false;
+            statistics.predictionCalls++;
+
+            BoundedDouble::resetUncertainty();
+            Site<BoundedDouble> r_bounded = to_bounded(r), s_bounded = to_bounded(s), t_bounded = to_bounded(t);
+            Point<BoundedDouble> center;
+            auto cached = circleEventCache.find(siteTriple);
+            bool exists = true;
+            if (cached) {
+                cacheStatistics.hits++;
+                center = *cached;
+            } else {
+                cacheStatistics.misses++;
+                exists = filter.calculate_circle_event_center(center, r_bounded, s_bounded, t_bounded);
+            }
+            bool active = exists && filter.on_active_site(r_bounded.point, s_bounded.point, center) &&
+                          filter.on_active_site(s_bounded.point, t_bounded.point, center);
+
+            if (!BoundedDouble::isUncertain()) {
+                if (exists && !cached)
+                    circleEventCache.insert(siteTriple, center);
+                result = static_cast<Point<double>>(center);
+                return active;
+            }
+
+            // the existence or position of the circle event is uncertain, so it is calculated again exactly
+            statistics.predictionFallbacks++;
+            Site<_exact_T> r_exact = to_exact(r), s_exact = to_exact(s), t_exact = to_exact(t);
+            Point<_exact_T> center_exact;
+            if (!exact.calculate_circle_event_center(center_exact, r_exact, s_exact, t_exact)) {
+                if (cached) circleEventCache.erase(siteTriple);
+                return false;
+            }
+
+            result = static_cast<Point<double>>(center_exact);
+            // the exact center is only off by the error of rounding it to double
+            circleEventCache.insert(siteTriple, Point<BoundedDouble>(
+                    BoundedDouble(result.r, DBL_EPSILON * std::fabs(result.r)),
+                    BoundedDouble(result.theta, DBL_EPSILON * std::fabs(result.theta))));
+            return exact.on_active_site(r_exact.point, s_exact.point, center_exact) &&
+                   exact.on_active_site(s_exact.point, t_exact.point, center_exact);
+        };
+
+        void release_circle_event(Site<double>& r, Site<double>& s, Site<double>& t) {
+            // the three sites do not form a triple on the beach line anymore
+            if (evictPassedCircleEvents)
+                circleEventCache.erase(SiteTriple(r.ID, s.ID, t.ID));
+        }
+
+        [[nodiscard]] const FilterStatistics& getStatistics() const {
+            return statistics;
+        }
+
+        [[nodiscard]] const CacheStatistics& getCacheStatistics() const {
+            return cacheStatistics;
+        }
     };
+
+    static_assert(Kernel<FullNativeKernel<double>, double>);
+    static_assert(Kernel<FilteredKernel<double>, double>);
 }
@@ -0,0 +1,112 @@
+#include <gtest/gtest.h>
+
+#include "bounded.h"
+#include "kernels.h"
+#include "fortune.h"
+
+#include <cmath>
+#include <random>
+#include <vector>
+
+using namespace hyperbolic;
+
+TEST(BoundedDoubleTest, BoundsContainExactResult) {
+    // cosh(x) - cosh(y) suffers from cancellation for large, close x and y
+    for (double y : {0.5, 10.0, 20.0}) {
+        double x = std::nextafter(y, 30.0);
+        BoundedDouble difference = cosh(BoundedDouble(x)) - cosh(BoundedDouble(y));
+        long double exact = std::cosh(static_cast<long double>(x)) - std::cosh(static_cast<long double>(y));
+        EXPECT_LE(std::fabs(static_cast<long double>(difference.value) - exact), difference.error);
+    }
+
+    BoundedDouble angle = atan2(sin(BoundedDouble(1.0)), cos(BoundedDouble(1.0)));
+    EXPECT_LE(std::fabs(angle.value - 1.0), angle.error);
+}
+
+TEST(BoundedDoubleTest, FlagsUncertainComparisons) {
+    BoundedDouble::resetUncertainty();
+    EXPECT_TRUE(BoundedDouble(1.0) < BoundedDouble(2.0));
+    EXPECT_FALSE(BoundedDouble::isUncertain());
+
+    EXPECT_TRUE(BoundedDouble(1.0, 0.6) < BoundedDouble(2.0, 0.6));
+    EXPECT_TRUE(BoundedDouble::isUncertain());
+
+    // the rounded product is not 2, but its error bound does not rule it out
+    BoundedDouble::resetUncertainty();
+    EXPECT_FALSE(sqrt(BoundedDouble(2.0)) * sqrt(BoundedDouble(2.0)) == 2.0);
+    EXPECT_TRUE(BoundedDouble::isUncertain());
+
+    BoundedDouble::resetUncertainty();
+    EXPECT_FALSE(BoundedDouble(1.0) / BoundedDouble(0.0, 1e-20) < 0);
+    EXPECT_TRUE(BoundedDouble::isUncertain());
+}
+
+TEST(FilteredKernelTest, FallsBackForUncertainDecisions) {
+    FullNativeKernel<double> native;
+    FilteredKernel<double> filtered;
+    Site<double> s({3, 2}, 0), t({2, 1}, 1);
+    SweepCircle<double> r_sweep(4);
+
+    // the angle of the beach line intersection of s and t
+    double low = 0, high = 2 * M_PI;
+    for (int i = 0; i < 200; i++) {
+        double middle = (low + high) / 2;
+        if (native.before(middle, 0, s, t, r_sweep)) low = middle;
+        else high = middle;
+    }
+
+    EXPECT_EQ(native.before(0.5, 0, s, t, r_sweep), filtered.before(0.5, 0, s, t, r_sweep));
+    EXPECT_EQ(native.before(5.5, 0, s, t, r_sweep), filtered.before(5.5, 0, s, t, r_sweep));
+    EXPECT_EQ(2, filtered.getStatistics().beforeCalls);
+    EXPECT_EQ(0, filtered.getStatistics().beforeFallbacks);
+
+    EXPECT_EQ(native.before(low, 0, s, t, r_sweep), filtered.before(low, 0, s, t, r_sweep));
+    EXPECT_EQ(1, filtered.getStatistics().beforeFallbacks);
+}
+
+TEST(FilteredKernelTest, ComputesSameDiagramAsExactKernel) {
+    // with double as the exact type, both kernels make exactly the same decisions
+    std::mt19937 rng(7);
+    std::uniform_real_distribution<double> uniform(0.0, 1.0);
+    double R = 12;
+    vector<Point<double>> sites;
+    for (int i = 0; i < 2000; i++)
+        sites.emplace_back(acosh(1 + (cosh(R) - 1) * uniform(rng)), 2 * M_PI * uniform(rng));
+
+    VoronoiDiagram expected, v;
+    FortuneHyperbolicImplementation<FullNativeKernel<double>, double> native(expected, sites);
+    native.calculate();
+    FortuneHyperbolicImplementation<FilteredKernel<double>, double> filtered(v, sites);
+    filtered.calculate();
+
+    EXPECT_EQ(expected.edgeSites, v.edgeSites);
+    EXPECT_EQ(expected.edgeVertices, v.edgeVertices);
+    EXPECT_EQ(expected.vertexCoordinates, v.vertexCoordinates);
+
+    const FilterStatistics& statistics = filtered.getKernel().getStatistics();
+    EXPECT_GT(statistics.beforeCalls, 0);
+    EXPECT_GT(statistics.predictionCalls, 0);
+    EXPECT_LT(statistics.beforeFallbacks, statistics.beforeCalls / 100);
+    EXPECT_LT(statistics.predictionFallbacks, statistics.predictionCalls / 100);
+}
+
+TEST(SiteTermsTest, MatchCalculationsOnPoints) {
+    Site<double> s({3, 2}, 0), t({5.5, 4.1}, 1);
+    Point<double> p(4, 1);
+
+    Bisector<double> fromPoints(&s.point, &t.point), fromSites(s, t), swapped(t, s);
+    for (const Bisector<double>& b : {fromSites, swapped}) {
+        EXPECT_EQ(fromPoints.numerator, b.numerator);
+        EXPECT_EQ(fromPoints.denominator.amp, b.denominator.amp);
+        EXPECT_EQ(fromPoints.denominator.phase, b.denominator.phase);
+        EXPECT_EQ(fromPoints.theta_start, b.theta_start);
+        EXPECT_EQ(fromPoints.theta_end, b.theta_end);
+    }
+
+    EXPECT_EQ(distance<double>(p, s.point), distance<double>(p, s));
+
+    HyperboloidVec<double> fromPoint(t.point), fromSite(t);
+    EXPECT_DOUBLE_EQ(fromPoint.x, fromSite.x);
+    EXPECT_DOUBLE_EQ(fromPoint.y, fromSite.y);
+    EXPECT_DOUBLE_EQ(fromPoint.z, fromSite.z);
+}
@@ -1,11 +1,21 @@
 #include <iostream>
 #include <vector>
+#include <atomic>
 #include <chrono>
+#include <filesystem>
+#include <fstream>
+#include <iomanip>
+#include <map>
+#include <memory>
+#include <mutex>
+#include <sstream>
 
 #include "geometry.h"
 #include "canvas.h"
 #include "kernels.h"
 #include "fortune.h"
+#include "io.h"
+#include "parallel.h"
 
 #include <boost/multiprecision/mpfr.hpp>
 
@@ -32,6 +42,181 @@ using floating_point_type_224 = number<mpfr_float_backend<224, allocate_stack>>;
 using floating_point_type_240 = number<mpfr_float_backend<240, allocate_stack>>;
 using floating_point_type_256 = number<mpfr_float_backend<256, allocate_stack>>;
 
+// reads the sites stored in a binary or a text file
+bool read_sites(const string& input_file, vector<Point<double>>& sites) {
+    try {
+        sites = hyperbolic::read_sites(input_file);
+    } catch (const std::runtime_error& e) {
+        cout << e.what() << "\n";
+        return false;
+    }
+    return true;
+}
+
+// collects the site files to compute in batch mode. Directories are expanded to the .bin and .txt files they contain
+vector<string> get_batch_input_files(const vector<string>& paths) {
+    vector<string> files;
+    for (const string& path : paths) {
+        if (filesystem::is_directory(path)) {
+            vector<string> directory_files;
+            for (const auto& entry : filesystem::directory_iterator(path)) {
+                if (entry.is_regular_file() && (entry.path().extension() == ".bin" || entry.path().extension() == ".txt") &&
+                    entry.path().stem() != "parameters")
+                    directory_files.push_back(entry.path().string());
+            }
+            sort(directory_files.begin(), directory_files.end());
+            files.insert(files.end(), directory_files.begin(), directory_files.end());
+        } else {
+            files.push_back(path);
+        }
+    }
+    return files;
+}
+
+// replaces every occurrence of placeholder in pattern with value
+string substitute(string pattern, const string& placeholder, const string& value) {
+    for (auto pos = pattern.find(placeholder); pos != string::npos; pos = pattern.find(placeholder, pos + value.size()))
+        pattern.replace(pos, placeholder.size(), value);
+    return pattern;
+}
+
+// returns the path of an output file, creating its parent directories if necessary
+string get_output_file(const string& pattern, const string& input_file, int precision) {
+    string output_file = substitute(pattern, "{name}", filesystem::path(input_file).stem().string());
+    output_file = substitute(output_file, "{precision}", to_string(precision));
+    auto parent = filesystem::path(output_file).parent_path();
+    if (!parent.empty()) filesystem::create_directories(parent);
+    return output_file;
+}
+
+// statistics of the computation of a diagram that are written to the file given by --stats
+struct DiagramStatistics {
+    SweepStatistics sweep;
+    // only set when the diagram was computed with a FilteredKernel
+    bool filtered = false;
+    FilterStatistics filter;
+};
+
+using CalculationFunction = void (*)(VoronoiDiagram&, const vector<Point<double>>&, bool, uint64_t, SearchMode, std::ostream&,
+                                     DiagramStatistics*);
+
+/**
+ * computes the diagram with the kernel K and calls inspect with the kernel afterwards. The instrumented version of the
+ * algorithm is only used if statistics are requested
+ * */
+template<class K, typename _float_T, class F>
+void calculate(VoronoiDiagram& v, const vector<Point<double>>& sites, bool verbose, uint64_t seed, SearchMode search_mode,
+               DiagramStatistics* statistics, F&& inspect) {
+    if (statistics) {
+        FortuneHyperbolicImplementation<K, _float_T, true> fortune(v, sites, verbose, MemoryMode::ARENA, seed);
+        fortune.setSearchMode(search_mode);
+        fortune.calculate();
+        statistics->sweep = fortune.getStatistics();
+        inspect(fortune.getKernel());
+    } else {
+        FortuneHyperbolicImplementation<K, _float_T> fortune(v, sites, verbose, MemoryMode::ARENA, seed);
+        fortune.setSearchMode(search_mode);
+        fortune.calculate();
+        inspect(fortune.getKernel());
+    }
+}
+
+template<typename _float_T>
+void calculate_diagram(VoronoiDiagram& v, const vector<Point<double>>& sites, bool verbose, uint64_t seed,
+                       SearchMode search_mode, std::ostream&, DiagramStatistics* statistics) {
+    calculate<FullNativeKernel<_float_T>, _float_T>(v, sites, verbose, seed, search_mode, statistics, [](const auto&) {});
+}
+
+// calculates the diagram in double precision and only uses _float_T for predicates that cannot be decided in double
+template<typename _float_T>
+void calculate_filtered_diagram(VoronoiDiagram& v, const vector<Point<double>>& sites, bool verbose, uint64_t seed,
+                                SearchMode search_mode, std::ostream& log, DiagramStatistics* diagram_statistics) {
+    calculate<FilteredKernel<_float_T>, double>(v, sites, verbose, seed, search_mode, diagram_statistics, [&](const auto& kernel) {
+        const FilterStatistics& statistics = kernel.getStatistics();
+        log << "Filter fell back to the full precision for " << statistics.beforeFallbacks << " of " << statistics.beforeCalls
+            << " beach line searches and " << statistics.predictionFallbacks << " of " << statistics.predictionCalls
+            << " circle event predictions" << endl;
+        if (diagram_statistics) {
+            diagram_statistics->filtered = true;
+            diagram_statistics->filter = statistics;
+        }
+    });
+}
+
+// escapes the characters of a string that cannot appear in a JSON string literal as they are
+string json_string(const string& value) {
+    string result = "\"";
+    for (char c : value) {
+        if (c == '"' || c == '\\') result += '\\';
+        if (static_cast<unsigned char>(c) < 0x20) {
+            char escaped[8];
+            snprintf(escaped, sizeof(escaped), "\\u%04x", c);
+            result += escaped;
+        } else {
+            result += c;
+        }
+    }
+    return result + "\"";
+}
+
+// writes the statistics of the computation of a diagram as a JSON object
+void write_statistics(const string& output_file, const string& input_file, int precision, size_t sites,
+                      long long microseconds, const DiagramStatistics& statistics) {
+    ofstream output_stream(output_file);
+    output_stream << "{\n"
+                  << "  \"input\": " << json_string(input_file) << ",\n"
+                  << "  \"precision\": " << precision << ",\n"
+                  << "  \"filtered\": " << (statistics.filtered ? "true" : "false") << ",\n"
+                  << "  \"sites\": " << sites << ",\n"
+                  << "  \"microseconds\": " << microseconds << ",\n";
+    if (statistics.filtered) {
+        const FilterStatistics& filter = statistics.filter;
+        output_stream << "  \"filter\": {\"before_calls\": " << filter.beforeCalls
+                      << ", \"before_fallbacks\": " << filter.beforeFallbacks
+                      << ", \"prediction_calls\": " << filter.predictionCalls
+                      << ", \"prediction_fallbacks\": " << filter.predictionFallbacks << "},\n";
+    }
+    output_stream << "  \"sweep\": ";
+    write_json(output_stream, statistics.sweep, 2);
+    output_stream << "\n}\n";
+    if (!output_stream)
+        throw std::runtime_error("Unable to write file \"" + output_file + "\"");
+}
+
+template<typename _float_T>
+CalculationFunction get_calculation_function(bool filtered) {
+    return filtered ? calculate_filtered_diagram<_float_T> : calculate_diagram<_float_T>;
+}
+
+// the supported precisions in bits. All other precisions are computed in double precision
+const map<int, CalculationFunction (*)(bool)> CALCULATION_FUNCTIONS = {
+        {32, get_calculation_function<floating_point_type_32>},
+        {48, get_calculation_function<floating_point_type_48>},
+        {64, get_calculation_function<floating_point_type_64>},
+        {80, get_calculation_function<floating_point_type_80>},
+        {96, get_calculation_function<floating_point_type_96>},
+        {112, get_calculation_function<floating_point_type_112>},
+        {128, get_calculation_function<floating_point_type_128>},
+        {144, get_calculation_function<floating_point_type_144>},
+        {160, get_calculation_function<floating_point_type_160>},
+        {176, get_calculation_function<floating_point_type_176>},
+        {192, get_calculation_function<floating_point_type_192>},
+        {208, get_calculation_function<floating_point_type_208>},
+        {224, get_calculation_function<floating_point_type_224>},
+        {240, get_calculation_function<floating_point_type_240>},
+        {256, get_calculation_function<floating_point_type_256>},
+};
+
+CalculationFunction get_calculation_function(int precision, bool filtered) {
+    auto entry = CALCULATION_FUNCTIONS.find(precision);
+    if (entry == CALCULATION_FUNCTIONS.end()) {
+        cout << "Using Double precision.\n";
+        return get_calculation_function<double>(filtered);
+    }
+    cout << "Using a precision of " << precision << "bits.\n";
+    return entry->second(filtered);
+}
+
 int main(int argc, char* argv[]) {
 
     cxxopts::Options options(
@@ -39,11 +224,18 @@ int main(int argc, char* argv[]) {
 
     options.add_options()
             ("i,input", "Input Filename", cxxopts::value<std::string>())
+            ("b,batch", "Input files or directories (whose .bin and .txt files are used) that are computed in a single process.  In batch mode, {name} in the output filenames is replaced with the name of the input file", cxxopts::value<vector<std::string>>())
+            ("j,threads", "Number of worker threads used in batch mode, when computing several precisions or when drawing a diagram.  0 uses one thread per core", cxxopts::value<unsigned int>()->default_value("0"))
             ("v,verbose", "Enable verbose output (only for debugging)", cxxopts::value<bool>()->default_value("false"))
             ("d,output_diagram_svg", "Output Filename for writing the diagram svg", cxxopts::value<std::string>())
             ("o,output_diagram_txt", "Output Filename for writing the diagram coordinates", cxxopts::value<std::string>())
             ("t,output_triangulation", "Output Filename for writing the delaunay triangulation", cxxopts::value<std::string>())
-            ("p,precision", "Specifies the number of bits that should be used for computations.  Allowed values are multiple of 16 in [32, ..., 256].  Defaults to Double presision for values outside of that range.", cxxopts::value<int>()->default_value("0"))
+            ("s,seed", "Seed for the priorities of the beach line treap.  Runs with the same seed produce identical treap shapes", cxxopts::value<uint64_t>()->default_value(to_string(DEFAULT_PRIORITY_SEED)))
+            ("p,precision", "Specifies the numbers of bits that should be used for computations, e.g., 32,64,128.  Allowed values are multiple of 16 in [32, ..., 256].  Defaults to Double presision for values outside of that range.  When computing several precisions, {precision} in the output filenames is replaced with the precision", cxxopts::value<vector<int>>()->default_value("0"))
+            ("finger_search", "Start the searches in the beach line at the last inserted element instead of the root.  Faster for inputs whose consecutive sites (by radius) are angularly close, slightly slower for uniform inputs", cxxopts::value<bool>()->default_value("false"))
+            ("stats", "Output Filename for writing counters and phase timings of the sweep as JSON.  Collecting them slows the computation down slightly", cxxopts::value<std::string>())
+            ("text", "Write the diagram coordinates and the triangulation as text instead of the binary format", cxxopts::value<bool>()->default_value("false"))
+            ("f,filtered", "Evaluate in double precision and only use the precision given by -p for the decisions that cannot be made reliably in double precision", cxxopts::value<bool>()->default_value("false"))
             ("h,help", "Print usage");
 
     auto result = options.parse(argc, argv);
@@ -53,166 +245,173 @@ int main(int argc, char* argv[]) {
         exit(0);
     }
 
-    string input_file = result["i"].as<string>();
-    std::cout << "Computing diagram of file: " << input_file << "\n";
+    bool batch = result.count("b") > 0;
+    vector<string> input_files;
+    if (batch) {
+        input_files = get_batch_input_files(result["b"].as<vector<string>>());
+        std::cout << "Computing diagrams of " << input_files.size() << " files\n";
+    } else {
+        input_files.push_back(result["i"].as<string>());
+        std::cout << "Computing diagram of file: " << input_files.front() << "\n";
+    }
+
+    vector<int> precisions = result["p"].as<vector<int>>();
+    unsigned int threads = result["j"].as<unsigned int>();
+    bool verbose = result["v"].as<bool>();
+    uint64_t seed = result["s"].as<uint64_t>();
+    bool filtered = result["f"].as<bool>();
+    SearchMode search_mode = result["finger_search"].as<bool>() ? SearchMode::FINGER : SearchMode::ROOT;
+    FileFormat format = result["text"].as<bool>() ? FileFormat::TEXT : FileFormat::BINARY;
 
-    // read the input
-    ifstream input_stream(input_file);
-    vector<Point<double>> sites;
-    try {
-        if (input_stream.is_open()) {
-            string line;
-            while (getline(input_stream, line)) {
-                _float_t theta, r;
-                auto pos = line.find(' ');
-                theta = stod(line.substr(0, pos));
-                r = stod(line.substr(pos));
-                sites.emplace_back(r, theta);
+    // the outputs of different precisions would overwrite each other
+    if (precisions.size() > 1) {
+        for (const string& output : {"o", "t", "d", "stats"}) {
+            if (result.count(output) && result[output].as<string>().find("{precision}") == string::npos) {
+                cout << "The output filenames have to contain {precision} when computing several precisions.\n";
+                return 1;
             }
-            input_stream.close();
-        } else {
-            cout << "Unable to open input file \"" << input_file << "\"\n";
-            exit(1);
         }
-    } catch (...) {
-        cout << "Error while reading file \"" << input_file << "\"\n";
-        exit(1);
     }
 
-    int precision = result["p"].as<int>();
+    // the outputs of different input files would overwrite each other
+    if (input_files.size() > 1 && (result.count("o") || result.count("t") || result.count("d") || result.count("stats"))) {
+        for (const string& output : {"o", "t", "d", "stats"}) {
+            if (result.count(output) && result[output].as<string>().find("{name}") == string::npos) {
+                cout << "The output filenames have to contain {name} when computing several input files.\n";
+                return 1;
+            }
+        }
+
+        // {name} is replaced with the stem of the input file, so input files sharing a stem share their outputs
+        map<string, string> files_by_name;
+        for (const string& input_file : input_files) {
+            auto [it, inserted] = files_by_name.emplace(filesystem::path(input_file).stem().string(), input_file);
+            if (!inserted) {
+                cout << "The input files \"" << it->second << "\" and \"" << input_file
+                     << "\" have the same name, so their outputs would overwrite each other.\n";
+                return 1;
+            }
+        }
+    }
+
+    vector<CalculationFunction> calculations;
+    for (int precision : precisions)
+        calculations.push_back(get_calculation_function(precision, filtered));
+
+    VoronoiCanvasOptions canvas_options;
+    canvas_options.width = 500;
+    // the edges of a drawing are tessellated in parallel unless the diagrams themselves are computed in parallel
+    canvas_options.threads = (batch || precisions.size() > 1) ? 1 : threads;
+
+    // Every job computes one precision of one site set. The sites of a file are read once by the first of its jobs
+    // and released after its last job, so only the site sets and diagrams that are currently processed are kept in
+    // memory.
+    size_t number_of_precisions = precisions.size();
+    vector<std::once_flag> sites_read(input_files.size());
+    vector<std::shared_ptr<const vector<Point<double>>>> site_sets(input_files.size());
+    vector<std::atomic<size_t>> remaining_jobs(input_files.size());
+    for (auto& remaining : remaining_jobs) remaining = number_of_precisions;
+
+    // total time spent on computing the diagrams of each precision
+    vector<double> precision_milliseconds(number_of_precisions, 0);
+    vector<size_t> precision_diagrams(number_of_precisions, 0);
+
+    std::mutex output_mutex;
+    bool failed = false;
 
     std::chrono::steady_clock::time_point begin = std::chrono::steady_clock::now();
 
-    VoronoiDiagram v;
+    size_t jobs = input_files.size() * number_of_precisions;
+    parallel_for(jobs, (batch || number_of_precisions > 1) ? threads : 1, [&](size_t job, unsigned int) {
+        size_t i = job / number_of_precisions, p = job % number_of_precisions;
 
-    switch (precision) {
-    case 32: {
-      cout << "Using a precision of 32bits.\n";
-      FortuneHyperbolicImplementation<FullNativeKernel<floating_point_type_32>, floating_point_type_32> fortune(v, sites, result["v"].as<bool>());
-      fortune.calculate();
-      break;
-    }
-    case 48: {
-      cout << "Using a precision of 48bits.\n";
-      FortuneHyperbolicImplementation<FullNativeKernel<floating_point_type_48>, floating_point_type_48> fortune(v, sites, result["v"].as<bool>());
-      fortune.calculate();
-      break;
-    }
-    case 64: {
-      cout << "Using a precision of 64bits.\n";
-      FortuneHyperbolicImplementation<FullNativeKernel<floating_point_type_64>, floating_point_type_64> fortune(v, sites, result["v"].as<bool>());
-      fortune.calculate();
-      break;
-    }
-    case 80: {
-      cout << "Using a precision of 80bits.\n";
-      FortuneHyperbolicImplementation<FullNativeKernel<floating_point_type_80>, floating_point_type_80> fortune(v, sites, result["v"].as<bool>());
-      fortune.calculate();
-      break;
-    }
-    case 96: {
-      cout << "Using a precision of 96bits.\n";
-      FortuneHyperbolicImplementation<FullNativeKernel<floating_point_type_96>, floating_point_type_96> fortune(v, sites, result["v"].as<bool>());
-      fortune.calculate();
-      break;
-    }
-    case 112: {
-      cout << "Using a precision of 112bits.\n";
-      FortuneHyperbolicImplementation<FullNativeKernel<floating_point_type_112>, floating_point_type_112> fortune(v, sites, result["v"].as<bool>());
-      fortune.calculate();
-      break;
-    }
-    case 128: {
-      cout << "Using a precision of 128bits.\n";
-      FortuneHyperbolicImplementation<FullNativeKernel<floating_point_type_128>, floating_point_type_128> fortune(v, sites, result["v"].as<bool>());
-      fortune.calculate();
-      break;
-    }
-    case 144: {
-      cout << "Using a precision of 144bits.\n";
-      FortuneHyperbolicImplementation<FullNativeKernel<floating_point_type_144>, floating_point_type_144> fortune(v, sites, result["v"].as<bool>());
-      fortune.calculate();
-      break;
-    }
-    case 160: {
-      cout << "Using a precision of 160bits.\n";
-      FortuneHyperbolicImplementation<FullNativeKernel<floating_point_type_160>, floating_point_type_160> fortune(v, sites, result["v"].as<bool>());
-      fortune.calculate();
-      break;
-    }
-    case 176: {
-      cout << "Using a precision of 176bits.\n";
-      FortuneHyperbolicImplementation<FullNativeKernel<floating_point_type_176>, floating_point_type_176> fortune(v, sites, result["v"].as<bool>());
-      fortune.calculate();
-      break;
-    }
-    case 192: {
-      cout << "Using a precision of 192bits.\n";
-      FortuneHyperbolicImplementation<FullNativeKernel<floating_point_type_192>, floating_point_type_192> fortune(v, sites, result["v"].as<bool>());
-      fortune.calculate();
-      break;
-    }
-    case 208: {
-      cout << "Using a precision of 208bits.\n";
-      FortuneHyperbolicImplementation<FullNativeKernel<floating_point_type_208>, floating_point_type_208> fortune(v, sites, result["v"].as<bool>());
-      fortune.calculate();
-      break;
-    }
-    case 224: {
-      cout << "Using a precision of 224bits.\n";
-      FortuneHyperbolicImplementation<FullNativeKernel<floating_point_type_224>, floating_point_type_224> fortune(v, sites, result["v"].as<bool>());
-      fortune.calculate();
-      break;
-    }
-    case 240: {
-      cout << "Using a precision of 240bits.\n";
-      FortuneHyperbolicImplementation<FullNativeKernel<floating_point_type_240>, floating_point_type_240> fortune(v, sites, result["v"].as<bool>());
-      fortune.calculate();
-      break;
-    }
-    case 256: {
-      cout << "Using a precision of 256bits.\n";
-      FortuneHyperbolicImplementation<FullNativeKernel<floating_point_type_256>, floating_point_type_256> fortune(v, sites, result["v"].as<bool>());
-      fortune.calculate();
-      break;
-    }
-    default: {
-      cout << "Using Double precision.\n";
-      FortuneHyperbolicImplementation<FullNativeKernel<double>, double> fortune(v, sites, result["v"].as<bool>());
-      fortune.calculate();
-    }
-    }
+        // read the input
+        std::call_once(sites_read[i], [&]() {
+            auto sites = std::make_shared<vector<Point<double>>>();
+            if (read_sites(input_files[i], *sites))
+                site_sets[i] = sites;
+        });
+        std::shared_ptr<const vector<Point<double>>> sites = site_sets[i];
+        if (--remaining_jobs[i] == 0) site_sets[i].reset();
+        if (!sites) {
+            std::lock_guard<std::mutex> lock(output_mutex);
+            failed = true;
+            return;
+        }
 
-    std::chrono::steady_clock::time_point end = std::chrono::steady_clock::now();
+        std::stringstream log;
+        std::chrono::steady_clock::time_point diagram_begin = std::chrono::steady_clock::now();
 
-    cout << "Finished calculating Voronoi diagram after " << std::chrono::duration_cast<std::chrono::microseconds>(end - begin).count() << " microseconds" << endl;
+        VoronoiDiagram v;
+        DiagramStatistics statistics;
+        calculations[p](v, *sites, verbose, seed, search_mode, log, result.count("stats") ? &statistics : nullptr);
 
-    VoronoiCanvasOptions canvas_options;
-    canvas_options.width = 500;
-    canvas_options.resolution = 0.001;
-    VoronoiCanvas canvas(v, sites);
-
-    // Diagram
-    if (result.count("o")) {
-        string output_file = result["o"].as<string>();
-        canvas.write_diagram(output_file);
-        cout << "Diagram written to: " << output_file << ".\n";
-    }
+        std::chrono::steady_clock::time_point diagram_end = std::chrono::steady_clock::now();
+        auto microseconds = std::chrono::duration_cast<std::chrono::microseconds>(diagram_end - diagram_begin).count();
 
-    // Triangulation
-    if (result.count("t")) {
-        string output_file = result["t"].as<string>();
-        canvas.write_delaunay_triangulation(output_file);
-        cout << "Triangulation written to: " << output_file << ".\n";
-    }
+        VoronoiCanvas canvas(v, *sites);
+
+        log << "Finished calculating Voronoi diagram";
+        if (batch) log << " of file " << input_files[i];
+        if (number_of_precisions > 1) log << " with precision " << precisions[p];
+        log << " after " << microseconds << " microseconds" << endl;
 
-    // Drawing
-    if (result.count("d")) {
-        string output_file = result["d"].as<string>();
-        canvas.set_options(canvas_options);
-        canvas.draw_diagram(output_file);
-        cout << "Drawing written to: " << output_file << "\n";
+        bool output_failed = false;
+        try {
+            // Diagram
+            if (result.count("o")) {
+                string output_file = get_output_file(result["o"].as<string>(), input_files[i], precisions[p]);
+                canvas.write_diagram(output_file, format);
+                log << "Diagram written to: " << output_file << ".\n";
+            }
+
+            // Triangulation
+            if (result.count("t")) {
+                string output_file = get_output_file(result["t"].as<string>(), input_files[i], precisions[p]);
+                canvas.write_delaunay_triangulation(output_file, format);
+                log << "Triangulation written to: " << output_file << ".\n";
+            }
+
+            // Statistics
+            if (result.count("stats")) {
+                string output_file = get_output_file(result["stats"].as<string>(), input_files[i], precisions[p]);
+                write_statistics(output_file, input_files[i], precisions[p], sites->size(), microseconds, statistics);
+                log << "Statistics written to: " << output_file << ".\n";
+            }
+
+            // Drawing
+            if (result.count("d")) {
+                string output_file = get_output_file(result["d"].as<string>(), input_files[i], precisions[p]);
+                canvas.set_options(canvas_options);
+                canvas.draw_diagram(output_file);
+                log << "Drawing written to: " << output_file << "\n";
+            }
+        } catch (const std::runtime_error& e) {
+            log << e.what() << "\n";
+            output_failed = true;
+        }
+
+        std::lock_guard<std::mutex> lock(output_mutex);
+        failed = failed || output_failed;
+        precision_milliseconds[p] += static_cast<double>(microseconds) / 1000;
+        precision_diagrams[p]++;
+        cout << log.str();
+    });
+
+    std::chrono::steady_clock::time_point end = std::chrono::steady_clock::now();
+
+    if (batch || number_of_precisions > 1)
+        cout << "Finished calculating " << jobs << " Voronoi diagrams after " << std::chrono::duration_cast<std::chrono::microseconds>(end - begin).count() << " microseconds" << endl;
+
+    if (number_of_precisions > 1) {
+        cout << setw(10) << "precision" << setw(10) << "diagrams" << setw(14) << "total ms" << setw(14) << "mean ms" << "\n";
+        for (size_t p = 0; p < number_of_precisions; p++) {
+            cout << setw(10) << precisions[p] << setw(10) << precision_diagrams[p] << fixed << setprecision(1)
+                 << setw(14) << precision_milliseconds[p]
+                 << setw(14) << precision_milliseconds[p] / static_cast<double>(max<size_t>(precision_diagrams[p], 1))
+                 << "\n";
+        }
     }
 
-    return 0;
+    return failed ? 1 : 0;
 }
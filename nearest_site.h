@@ -0,0 +1,202 @@
+#pragma once
+
+#include <algorithm>
+#include <cmath>
+#include <cstddef>
+#include <cstdint>
+#include <vector>
+
+#include "batch_geometry.h"
+#include "geometry.h"
+#include "parallel.h"
+#include "topology.h"
+
+namespace hyperbolic {
+    /**
+     * answers nearest site queries (point location in the Voronoi diagram) by walking along the Delaunay graph. A query
+     * starts at the seed site of the sector it falls into and repeatedly moves to the neighbor that is closest to the
+     * query point, until no neighbor is closer. Since the geodesic from a site to the query point leaves the Voronoi
+     * cell of the site through an edge whose other site is not farther from the query point, the walk ends at a
+     * nearest site, provided that the graph holds all edges of the diagram. Diagrams computed with double precision
+     * can miss edges for large inputs (a few per million sites in a disk of radius 26), in which case some walks end
+     * at a site that is not the nearest one.
+     *
+     * The sectors divide the disk into SITES_PER_SECTOR times fewer wedges of equal angle than there are sites. The seed
+     * of a sector is the site that is closest to its center at the median radius of the sites. Other than in the
+     * Euclidean plane, dividing the sectors into radial bands does not shorten the walks: the cells of the sites close
+     * to the origin are large and reach the boundary, so the sites that are closest to points at different radii but
+     * at the same angle are mostly neighbors of each other.
+     * */
+    class NearestSiteIndex {
+    private:
+        // average number of sites in a sector
+        static constexpr size_t SITES_PER_SECTOR = 2;
+        // number of queries handed to a worker at once
+        static constexpr size_t QUERIES_PER_JOB = 4096;
+
+        /**
+         * the terms of a point from which half_chord_sq is calculated without evaluating any function. The sines of
+         * the half differences of the coordinates are calculated with the addition theorems, whose cancellation only
+         * causes absolute errors in the order of the machine precision, just like subtracting the coordinates does
+         * */
+        struct Terms {
+            double expHalfR, expMinusHalfR, sinHalfTheta, cosHalfTheta;
+
+            Terms() = default;
+
+            Terms(double r, double theta)
+                    : expHalfR(std::exp(r / 2)), expMinusHalfR(std::exp(-r / 2)), sinHalfTheta(std::sin(theta / 2)),
+                      cosHalfTheta(std::cos(theta / 2)) {};
+
+            [[nodiscard]] double sinhR() const {
+                return (expHalfR*expHalfR - expMinusHalfR*expMinusHalfR) / 2;
+            }
+
+            // (cosh(d) - 1) / 2 for the distance d to p, given sinh(r) of this point
+            [[nodiscard]] double halfChordSq(const Terms& p, double sinhR) const {
+                double sinh_half_r = (expHalfR*p.expMinusHalfR - expMinusHalfR*p.expHalfR) / 2;
+                double sin_half_theta = sinHalfTheta*p.cosHalfTheta - cosHalfTheta*p.sinHalfTheta;
+                return sinh_half_r*sinh_half_r + sinhR*p.sinhR()*sin_half_theta*sin_half_theta;
+            }
+        };
+
+        // the sites are numbered by their sectors, so that sites that are close to each other are close in memory.
+        // ids maps these numbers to the IDs of the sites
+        vector<Terms> terms;
+        vector<uint64_t> ids;
+        DelaunayGraph graph;
+        // the number of the seed of every sector
+        vector<uint64_t> seeds;
+
+        [[nodiscard]] size_t sector(double theta) const {
+            auto sector = static_cast<size_t>(wrap_angle(theta) / (2*M_PI) * static_cast<double>(seeds.size()));
+            return std::min(sector, seeds.size() - 1);
+        }
+
+        // walks from the site with the number current to a site closest to the query and returns its number
+        [[nodiscard]] uint64_t walk(const Terms& query, uint64_t current, size_t* steps) const {
+            double sinhR = query.sinhR();
+            double best = query.halfChordSq(terms[current], sinhR);
+            while (true) {
+                uint64_t next = current;
+                for (uint64_t k = graph.offsets[current]; k < graph.offsets[current + 1]; k++) {
+                    double distance = query.halfChordSq(terms[graph.neighbors[k]], sinhR);
+                    if (distance < best) {
+                        best = distance;
+                        next = graph.neighbors[k];
+                    }
+                }
+                if (next == current) return current;
+                current = next;
+                if (steps) (*steps)++;
+            }
+        }
+
+        void build(const double* sites, size_t numberOfSites, const uint64_t* edgeSites, size_t numberOfEdges) {
+            size_t n = numberOfSites;
+            if (n == 0) {
+                graph = delaunay_graph(edgeSites, numberOfEdges, 0);
+                return;
+            }
+            seeds.resize(std::max<size_t>(1, n / SITES_PER_SECTOR));
+
+            // number the sites by their sectors with a counting sort
+            vector<size_t> siteSectors(n), sectorOffsets(seeds.size() + 1, 0);
+            for (size_t i = 0; i < n; i++) {
+                siteSectors[i] = sector(sites[2*i + 1]);
+                sectorOffsets[siteSectors[i] + 1]++;
+            }
+            for (size_t k = 0; k < seeds.size(); k++) sectorOffsets[k + 1] += sectorOffsets[k];
+            vector<uint64_t> numbers(n);
+            ids.resize(n);
+            terms.resize(n);
+            for (uint64_t i = 0; i < n; i++) {
+                numbers[i] = sectorOffsets[siteSectors[i]]++;
+                ids[numbers[i]] = i;
+                terms[numbers[i]] = Terms(sites[2*i], sites[2*i + 1]);
+            }
+
+            vector<uint64_t> numberedEdgeSites(2 * numberOfEdges);
+            for (size_t i = 0; i < 2 * numberOfEdges; i++) numberedEdgeSites[i] = numbers[edgeSites[i]];
+            graph = delaunay_graph(numberedEdgeSites.data(), numberOfEdges, n);
+
+            vector<double> radii(n);
+            for (size_t i = 0; i < n; i++) radii[i] = sites[2*i];
+            std::nth_element(radii.begin(), radii.begin() + n / 2, radii.end());
+            double r = radii[n / 2];
+
+            // the seeds are located by walking around the disk, starting every walk at the previous seed
+            uint64_t seed = 0;
+            for (size_t k = 0; k < seeds.size(); k++) {
+                Terms center(r, (static_cast<double>(k) + 0.5) * 2*M_PI / static_cast<double>(seeds.size()));
+                seed = walk(center, seed, nullptr);
+                seeds[k] = seed;
+            }
+        }
+
+    public:
+        /**
+         * builds the index of the sites with IDs in [0, numberOfSites), whose (r, theta) coordinates are stored in
+         * sites, from the site pairs of the edges of their Voronoi diagram, which are stored as in
+         * VoronoiDiagram::edgeSites
+         * */
+        NearestSiteIndex(const double* sites, size_t numberOfSites, const uint64_t* edgeSites, size_t numberOfEdges) {
+            build(sites, numberOfSites, edgeSites, numberOfEdges);
+        }
+
+        NearestSiteIndex(const vector<Point<double>>& sites, const VoronoiDiagram& v) {
+            vector<double> coordinates;
+            coordinates.reserve(2 * sites.size());
+            for (const Point<double>& p : sites) {
+                coordinates.push_back(p.r);
+                coordinates.push_back(p.theta);
+            }
+            build(coordinates.data(), sites.size(), v.edgeSites.data(), v.numberOfEdges());
+        }
+
+        [[nodiscard]] size_t numberOfSites() const {
+            return graph.numberOfSites();
+        }
+
+        [[nodiscard]] size_t numberOfSectors() const {
+            return seeds.size();
+        }
+
+        /**
+         * returns the ID of a site that is closest to the point (r, theta). If steps is given, the number of moves of
+         * the walk is added to it. There must be at least one site
+         * */
+        [[nodiscard]] uint64_t nearest(double r, double theta, size_t* steps = nullptr) const {
+            return ids[walk(Terms(r, theta), seeds[sector(theta)], steps)];
+        }
+
+        [[nodiscard]] uint64_t nearest(const Point<double>& p, size_t* steps = nullptr) const {
+            return nearest(p.r, p.theta, steps);
+        }
+
+        /**
+         * stores the ID of a site closest to queries[i] in result[i] for the n queries, whose (r, theta) coordinates
+         * are stored in queries. The queries are answered on a pool of worker threads, 0 uses one worker per hardware
+         * thread. There must be at least one site
+         * */
+        void nearest(const double* queries, uint64_t* result, size_t n, unsigned int threads = 1) const {
+            size_t jobs = (n + QUERIES_PER_JOB - 1) / QUERIES_PER_JOB;
+            parallel_for(jobs, threads, [&](size_t job, unsigned int) {
+                size_t end = std::min(n, (job + 1) * QUERIES_PER_JOB);
+                for (size_t i = job * QUERIES_PER_JOB; i < end; i++)
+                    result[i] = nearest(queries[2*i], queries[2*i + 1]);
+            });
+        }
+
+        [[nodiscard]] vector<uint64_t> nearest(const vector<Point<double>>& queries, unsigned int threads = 1) const {
+            vector<uint64_t> result(queries.size());
+            size_t jobs = (queries.size() + QUERIES_PER_JOB - 1) / QUERIES_PER_JOB;
+            parallel_for(jobs, threads, [&](size_t job, unsigned int) {
+                size_t end = std::min(queries.size(), (job + 1) * QUERIES_PER_JOB);
+                for (size_t i = job * QUERIES_PER_JOB; i < end; i++)
+                    result[i] = nearest(queries[i]);
+            });
+            return result;
+        }
+    };
+}
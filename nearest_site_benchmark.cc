@@ -0,0 +1,262 @@
+// Measures nearest site queries with the Delaunay walk of NearestSiteIndex
+// and compares it with a brute force search over all sites and with a
+// KD-tree over the sites in the Poincare disk.  The queries are sampled
+// like the sites.  Brute force is only run on the first --brute queries,
+// which also serve as the reference for the errors, i.e., the number of
+// queries for which a method returned a site that is farther away than the
+// nearest one.  The diagram itself is not part of the build time of the
+// index.
+//
+// Usage:
+//   bazel run -c opt nearest_site_benchmark -- -N 10000,100000,1000000 -j 8
+
+#include <algorithm>
+#include <chrono>
+#include <cmath>
+#include <cstdint>
+#include <iomanip>
+#include <iostream>
+#include <numeric>
+#include <vector>
+
+#include "batch_geometry.h"
+#include "benchmark_util.h"
+#include "fortune.h"
+#include "kernels.h"
+#include "nearest_site.h"
+#include "parallel.h"
+
+#include "cxxopts.h"
+
+using namespace std;
+using namespace hyperbolic;
+
+namespace {
+    // the (r, theta) coordinates of the points in one buffer
+    vector<double> flatten(const vector<Point<double>>& points) {
+        vector<double> coordinates;
+        coordinates.reserve(2 * points.size());
+        for (const Point<double>& p : points) {
+            coordinates.push_back(p.r);
+            coordinates.push_back(p.theta);
+        }
+        return coordinates;
+    }
+
+    template<class F>
+    double milliseconds(F&& f) {
+        auto begin = chrono::steady_clock::now();
+        f();
+        return chrono::duration<double, milli>(chrono::steady_clock::now() - begin).count();
+    }
+
+    /**
+     * a KD-tree over the sites in the Poincare disk. The hyperbolic distance between p and q grows with
+     * |p - q|^2 / ((1 - |p|^2) * (1 - |q|^2)), so the search compares |p - q|^2 / (1 - |p|^2) and bounds it for the
+     * sites beyond a splitting line with the largest 1 - |p|^2 among them. 1 - |p|^2 = 1 / cosh(r/2)^2 is calculated
+     * from the radius, the Euclidean differences carry the rounding errors of the coordinates close to the boundary
+     * */
+    class PoincareTree {
+    private:
+        static constexpr size_t LEAF_SIZE = 8;
+
+        vector<double> x, y, weights;
+        vector<uint64_t> order;
+        // splitting coordinate and largest weight of the nodes, which are numbered like in a binary heap
+        vector<double> splits, maximumWeights;
+
+        void build(size_t node, size_t begin, size_t end, bool vertical) {
+            maximumWeights[node] = 0;
+            for (size_t i = begin; i < end; i++) maximumWeights[node] = max(maximumWeights[node], weights[order[i]]);
+            if (end - begin <= LEAF_SIZE) return;
+
+            const vector<double>& key = vertical ? x : y;
+            size_t middle = (begin + end) / 2;
+            nth_element(order.begin() + begin, order.begin() + middle, order.begin() + end,
+                        [&](uint64_t a, uint64_t b) { return key[a] < key[b]; });
+            splits[node] = key[order[middle]];
+            build(2 * node, begin, middle, !vertical);
+            build(2 * node + 1, middle, end, !vertical);
+        }
+
+        void search(size_t node, size_t begin, size_t end, bool vertical, double qx, double qy, uint64_t& nearest,
+                    double& best) const {
+            if (end - begin <= LEAF_SIZE) {
+                for (size_t i = begin; i < end; i++) {
+                    uint64_t s = order[i];
+                    double dx = x[s] - qx, dy = y[s] - qy;
+                    double distance = (dx*dx + dy*dy) / weights[s];
+                    if (distance < best) {
+                        best = distance;
+                        nearest = s;
+                    }
+                }
+                return;
+            }
+
+            size_t middle = (begin + end) / 2;
+            double difference = (vertical ? qx : qy) - splits[node];
+            size_t near = difference < 0 ? 2 * node : 2 * node + 1, far = near ^ 1;
+            if (difference < 0) {
+                search(near, begin, middle, !vertical, qx, qy, nearest, best);
+                if (difference*difference / maximumWeights[far] < best)
+                    search(far, middle, end, !vertical, qx, qy, nearest, best);
+            } else {
+                search(near, middle, end, !vertical, qx, qy, nearest, best);
+                if (difference*difference / maximumWeights[far] < best)
+                    search(far, begin, middle, !vertical, qx, qy, nearest, best);
+            }
+        }
+
+    public:
+        explicit PoincareTree(const vector<double>& sites) {
+            size_t n = sites.size() / 2;
+            vector<double> poincare(2 * n);
+            batch_to_poincare(sites.data(), poincare.data(), n);
+            for (size_t i = 0; i < n; i++) {
+                x.push_back(poincare[2*i]);
+                y.push_back(poincare[2*i + 1]);
+                double c = cosh(sites[2*i] / 2);
+                weights.push_back(1 / (c*c));
+            }
+            order.resize(n);
+            iota(order.begin(), order.end(), 0);
+
+            size_t leaves = 1;
+            while (leaves * LEAF_SIZE < n) leaves *= 2;
+            splits.resize(2 * leaves);
+            maximumWeights.resize(2 * leaves);
+            build(1, 0, n, true);
+        }
+
+        [[nodiscard]] uint64_t nearest(double r, double theta) const {
+            double qx, qy, query[2] = {r, theta}, poincare[2];
+            batch_to_poincare(query, poincare, 1);
+            qx = poincare[0];
+            qy = poincare[1];
+            uint64_t nearest = 0;
+            double best = INFINITY;
+            search(1, 0, order.size(), true, qx, qy, nearest, best);
+            return nearest;
+        }
+    };
+
+    // the site closest to (r, theta), found by calculating the distances to all sites
+    uint64_t brute_force_nearest(const vector<double>& sites, double r, double theta, vector<double>& distances) {
+        size_t n = sites.size() / 2;
+        batch_distance(Point<double>(r, theta), sites.data(), distances.data(), n);
+        return min_element(distances.begin(), distances.end()) - distances.begin();
+    }
+
+    /**
+     * answers the queries on a pool of worker threads and returns the time in nanoseconds per query. query(r, theta,
+     * worker) returns the ID of the site closest to (r, theta)
+     * */
+    template<class F>
+    double run_queries(const vector<double>& queries, size_t n, unsigned int threads, vector<uint64_t>& result,
+                       F&& query) {
+        constexpr size_t QUERIES_PER_JOB = 4096;
+        result.resize(n);
+        double ms = milliseconds([&]() {
+            parallel_for((n + QUERIES_PER_JOB - 1) / QUERIES_PER_JOB, threads, [&](size_t job, unsigned int worker) {
+                for (size_t i = job * QUERIES_PER_JOB; i < min(n, (job + 1) * QUERIES_PER_JOB); i++)
+                    result[i] = query(queries[2*i], queries[2*i + 1], worker);
+            });
+        });
+        return ms * 1e6 / static_cast<double>(n);
+    }
+
+    // the number of the first n queries whose site is farther away than the one in reference
+    size_t count_errors(const vector<double>& sites, const vector<double>& queries, const vector<uint64_t>& result,
+                        const vector<uint64_t>& reference, size_t n) {
+        size_t errors = 0;
+        for (size_t i = 0; i < n; i++) {
+            double r = queries[2*i], theta = queries[2*i + 1];
+            uint64_t a = result[i], b = reference[i];
+            if (half_chord_sq(r, theta, sites[2*a], sites[2*a + 1]) > half_chord_sq(r, theta, sites[2*b], sites[2*b + 1]))
+                errors++;
+        }
+        return errors;
+    }
+}
+
+int main(int argc, char* argv[]) {
+    cxxopts::Options options(argv[0], "Compares nearest site queries of the Delaunay walk, brute force and a KD-tree.");
+
+    options.add_options()
+            ("N", "Numbers of sites", cxxopts::value<vector<int>>()->default_value("10000,100000,1000000"))
+            ("q,queries", "Number of queries", cxxopts::value<int>()->default_value("1000000"))
+            ("b,brute", "Number of queries answered by brute force", cxxopts::value<int>()->default_value("1000"))
+            ("j,threads", "Number of worker threads.  0 uses one thread per core", cxxopts::value<unsigned int>()->default_value("1"))
+            ("r,repetitions", "Number of repetitions per configuration", cxxopts::value<int>()->default_value("3"))
+            ("s,seed", "Seed used for sampling the sites and the queries", cxxopts::value<unsigned int>()->default_value("1"))
+            ("h,help", "Print usage");
+
+    auto result = options.parse(argc, argv);
+
+    if (result.count("help")) {
+        cout << options.help() << endl;
+        exit(0);
+    }
+
+    int repetitions = result["r"].as<int>();
+    unsigned int seed = result["s"].as<unsigned int>();
+    unsigned int threads = result["j"].as<unsigned int>();
+    auto q = static_cast<size_t>(result["q"].as<int>());
+
+    cout << setw(10) << "N" << setw(8) << "method" << setw(12) << "build ms" << setw(14) << "ns/query"
+         << setw(12) << "steps" << setw(10) << "errors" << "\n";
+
+    for (int N : result["N"].as<vector<int>>()) {
+        vector<Point<double>> sites = sample_sites(N, seed);
+        vector<double> coordinates = flatten(sites), queries = flatten(sample_sites(static_cast<int>(q), seed + 1));
+        auto brute = min(q, static_cast<size_t>(result["b"].as<int>()));
+
+        VoronoiDiagram v;
+        FortuneHyperbolicImplementation<FullNativeKernel<double>, double> fortune(v, sites);
+        fortune.calculate();
+
+        // the minimum over all repetitions is least affected by noise
+        vector<uint64_t> reference, walk, tree;
+        double brute_ns = INFINITY;
+        vector<vector<double>> distances(number_of_workers(threads, brute), vector<double>(N));
+        for (int i = 0; i < repetitions; i++)
+            brute_ns = min(brute_ns, run_queries(queries, brute, threads, reference, [&](double r, double theta, unsigned int worker) {
+                return brute_force_nearest(coordinates, r, theta, distances[worker]);
+            }));
+
+        double walk_build_ms = INFINITY, walk_ns = INFINITY;
+        size_t steps = 0;
+        for (int i = 0; i < repetitions; i++) {
+            walk_build_ms = min(walk_build_ms, milliseconds([&]() {
+                NearestSiteIndex index(coordinates.data(), N, v.edgeSites.data(), v.numberOfEdges());
+            }));
+            NearestSiteIndex index(coordinates.data(), N, v.edgeSites.data(), v.numberOfEdges());
+            walk_ns = min(walk_ns, run_queries(queries, q, threads, walk, [&](double r, double theta, unsigned int) {
+                return index.nearest(r, theta);
+            }));
+            steps = 0;
+            for (size_t j = 0; j < q; j++) (void) index.nearest(queries[2*j], queries[2*j + 1], &steps);
+        }
+
+        double tree_build_ms = INFINITY, tree_ns = INFINITY;
+        for (int i = 0; i < repetitions; i++) {
+            tree_build_ms = min(tree_build_ms, milliseconds([&]() { PoincareTree t(coordinates); }));
+            PoincareTree t(coordinates);
+            tree_ns = min(tree_ns, run_queries(queries, q, threads, tree, [&](double r, double theta, unsigned int) {
+                return t.nearest(r, theta);
+            }));
+        }
+
+        cout << fixed << setprecision(1);
+        cout << setw(10) << N << setw(8) << "brute" << setw(12) << 0.0 << setw(14) << brute_ns << setw(12) << "-"
+             << setw(10) << 0 << "\n";
+        cout << setw(10) << N << setw(8) << "walk" << setw(12) << walk_build_ms << setw(14) << walk_ns << setw(12)
+             << setprecision(2) << static_cast<double>(steps) / static_cast<double>(q) << setprecision(1) << setw(10)
+             << count_errors(coordinates, queries, walk, reference, brute) << "\n";
+        cout << setw(10) << N << setw(8) << "kd-tree" << setw(12) << tree_build_ms << setw(14) << tree_ns << setw(12)
+             << "-" << setw(10) << count_errors(coordinates, queries, tree, reference, brute) << "\n";
+    }
+
+    return 0;
+}
@@ -0,0 +1,87 @@
+#include <gtest/gtest.h>
+
+#include "batch_geometry.h"
+#include "fortune.h"
+#include "kernels.h"
+#include "nearest_site.h"
+
+#include <cmath>
+#include <random>
+#include <vector>
+
+using namespace hyperbolic;
+
+namespace {
+    vector<Point<double>> random_sites(int n, double R, unsigned int seed) {
+        std::mt19937 rng(seed);
+        std::uniform_real_distribution<double> uniform(0.0, 1.0);
+        vector<Point<double>> sites;
+        for (int i = 0; i < n; i++)
+            sites.emplace_back(acosh(1 + (cosh(R) - 1) * uniform(rng)), 2 * M_PI * uniform(rng));
+        return sites;
+    }
+
+    // the distance between p and the site closest to it
+    double nearest_distance(const vector<Point<double>>& sites, const Point<double>& p) {
+        double best = INFINITY;
+        for (const Point<double>& s : sites)
+            best = std::min(best, half_chord_sq(p.r, p.theta, s.r, s.theta));
+        return best;
+    }
+}
+
+TEST(NearestSiteTest, WalksEndAtTheNearestSite) {
+    vector<Point<double>> sites = random_sites(2000, 12, 3);
+    VoronoiDiagram v;
+    FortuneHyperbolicImplementation<FullNativeKernel<double>, double> fortune(v, sites);
+    fortune.calculate();
+    NearestSiteIndex index(sites, v);
+    ASSERT_EQ(sites.size(), index.numberOfSites());
+
+    // queries close to the sites, spread over the disk, beyond the last site and at the origin
+    vector<Point<double>> queries = random_sites(5000, 12.5, 4);
+    queries.emplace_back(0, 0);
+    queries.emplace_back(20, 1);
+    for (const Point<double>& query : queries) {
+        uint64_t site = index.nearest(query);
+        ASSERT_LT(site, sites.size());
+        // the index evaluates the distances differently, which only matters for ties
+        EXPECT_LE(half_chord_sq(query.r, query.theta, sites[site].r, sites[site].theta),
+                  nearest_distance(sites, query) * (1 + 1e-12));
+    }
+    for (uint64_t i = 0; i < sites.size(); i++)
+        EXPECT_EQ(i, index.nearest(sites[i]));
+}
+
+TEST(NearestSiteTest, BatchesMatchSingleQueries) {
+    vector<Point<double>> sites = random_sites(1000, 11, 5);
+    VoronoiDiagram v;
+    FortuneHyperbolicImplementation<FullNativeKernel<double>, double> fortune(v, sites);
+    fortune.calculate();
+
+    vector<double> coordinates;
+    for (const Point<double>& p : sites) {
+        coordinates.push_back(p.r);
+        coordinates.push_back(p.theta);
+    }
+    NearestSiteIndex index(coordinates.data(), sites.size(), v.edgeSites.data(), v.numberOfEdges());
+
+    vector<Point<double>> queries = random_sites(10000, 11, 6);
+    vector<double> queryCoordinates;
+    for (const Point<double>& q : queries) {
+        queryCoordinates.push_back(q.r);
+        queryCoordinates.push_back(q.theta);
+    }
+    vector<uint64_t> result(queries.size());
+    index.nearest(queryCoordinates.data(), result.data(), queries.size(), 4);
+    EXPECT_EQ(result, index.nearest(queries, 3));
+    for (size_t i = 0; i < queries.size(); i++)
+        EXPECT_EQ(index.nearest(queries[i]), result[i]);
+}
+
+TEST(NearestSiteTest, SingleSite) {
+    vector<double> site = {1.0, 2.0};
+    NearestSiteIndex index(site.data(), 1, nullptr, 0);
+    EXPECT_EQ(0u, index.nearest(Point<double>(5, 0)));
+    EXPECT_EQ(0u, index.nearest(Point<double>(0, 0)));
+}
@@ -0,0 +1,59 @@
+#pragma once
+
+#include <algorithm>
+#include <atomic>
+#include <cstddef>
+#include <exception>
+#include <mutex>
+#include <thread>
+#include <vector>
+
+namespace hyperbolic {
+    /**
+     * returns the number of worker threads to use when threads are requested. 0 selects one worker per hardware thread
+     * */
+    inline unsigned int number_of_workers(unsigned int threads, size_t jobs) {
+        if (threads == 0) threads = std::max(1u, std::thread::hardware_concurrency());
+        return static_cast<unsigned int>(std::min<size_t>(threads, std::max<size_t>(jobs, 1)));
+    }
+
+    /**
+     * Calls job(i, worker) for every i in [0, n) on a pool of worker threads. Jobs are handed out dynamically, so
+     * jobs of different sizes are balanced across the workers. worker is the index of the executing thread in
+     * [0, number_of_workers(threads, n)) and can be used to address per-worker state. The first exception thrown by
+     * a job is re-thrown in the calling thread after all workers finished.
+     * */
+    template<class F>
+    void parallel_for(size_t n, unsigned int threads, F&& job) {
+        unsigned int workers = number_of_workers(threads, n);
+        if (workers <= 1) {
+            for (size_t i = 0; i < n; i++) job(i, 0u);
+            return;
+        }
+
+        std::atomic<size_t> next = 0;
+        std::exception_ptr error = nullptr;
+        std::mutex error_mutex;
+
+        auto work = [&](unsigned int worker) {
+            for (size_t i = next++; i < n; i = next++) {
+                try {
+                    job(i, worker);
+                } catch (...) {
+                    std::lock_guard<std::mutex> lock(error_mutex);
+                    if (!error) error = std::current_exception();
+                    next = n;
+                }
+            }
+        };
+
+        std::vector<std::thread> pool;
+        pool.reserve(workers - 1);
+        for (unsigned int worker = 1; worker < workers; worker++)
+            pool.emplace_back(work, worker);
+        work(0);
+        for (auto& t : pool) t.join();
+
+        if (error) std::rethrow_exception(error);
+    }
+}
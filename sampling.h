@@ -0,0 +1,65 @@
+#pragma once
+
+#include <cmath>
+#include <cstddef>
+#include <cstdint>
+#include <vector>
+
+#include "geometry.h"
+
+namespace hyperbolic {
+    /**
+     * disk radius for which N sites sampled with the given alpha yield the desired average degree in the
+     * corresponding hyperbolic random graph
+     * */
+    inline double disk_radius(double N, double alpha, double degree) {
+        double alpha_fraction = alpha / (alpha - 0.5);
+        return 2.0 * std::log(2.0 * N / (M_PI * degree) * (alpha_fraction * alpha_fraction));
+    }
+
+    // finalizer of SplitMix64, a bijection on 64-bit integers whose outputs look independent for consecutive inputs
+    inline uint64_t mix64(uint64_t z) {
+        z = (z ^ (z >> 30)) * 0xbf58476d1ce4e5b9;
+        z = (z ^ (z >> 27)) * 0x94d049bb133111eb;
+        return z ^ (z >> 31);
+    }
+
+    /**
+     * counter-based pseudo random number generator. The i-th random number of a stream is a hash of the seed, the
+     * stream and i, so it does not depend on which other numbers were drawn before, in which order or on which
+     * thread. Hence, the samples of a run can be generated in parallel and each of them can be regenerated on its own.
+     * */
+    class CounterRandom {
+    private:
+        static constexpr uint64_t GOLDEN_GAMMA = 0x9e3779b97f4a7c15;
+        uint64_t key;
+    public:
+        CounterRandom(uint64_t seed, uint64_t stream) : key(mix64(seed + mix64(stream + GOLDEN_GAMMA))) {};
+
+        uint64_t bits(uint64_t counter) const {
+            return mix64(key + (counter + 1) * GOLDEN_GAMMA);
+        }
+
+        // uniformly distributed in [0, 1), using the upper 53 bits
+        double uniform(uint64_t counter) const {
+            return static_cast<double>(bits(counter) >> 11) * 0x1.0p-53;
+        }
+    };
+
+    /**
+     * samples N sites within a disk of radius R. The angular coordinates are uniform and the radial ones have density
+     * proportional to sinh(alpha * r), i.e., alpha = 1 samples uniformly with respect to the hyperbolic area.
+     * Site i only depends on the random numbers 2i and 2i + 1 of the stream.
+     * */
+    inline std::vector<Point<double>> sample_sites(size_t N, double R, double alpha, const CounterRandom& random) {
+        double cosh_alpha_R_minus_one = std::cosh(alpha * R) - 1;
+        std::vector<Point<double>> sites;
+        sites.reserve(N);
+        for (size_t i = 0; i < N; i++) {
+            double angle = random.uniform(2 * i) * 2 * M_PI;
+            double radius = std::acosh(1 + cosh_alpha_R_minus_one * random.uniform(2 * i + 1)) / alpha;
+            sites.emplace_back(radius, angle);
+        }
+        return sites;
+    }
+}
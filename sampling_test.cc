@@ -0,0 +1,49 @@
+#include <gtest/gtest.h>
+
+#include "sampling.h"
+
+#include <cmath>
+#include <vector>
+
+using namespace hyperbolic;
+
+TEST(SamplingTest, StreamsAreReproducibleAndIndependent) {
+    CounterRandom random(42, 7);
+    // the numbers do not depend on the order in which they are drawn
+    uint64_t later = random.bits(1000);
+    EXPECT_EQ(random.bits(3), CounterRandom(42, 7).bits(3));
+    EXPECT_EQ(later, CounterRandom(42, 7).bits(1000));
+
+    EXPECT_NE(random.bits(0), CounterRandom(42, 8).bits(0));
+    EXPECT_NE(random.bits(0), CounterRandom(43, 7).bits(0));
+    EXPECT_NE(random.bits(0), random.bits(1));
+}
+
+TEST(SamplingTest, SitesAreReproducibleAndWithinTheDisk) {
+    double R = 12.5;
+    std::vector<Point<double>> sites = sample_sites(10000, R, 1.0, CounterRandom(1, 2));
+    std::vector<Point<double>> again = sample_sites(10000, R, 1.0, CounterRandom(1, 2));
+    // prefixes of larger samples are the smaller samples
+    std::vector<Point<double>> prefix = sample_sites(100, R, 1.0, CounterRandom(1, 2));
+    ASSERT_EQ(10000u, sites.size());
+
+    double mean_r = 0, mean_theta = 0;
+    for (size_t i = 0; i < sites.size(); i++) {
+        EXPECT_EQ(sites[i].r, again[i].r);
+        EXPECT_EQ(sites[i].theta, again[i].theta);
+        if (i < prefix.size()) {
+            EXPECT_EQ(sites[i].r, prefix[i].r);
+            EXPECT_EQ(sites[i].theta, prefix[i].theta);
+        }
+        EXPECT_GE(sites[i].r, 0);
+        EXPECT_LE(sites[i].r, R);
+        EXPECT_GE(sites[i].theta, 0);
+        EXPECT_LT(sites[i].theta, 2 * M_PI);
+        mean_r += sites[i].r / sites.size();
+        mean_theta += sites[i].theta / sites.size();
+    }
+
+    // for uniform sites, the expected distance to the boundary is about 1
+    EXPECT_NEAR(R - 1, mean_r, 0.05);
+    EXPECT_NEAR(M_PI, mean_theta, 0.05);
+}
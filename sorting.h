@@ -0,0 +1,67 @@
+#pragma once
+
+#include <algorithm>
+#include <array>
+#include <cstdint>
+#include <cstring>
+#include <numeric>
+#include <vector>
+
+namespace hyperbolic {
+    /**
+     * maps a double to an unsigned integer such that the order of the integers matches the order of the doubles
+     * (negative values have all bits flipped, non-negative values only their sign bit). -0.0 is mapped to the key of
+     * 0.0, since the two compare equal.
+     * */
+    inline uint64_t order_preserving_key(double x) {
+        if (x == 0.0) x = 0.0;
+        uint64_t bits;
+        std::memcpy(&bits, &x, sizeof(bits));
+        return (bits & (uint64_t(1) << 63)) ? ~bits : bits | (uint64_t(1) << 63);
+    }
+
+    // below this number of keys a comparison sort is faster than the radix sort
+    constexpr size_t RADIX_SORT_THRESHOLD = 1 << 12;
+
+    /**
+     * Returns the permutation that sorts the keys in increasing order, i.e., keys[order[0]] <= keys[order[1]] <= ...
+     * The sort is stable, so equal keys stay in the order of their indices. Large inputs are sorted with a least
+     * significant digit radix sort on the bit patterns of the keys (11 bits per pass, passes in which all keys share
+     * the same digit are skipped), small ones with std::stable_sort.
+     * */
+    inline std::vector<size_t> get_sorted_order(const std::vector<double>& keys) {
+        std::vector<size_t> order(keys.size());
+        std::iota(order.begin(), order.end(), 0);
+
+        if (keys.size() < RADIX_SORT_THRESHOLD) {
+            std::stable_sort(order.begin(), order.end(), [&](size_t a, size_t b) { return keys[a] < keys[b]; });
+            return order;
+        }
+
+        constexpr int BITS = 11;
+        constexpr size_t BUCKETS = size_t(1) << BITS;
+
+        std::vector<uint64_t> bits(keys.size());
+        std::transform(keys.begin(), keys.end(), bits.begin(), order_preserving_key);
+
+        std::vector<size_t> buffer(keys.size());
+        std::vector<size_t> counts(BUCKETS);
+        for (int shift = 0; shift < 64; shift += BITS) {
+            std::fill(counts.begin(), counts.end(), 0);
+            for (uint64_t b : bits)
+                counts[(b >> shift) & (BUCKETS - 1)]++;
+            if (counts[(bits[0] >> shift) & (BUCKETS - 1)] == keys.size()) continue;
+
+            size_t sum = 0;
+            for (size_t& c : counts) {
+                size_t count = c;
+                c = sum;
+                sum += count;
+            }
+            for (size_t i : order)
+                buffer[counts[(bits[i] >> shift) & (BUCKETS - 1)]++] = i;
+            order.swap(buffer);
+        }
+        return order;
+    }
+}
@@ -0,0 +1,85 @@
+#pragma once
+
+#include <chrono>
+#include <ostream>
+#include <string>
+
+#include "datastructures.h"
+
+namespace hyperbolic {
+    /**
+     * counters and phase timings of a single run of the sweep. They are only collected by a
+     * FortuneHyperbolicImplementation whose collectStatistics parameter is set, all other instantiations do not
+     * contain any of the instrumentation
+     * */
+    struct SweepStatistics {
+        // number of site events (including the two sites the beach line is initialized with) and circle events that
+        // created a vertex
+        unsigned long long siteEvents = 0, circleEvents = 0;
+        // number of invalidated circle events that were popped from the queue and skipped
+        unsigned long long invalidCircleEvents = 0;
+        // number of evaluations of the before predicate during the beach line searches
+        unsigned long long beforeCalls = 0;
+        // evaluations of the before predicate that finger searches saved compared to searches from the root. Negative
+        // if the finger searches needed more evaluations
+        long long savedBeforeCalls = 0;
+        // circle event predictions answered from the kernel's cache and those that had to be calculated
+        unsigned long long cacheHits = 0, cacheMisses = 0;
+        // maximum number of elements in the beach line
+        unsigned long long maximumBeachLineSize = 0;
+        EventQueueStatistics circleEventQueue;
+
+        // time in nanoseconds spent on searching the beach line, on splitting and merging the treap, on predicting
+        // circle events, on operations of the event queue and on the whole sweep
+        unsigned long long searchNanoseconds = 0, treapNanoseconds = 0, predictionNanoseconds = 0;
+        unsigned long long queueNanoseconds = 0, totalNanoseconds = 0;
+    };
+
+    /**
+     * adds the time between its construction and its destruction to a phase timer. Disabled timers are empty and
+     * compiled away
+     * */
+    template<bool enabled>
+    class PhaseTimer {
+    private:
+        unsigned long long& nanoseconds;
+        std::chrono::steady_clock::time_point begin;
+    public:
+        explicit PhaseTimer(unsigned long long& nanoseconds)
+                : nanoseconds(nanoseconds), begin(std::chrono::steady_clock::now()) {};
+
+        ~PhaseTimer() {
+            nanoseconds += std::chrono::duration_cast<std::chrono::nanoseconds>(std::chrono::steady_clock::now() - begin).count();
+        }
+    };
+
+    template<>
+    class PhaseTimer<false> {
+    public:
+        explicit PhaseTimer(unsigned long long&) {};
+    };
+
+    // writes the statistics as a JSON object whose lines (except the first) are indented by indent spaces
+    inline void write_json(std::ostream& out, const SweepStatistics& s, int indent = 0) {
+        std::string i(indent + 2, ' '), j(indent + 4, ' ');
+        out << "{\n"
+            << i << "\"events\": {\"site\": " << s.siteEvents << ", \"circle\": " << s.circleEvents
+            << ", \"invalid\": " << s.invalidCircleEvents << "},\n"
+            << i << "\"before_calls\": " << s.beforeCalls << ",\n"
+            << i << "\"saved_before_calls\": " << s.savedBeforeCalls << ",\n"
+            << i << "\"circle_event_cache\": {\"hits\": " << s.cacheHits << ", \"misses\": " << s.cacheMisses << "},\n"
+            << i << "\"maximum_beach_line_size\": " << s.maximumBeachLineSize << ",\n"
+            << i << "\"circle_event_queue\": {\"pushed\": " << s.circleEventQueue.pushed
+            << ", \"invalidated\": " << s.circleEventQueue.invalidated << ", \"skipped\": " << s.circleEventQueue.skipped
+            << ", \"compacted\": " << s.circleEventQueue.compacted
+            << ", \"compactions\": " << s.circleEventQueue.compactions << "},\n"
+            << i << "\"nanoseconds\": {\n"
+            << j << "\"search\": " << s.searchNanoseconds << ",\n"
+            << j << "\"treap\": " << s.treapNanoseconds << ",\n"
+            << j << "\"prediction\": " << s.predictionNanoseconds << ",\n"
+            << j << "\"queue\": " << s.queueNanoseconds << ",\n"
+            << j << "\"total\": " << s.totalNanoseconds << "\n"
+            << i << "}\n"
+            << std::string(indent, ' ') << "}";
+    }
+}
@@ -0,0 +1,284 @@
+#pragma once
+
+#include <cmath>
+#include <cstddef>
+#include <cstdint>
+#include <algorithm>
+#include <vector>
+
+#include "geometry.h"
+
+/*
+ * adjacency structures derived from a Voronoi diagram in time linear in its size. Like the functions in
+ * batch_geometry.h, they read the arrays of a VoronoiDiagram through pointers, so that they also work on diagrams
+ * that were read from files or handed over from NumPy.
+ * */
+
+namespace hyperbolic {
+    /**
+     * the Delaunay graph in compressed sparse row format. The neighbors of site i are neighbors[offsets[i]] to
+     * neighbors[offsets[i + 1] - 1], sorted by ID and without duplicates
+     * */
+    struct DelaunayGraph {
+        vector<uint64_t> offsets;
+        vector<uint64_t> neighbors;
+
+        [[nodiscard]] size_t numberOfSites() const {
+            return offsets.empty() ? 0 : offsets.size() - 1;
+        }
+
+        [[nodiscard]] size_t degree(size_t i) const {
+            return offsets[i + 1] - offsets[i];
+        }
+    };
+
+    /**
+     * the boundaries of the Voronoi cells. The boundary of the cell of site i consists of the edges
+     * edges[offsets[i]] to edges[offsets[i + 1] - 1] in counterclockwise order around the site, and edge k ends at
+     * vertices[k], which is also where edge k + 1 (or the first edge of the cell) begins. The boundary of an unbounded
+     * cell consists of one or more chains, each of which begins and ends at VoronoiDiagram::NO_VERTEX. Other than in
+     * the Euclidean plane, there can be several of them, since the bisectors of three sites do not always intersect
+     * */
+    struct VoronoiCells {
+        vector<uint64_t> offsets;
+        vector<uint64_t> edges;
+        vector<int64_t> vertices;
+
+        [[nodiscard]] size_t numberOfSites() const {
+            return offsets.empty() ? 0 : offsets.size() - 1;
+        }
+    };
+
+    /**
+     * builds the Delaunay graph of the sites with IDs in [0, numberOfSites) from the site pairs of the edges, which are
+     * stored as in VoronoiDiagram::edgeSites. Pairs of identical sites are ignored. The pairs are bucketed by their
+     * second site first, so that collecting them by their first site yields sorted neighbor lists, in which
+     * duplicates are adjacent
+     * */
+    inline DelaunayGraph delaunay_graph(const uint64_t* edgeSites, size_t numberOfEdges, size_t numberOfSites) {
+        // the (directed) pairs bucketed by their second site
+        vector<uint64_t> offsets(numberOfSites + 1, 0), sources(2 * numberOfEdges);
+        for (size_t i = 0; i < 2 * numberOfEdges; i += 2) {
+            if (edgeSites[i] == edgeSites[i + 1]) continue;
+            offsets[edgeSites[i] + 1]++;
+            offsets[edgeSites[i + 1] + 1]++;
+        }
+        for (size_t i = 0; i < numberOfSites; i++)
+            offsets[i + 1] += offsets[i];
+        vector<uint64_t> next(offsets.begin(), offsets.end() - 1);
+        for (size_t i = 0; i < 2 * numberOfEdges; i += 2) {
+            uint64_t a = edgeSites[i], b = edgeSites[i + 1];
+            if (a == b) continue;
+            sources[next[b]++] = a;
+            sources[next[a]++] = b;
+        }
+
+        DelaunayGraph graph;
+        graph.offsets = offsets;
+        graph.neighbors.resize(offsets[numberOfSites]);
+        std::copy(offsets.begin(), offsets.end() - 1, next.begin());
+        for (uint64_t b = 0; b < numberOfSites; b++) {
+            for (uint64_t k = offsets[b]; k < offsets[b + 1]; k++)
+                graph.neighbors[next[sources[k]]++] = b;
+        }
+
+        // removes the duplicates, compacting the lists in place
+        uint64_t size = 0;
+        for (size_t i = 0; i < numberOfSites; i++) {
+            uint64_t begin = graph.offsets[i], end = graph.offsets[i + 1];
+            graph.offsets[i] = size;
+            for (uint64_t k = begin; k < end; k++) {
+                if (k == begin || graph.neighbors[k] != graph.neighbors[k - 1])
+                    graph.neighbors[size++] = graph.neighbors[k];
+            }
+        }
+        graph.offsets[numberOfSites] = size;
+        graph.neighbors.resize(size);
+        return graph;
+    }
+
+    inline DelaunayGraph delaunay_graph(const VoronoiDiagram& v, size_t numberOfSites) {
+        return delaunay_graph(v.edgeSites.data(), v.numberOfEdges(), numberOfSites);
+    }
+
+    /**
+     * the direction in which p is seen from s, as (x, y) coordinates in the hyperboloid model after moving s to the
+     * origin. The x-coordinate sinh(r_p)*cos(theta)*cosh(r_s) - cosh(r_p)*sinh(r_s) of the translated point is
+     * evaluated without cancellation, since neighboring sites and vertices are close to each other but far from the
+     * origin
+     * */
+    inline void direction_from(const Point<double>& s, const Point<double>& p, double& x, double& y) {
+        double sinh_r = std::sinh(p.r), delta = p.theta - s.theta, sin_half_delta = std::sin(delta / 2);
+        x = std::sinh(p.r - s.r) - 2*sinh_r*std::cosh(s.r)*sin_half_delta*sin_half_delta;
+        y = sinh_r*std::sin(delta);
+    }
+
+    /**
+     * orders the edges of every Voronoi cell along its boundary. sites holds the (r, theta) coordinates of the sites
+     * with IDs in [0, numberOfSites), the other arrays are stored as in a VoronoiDiagram. The edges of a cell are
+     * chained by their shared vertices in time linear in their number. Each chain is oriented counterclockwise using
+     * the sites on the other side of two consecutive edges, which form a Delaunay triangle with the site and are hence
+     * less than M_PI apart as seen from it. The chains of a cell are then sorted by the angle of one of their points
+     * */
+    inline VoronoiCells voronoi_cells(const double* sites, size_t numberOfSites, const double* vertexCoordinates,
+                                      size_t numberOfVertices, const uint64_t* edgeSites, const int64_t* edgeVertices,
+                                      size_t numberOfEdges) {
+        constexpr int64_t NO_VERTEX = VoronoiDiagram::NO_VERTEX;
+        auto site = [&](uint64_t i) { return Point<double>(sites[2*i], sites[2*i + 1]); };
+
+        VoronoiCells cells;
+        // the edges incident to each site
+        cells.offsets.assign(numberOfSites + 1, 0);
+        for (size_t i = 0; i < 2 * numberOfEdges; i++)
+            cells.offsets[edgeSites[i] + 1]++;
+        for (size_t i = 0; i < numberOfSites; i++)
+            cells.offsets[i + 1] += cells.offsets[i];
+        vector<uint64_t> incident(2 * numberOfEdges);
+        vector<uint64_t> next(cells.offsets.begin(), cells.offsets.end() - 1);
+        for (size_t i = 0; i < 2 * numberOfEdges; i++)
+            incident[next[edgeSites[i]]++] = i / 2;
+
+        cells.edges.resize(2 * numberOfEdges);
+        cells.vertices.resize(2 * numberOfEdges);
+        // the (at most two) edges of the current cell at each vertex, reset after every cell
+        vector<int64_t> edgesAtVertex(2 * numberOfVertices, -1);
+        // whether the edges of the current cell are already part of a chain
+        vector<char> chained;
+        // the chains of the current cell. Edge k of a chain runs from chainBegins[k] to chainEnds[k]
+        struct Chain {
+            size_t begin, end;
+            double angle;
+        };
+        vector<Chain> chains;
+        vector<uint64_t> chainEdges;
+        vector<int64_t> chainBegins, chainEnds;
+
+        auto other_end = [&](uint64_t edge, int64_t end) {
+            return (edgeVertices[2*edge] == end) ? edgeVertices[2*edge + 1] : edgeVertices[2*edge];
+        };
+
+        for (size_t s = 0; s < numberOfSites; s++) {
+            uint64_t first = cells.offsets[s], last = cells.offsets[s + 1];
+            size_t n = last - first;
+            const uint64_t* cellEdges = incident.data() + first;
+            for (size_t k = 0; k < n; k++) {
+                for (int end = 0; end < 2; end++) {
+                    int64_t x = edgeVertices[2*cellEdges[k] + end];
+                    if (x == NO_VERTEX) continue;
+                    if (edgesAtVertex[2*x] < 0) edgesAtVertex[2*x] = static_cast<int64_t>(k);
+                    else if (edgesAtVertex[2*x + 1] < 0) edgesAtVertex[2*x + 1] = static_cast<int64_t>(k);
+                }
+            }
+            // the other edge of the cell at vertex x, if any
+            auto continuation = [&](int64_t x, size_t k) -> int64_t {
+                if (x == NO_VERTEX) return -1;
+                int64_t e = (edgesAtVertex[2*x] == static_cast<int64_t>(k)) ? edgesAtVertex[2*x + 1] : edgesAtVertex[2*x];
+                return (e >= 0 && !chained[e]) ? e : -1;
+            };
+            // whether edge k can begin an open chain, i.e., whether one of its ends has no vertex or no other edge
+            auto open_end = [&](size_t k, int64_t& end) {
+                for (int i = 0; i < 2; i++) {
+                    end = edgeVertices[2*cellEdges[k] + i];
+                    if (end == NO_VERTEX || (edgesAtVertex[2*end] < 0 || edgesAtVertex[2*end + 1] < 0))
+                        return true;
+                }
+                return false;
+            };
+            auto neighbor = [&](uint64_t edge) {
+                return (edgeSites[2*edge] == s) ? edgeSites[2*edge + 1] : edgeSites[2*edge];
+            };
+            // the angle at which p is seen from the site
+            auto angle = [&](const Point<double>& p) {
+                double x, y;
+                direction_from(site(s), p, x, y);
+                return std::atan2(y, x);
+            };
+            // reverses the chain in [begin, end) if it runs clockwise
+            auto orient = [&](size_t begin, size_t end) {
+                if (end - begin < 2) return;
+                double x_a, y_a, x_b, y_b;
+                direction_from(site(s), site(neighbor(chainEdges[begin])), x_a, y_a);
+                direction_from(site(s), site(neighbor(chainEdges[begin + 1])), x_b, y_b);
+                if (x_a*y_b - y_a*x_b < 0) {
+                    std::reverse(chainEdges.begin() + begin, chainEdges.begin() + end);
+                    std::reverse(chainBegins.begin() + begin, chainBegins.begin() + end);
+                    std::reverse(chainEnds.begin() + begin, chainEnds.begin() + end);
+                    std::swap_ranges(chainBegins.begin() + begin, chainBegins.begin() + end, chainEnds.begin() + begin);
+                }
+            };
+            // the angle of a point on the chain in [begin, end), i.e., of one of its vertices or, if it has none, of
+            // the site on the other side of its edge, which is seen in the direction of the nearest point of the edge
+            auto chain_angle = [&](size_t begin, size_t end) {
+                for (size_t k = begin; k < end; k++) {
+                    if (chainEnds[k] != NO_VERTEX)
+                        return angle(Point<double>(vertexCoordinates[2*chainEnds[k]], vertexCoordinates[2*chainEnds[k] + 1]));
+                }
+                return angle(site(neighbor(chainEdges[begin])));
+            };
+
+            chained.assign(n, 0);
+            chainEdges.clear();
+            chainBegins.clear();
+            chainEnds.clear();
+            chains.clear();
+            // open chains first, then cycles
+            for (int pass = 0; pass < 2; pass++) {
+                for (size_t start = 0; start < n; start++) {
+                    int64_t begin;
+                    if (chained[start]) continue;
+                    if (!open_end(start, begin)) {
+                        if (pass == 0) continue;
+                        begin = edgeVertices[2*cellEdges[start]];
+                    }
+                    size_t chainStart = chainEdges.size();
+                    for (int64_t k = static_cast<int64_t>(start); k >= 0;) {
+                        chained[k] = 1;
+                        int64_t end = other_end(cellEdges[k], begin);
+                        chainEdges.push_back(cellEdges[k]);
+                        chainBegins.push_back(begin);
+                        chainEnds.push_back(end);
+                        k = continuation(end, k);
+                        begin = end;
+                    }
+                    // an open chain begins and ends without a vertex
+                    if (pass == 0) chainBegins[chainStart] = chainEnds.back() = NO_VERTEX;
+                    orient(chainStart, chainEdges.size());
+                    chains.push_back({chainStart, chainEdges.size(), 0});
+                }
+            }
+
+            // the chains in counterclockwise order
+            if (chains.size() > 1) {
+                for (Chain& chain : chains)
+                    chain.angle = chain_angle(chain.begin, chain.end);
+                std::sort(chains.begin(), chains.end(), [](const Chain& a, const Chain& b) { return a.angle < b.angle; });
+            }
+            uint64_t position = first;
+            for (const Chain& chain : chains) {
+                for (size_t k = chain.begin; k < chain.end; k++, position++) {
+                    cells.edges[position] = chainEdges[k];
+                    cells.vertices[position] = chainEnds[k];
+                }
+            }
+
+            for (size_t k = 0; k < n; k++) {
+                for (int end = 0; end < 2; end++) {
+                    int64_t x = edgeVertices[2*cellEdges[k] + end];
+                    if (x != NO_VERTEX) edgesAtVertex[2*x] = edgesAtVertex[2*x + 1] = -1;
+                }
+            }
+        }
+        return cells;
+    }
+
+    inline VoronoiCells voronoi_cells(const VoronoiDiagram& v, const vector<Point<double>>& sites) {
+        vector<double> coordinates;
+        coordinates.reserve(2 * sites.size());
+        for (const Point<double>& p : sites) {
+            coordinates.push_back(p.r);
+            coordinates.push_back(p.theta);
+        }
+        return voronoi_cells(coordinates.data(), sites.size(), v.vertexCoordinates.data(), v.numberOfVertices(),
+                             v.edgeSites.data(), v.edgeVertices.data(), v.numberOfEdges());
+    }
+}
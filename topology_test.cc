@@ -0,0 +1,111 @@
+#include <gtest/gtest.h>
+
+#include "fortune.h"
+#include "kernels.h"
+#include "topology.h"
+
+#include <cmath>
+#include <random>
+#include <vector>
+
+using namespace hyperbolic;
+
+namespace {
+    vector<Point<double>> random_sites(int n, double R, unsigned int seed) {
+        std::mt19937 rng(seed);
+        std::uniform_real_distribution<double> uniform(0.0, 1.0);
+        vector<Point<double>> sites;
+        for (int i = 0; i < n; i++)
+            sites.emplace_back(acosh(1 + (cosh(R) - 1) * uniform(rng)), 2 * M_PI * uniform(rng));
+        return sites;
+    }
+
+    // the angle at which p is seen from s
+    double angle_from(const Point<double>& s, const Point<double>& p) {
+        double x, y;
+        direction_from(s, p, x, y);
+        return atan2(y, x);
+    }
+}
+
+TEST(TopologyTest, DelaunayGraphIsSortedAndHasNoDuplicates) {
+    // the pair (0, 1) is stored twice and (2, 2) is no edge
+    vector<uint64_t> edgeSites = {1, 0, 0, 1, 2, 1, 2, 2};
+    DelaunayGraph graph = delaunay_graph(edgeSites.data(), 4, 4);
+    EXPECT_EQ(4u, graph.numberOfSites());
+    EXPECT_EQ((vector<uint64_t>{0, 1, 3, 4, 4}), graph.offsets);
+    EXPECT_EQ((vector<uint64_t>{1, 0, 2, 1}), graph.neighbors);
+    EXPECT_EQ(0u, graph.degree(3));
+}
+
+TEST(TopologyTest, DelaunayGraphHoldsEveryEdgeInBothDirections) {
+    vector<Point<double>> sites = random_sites(2000, 12, 1);
+    VoronoiDiagram v;
+    FortuneHyperbolicImplementation<FullNativeKernel<double>, double> fortune(v, sites);
+    fortune.calculate();
+
+    DelaunayGraph graph = delaunay_graph(v, sites.size());
+    ASSERT_EQ(sites.size() + 1, graph.offsets.size());
+    auto adjacent = [&](uint64_t a, uint64_t b) {
+        return std::binary_search(graph.neighbors.begin() + graph.offsets[a],
+                                  graph.neighbors.begin() + graph.offsets[a + 1], b);
+    };
+    for (size_t i = 0; i < v.numberOfEdges(); i++) {
+        EXPECT_TRUE(adjacent(v.edgeSites[2 * i], v.edgeSites[2 * i + 1]));
+        EXPECT_TRUE(adjacent(v.edgeSites[2 * i + 1], v.edgeSites[2 * i]));
+    }
+    for (size_t a = 0; a < sites.size(); a++) {
+        EXPECT_GT(graph.degree(a), 0u);
+        for (uint64_t k = graph.offsets[a]; k < graph.offsets[a + 1]; k++) {
+            EXPECT_TRUE(adjacent(graph.neighbors[k], a));
+            if (k > graph.offsets[a]) {
+                EXPECT_LT(graph.neighbors[k - 1], graph.neighbors[k]);
+            }
+        }
+    }
+}
+
+TEST(TopologyTest, CellsAreCounterclockwiseRings) {
+    vector<Point<double>> sites = random_sites(2000, 12, 2);
+    VoronoiDiagram v;
+    FortuneHyperbolicImplementation<FullNativeKernel<double>, double> fortune(v, sites);
+    fortune.calculate();
+
+    VoronoiCells cells = voronoi_cells(v, sites);
+    ASSERT_EQ(sites.size(), cells.numberOfSites());
+    ASSERT_EQ(2 * v.numberOfEdges(), cells.edges.size());
+
+    size_t checked = 0;
+    for (size_t s = 0; s < sites.size(); s++) {
+        uint64_t first = cells.offsets[s], n = cells.offsets[s + 1] - first;
+        ASSERT_GT(n, 0u);
+        // the angles of the vertices along the boundary and of the sites across edges without vertices
+        vector<double> angles;
+        for (uint64_t k = 0; k < n; k++) {
+            uint64_t edge = cells.edges[first + k], next = cells.edges[first + (k + 1) % n];
+            int64_t x = cells.vertices[first + k];
+            ASSERT_TRUE(v.edgeSites[2 * edge] == s || v.edgeSites[2 * edge + 1] == s);
+            if (v.edgeVertices[2 * edge] == VoronoiDiagram::NO_VERTEX &&
+                v.edgeVertices[2 * edge + 1] == VoronoiDiagram::NO_VERTEX) {
+                uint64_t neighbor = v.edgeSites[2 * edge] + v.edgeSites[2 * edge + 1] - s;
+                angles.push_back(angle_from(sites[s], sites[neighbor]));
+            }
+            if (x == VoronoiDiagram::NO_VERTEX) continue;
+            // consecutive edges share the vertex between them
+            EXPECT_TRUE(v.edgeVertices[2 * edge] == x || v.edgeVertices[2 * edge + 1] == x);
+            EXPECT_TRUE(v.edgeVertices[2 * next] == x || v.edgeVertices[2 * next + 1] == x);
+            angles.push_back(angle_from(sites[s], v.getVertex(x)));
+        }
+        if (angles.size() < 2) continue;
+
+        // the angles increase, so they wind around the site exactly once
+        double turn = 0;
+        for (size_t i = 0; i < angles.size(); i++) {
+            double delta = angles[(i + 1) % angles.size()] - angles[i];
+            turn += delta - 2 * M_PI * std::floor(delta / (2 * M_PI));
+        }
+        EXPECT_NEAR(2 * M_PI, turn, 1e-6);
+        checked++;
+    }
+    EXPECT_GT(checked, sites.size() / 4);
+}